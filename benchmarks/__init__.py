@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : __init__.py
+# @Desc: 框架基准测试，统计变量替换、数据提取、断言、用例生成、接口请求流程等框架自身的耗时
+
+from benchmarks.bench_runner import benchmark, run_benchmarks
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : __main__.py
+# @Desc: 基准测试命令行入口：python -m benchmarks
+#        基准结果与机器相关，不提交到代码仓库：先在基准版本上执行 python -m benchmarks -save-baseline 生成 benchmarks/baseline.json，
+#        修改代码后在同一台机器上执行 python -m benchmarks -compare 对比
+
+import sys
+import click
+from loguru import logger
+from benchmarks.bench_runner import (BENCHMARK_BASELINE_PATH, BENCHMARK_RESULT_PATH, run_benchmarks, compare,
+                                     format_results, save_json, load_json, quiet_logs)
+
+
+@click.command()
+@click.option("-k", "keyword", default=None, help="只执行名称中包含该关键字的基准测试，例如：data_handle")
+@click.option("-group", default=None, help="只执行指定分组的基准测试：data, files, request")
+@click.option("-repeat", default=5, type=int, help="每个基准测试执行的轮数")
+@click.option("-min-time", "min_time", default=0.2, type=float, help="每轮最少执行时间，单位：秒")
+@click.option("-output", default=BENCHMARK_RESULT_PATH, help="结果保存路径")
+@click.option("-baseline", default=BENCHMARK_BASELINE_PATH, help="基准结果路径")
+@click.option("-save-baseline", "save_baseline", default=False, is_flag=True, help="将本次结果保存为基准结果")
+@click.option("-compare", "compare_baseline", default=False, is_flag=True, help="与基准结果对比，存在性能退化时退出码为1")
+@click.option("-threshold", default=0.2, type=float, help="耗时增加超过该比例时视为性能退化，默认 0.2 即 20%")
+def main(keyword, group, repeat, min_time, output, baseline, save_baseline, compare_baseline, threshold):
+    quiet_logs()
+    results = run_benchmarks(keyword=keyword, group=group, repeat=repeat, min_time=min_time)
+    rows = None
+    if compare_baseline:
+        baseline_results = load_json(baseline)
+        if baseline_results is None:
+            logger.error(f"基准结果不存在或格式错误：{baseline}，请先使用 -save-baseline 生成")
+            sys.exit(2)
+        rows = compare(results, baseline_results, threshold=threshold)
+        results["comparison"] = {"baseline": baseline, "threshold": threshold, "rows": rows}
+    save_json(results, output)
+    print(format_results(results, rows))
+    logger.info(f"基准测试结果已保存：{output}")
+    if save_baseline:
+        save_json({"meta": results["meta"], "benchmarks": results["benchmarks"]}, baseline)
+        logger.info(f"基准结果已保存：{baseline}")
+    failed = [name for name, result in results["benchmarks"].items() if "error" in result]
+    regressed = [row["name"] for row in rows or [] if row["status"] == "regressed"]
+    if regressed:
+        logger.error(f"以下基准测试耗时增加超过 {threshold:.0%}：{regressed}")
+    if failed or regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
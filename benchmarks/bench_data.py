@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : bench_data.py
+# @Desc: 数据处理基准测试：变量替换、JSONPath/正则提取、批量断言
+
+import json
+from requests import Response
+from benchmarks.bench_runner import benchmark
+
+
+def make_request_data(items: int = 20) -> dict:
+    """
+    接近真实用例的请求数据：请求头、嵌套的请求参数中引用变量
+    """
+    return {
+        "id": "bench_01",
+        "title": "基准测试-创建订单",
+        "url": "${host}/api/crm/v4/order/create",
+        "method": "POST",
+        "headers": {"Content-Type": "application/json;charset=utf-8;", "Authorization": "Bearer ${token}",
+                    "X-Workspace": "${workspace_id}"},
+        "request_type": "json",
+        "payload": {
+            "workspace_id": "${workspace_id}",
+            "user": {"id": "${user_id}", "name": "${username}", "tags": ["vip", "${level}"]},
+            "items": [{"sku": f"SKU-{i:04d}", "count": i % 5 + 1, "channel": "${channel_id}",
+                       "remark": f"商品{i}，渠道 ${{channel_id}}"} for i in range(items)],
+        },
+        "validate": {"status_code": 200},
+    }
+
+
+SOURCE = {"host": "http://127.0.0.1:8000", "token": "eyJhbGciOiJIUzI1NiJ9.bench.token", "workspace_id": 10086,
+          "user_id": 20001, "username": "admin", "level": "gold", "channel_id": "ch-01"}
+
+
+def make_response_data(items: int = 2000) -> dict:
+    """
+    较大的列表响应
+    """
+    return {
+        "code": 0,
+        "message": "success",
+        "data": {
+            "total": items,
+            "list": [{"id": i, "name": f"客户{i}", "status": i % 3, "amount": round(i * 1.5, 2),
+                      "owner": {"id": i % 50, "name": f"销售{i % 50}"}, "tags": ["a", "b", "c"][:i % 3 + 1]}
+                     for i in range(items)],
+        },
+    }
+
+
+def make_response(data: dict) -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    response.encoding = "utf-8"
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+@benchmark("data_handle.variables", group="data")
+def bench_data_handle_variables():
+    """变量替换：只引用变量的请求数据，使用渲染结果缓存"""
+    from core.data_utils.data_handle import DataHandle
+
+    handle = DataHandle()
+    request_data = make_request_data()
+    return lambda: handle.data_handle(request_data, SOURCE)
+
+
+@benchmark("data_handle.variables_uncached", group="data")
+def bench_data_handle_variables_uncached():
+    """变量替换：只引用变量的请求数据，每次清空渲染结果缓存"""
+    from core.data_utils.data_handle import DataHandle
+
+    handle = DataHandle()
+    request_data = make_request_data()
+
+    def run():
+        handle.clear_render_cache()
+        handle.data_handle(request_data, SOURCE)
+
+    return run
+
+
+@benchmark("data_handle.functions", group="data")
+def bench_data_handle_functions():
+    """变量替换：请求数据中包含函数调用、表达式"""
+    from core.data_utils.data_handle import DataHandle
+
+    handle = DataHandle()
+    request_data = make_request_data()
+    request_data["payload"]["order_no"] = "${generate_identifier()}"
+    request_data["payload"]["create_time"] = "${generate_time()}"
+    request_data["payload"]["total"] = "${1+2}"
+    return lambda: handle.data_handle(request_data, SOURCE)
+
+
+@benchmark("extract.jsonpath_field", group="data")
+def bench_jsonpath_field():
+    """JSONPath 提取：大列表响应中的单个字段"""
+    from core.data_utils.extract_data_handle import json_extractor
+
+    data = make_response_data()
+    return lambda: json_extractor(data, "$.data.list[0].id")
+
+
+@benchmark("extract.jsonpath_recursive", group="data")
+def bench_jsonpath_recursive():
+    """JSONPath 提取：大列表响应中递归提取一整列"""
+    from core.data_utils.extract_data_handle import json_extractor
+
+    data = make_response_data()
+    return lambda: json_extractor(data, "$..owner.name")
+
+
+@benchmark("extract.regex", group="data")
+def bench_regex():
+    """正则提取：大列表响应文本"""
+    from core.data_utils.extract_data_handle import re_extract
+
+    text = json.dumps(make_response_data(), ensure_ascii=False)
+    return lambda: re_extract(text, r'"total": (\d+)')
+
+
+@benchmark("assert.many_assertions", group="data")
+def bench_assert_handle():
+    """批量断言：大列表响应，50 个单值、集合断言"""
+    from core.assertion_utils.assert_control import AssertHandle
+
+    response = make_response(make_response_data())
+    assert_data = {"status_code": 200}
+    for i in range(40):
+        assert_data[f"assert_id_{i}"] = {"assert_type": "==", "expect_value": i,
+                                         "type_jsonpath": f"$.data.list[{i}].id"}
+    for i in range(5):
+        assert_data[f"assert_message_{i}"] = {"assert_type": "contains", "expect_value": "succ",
+                                              "type_re": r'"message": "(\w+)"'}
+    for i in range(5):
+        assert_data[f"assert_status_{i}"] = {"assert_type": "between", "expect_value": [0, 2],
+                                             "type_jsonpath": "$.data.list[*].status"}
+    return lambda: AssertHandle(assert_data=dict(assert_data), response=response).assert_handle()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : bench_files.py
+# @Desc: 用例文件基准测试：读取 YAML 用例文件、根据 YAML/Excel 用例文件生成测试用例
+
+import os
+import copy
+import shutil
+import tempfile
+from contextlib import contextmanager
+from benchmarks.bench_runner import benchmark
+from config.settings import PROJECT_DIR
+
+# 生成合成用例目录时使用的样例文件
+SAMPLE_YAML = os.path.join(PROJECT_DIR, "workspace", "test_getWidList.yaml")
+SAMPLE_EXCEL = os.path.join(PROJECT_DIR, "workspace", "test_crm.xlsx")
+
+
+@contextmanager
+def patched(module, **attrs):
+    """
+    临时修改模块中的全局变量，例如将用例目录指向临时目录
+    """
+    origin = {name: getattr(module, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(module, name, value)
+    try:
+        yield module
+    finally:
+        for name, value in origin.items():
+            setattr(module, name, value)
+
+
+def make_case_tree(root: str, projects: int, files: int, samples=(SAMPLE_YAML, SAMPLE_EXCEL)) -> str:
+    """
+    生成合成的用例目录：projects 个项目目录，每个目录下每个样例文件复制 files 份
+    :return: 用例根目录（相当于 interfaces 目录）
+    """
+    interface_dir = os.path.join(root, "interfaces")
+    for p in range(projects):
+        project_dir = os.path.join(interface_dir, "projects", f"project_{p}")
+        os.makedirs(project_dir, exist_ok=True)
+        for sample in samples:
+            name, ext = os.path.splitext(os.path.basename(sample))
+            for f in range(files):
+                shutil.copyfile(sample, os.path.join(project_dir, f"{name}_{f}{ext}"))
+    return interface_dir
+
+
+def make_large_yaml(path: str, cases: int = 200):
+    """
+    生成包含 cases 个用例的 YAML 文件
+    """
+    from ruamel.yaml import YAML
+    from utils.files_utils.files_handle import load_yaml_file
+
+    data = load_yaml_file(SAMPLE_YAML)
+    template = data["case_info"][0]
+    data["case_info"] = []
+    for i in range(cases):
+        case = copy.deepcopy(template)
+        case["id"] = f"{template['id']}_{i}"
+        case["title"] = f"{template['title']}{i}"
+        data["case_info"].append(case)
+    with open(path, "w", encoding="utf-8") as f:
+        YAML().dump(data, f)
+
+
+@benchmark("load_yaml_file.200_cases", group="files")
+def bench_load_yaml_file():
+    """读取包含 200 个用例的 YAML 文件"""
+    from utils.files_utils.files_handle import load_yaml_file
+
+    root = tempfile.mkdtemp(prefix="bench_yaml_")
+    path = os.path.join(root, "test_large.yaml")
+    make_large_yaml(path)
+    try:
+        yield lambda: load_yaml_file(path)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _bench_generate_cases(case_file_type: int, samples, projects: int, files: int):
+    from core.case_generate_utils import case_fun_generate
+
+    root = tempfile.mkdtemp(prefix="bench_generate_")
+    interface_dir = make_case_tree(root, projects=projects, files=files, samples=samples)
+    auto_case_dir = os.path.join(root, "test_auto_case")
+
+    def run():
+        # 与 run_tests 一致：删除原有的测试用例后重新生成
+        shutil.rmtree(auto_case_dir, ignore_errors=True)
+        case_fun_generate.generate_cases()
+
+    try:
+        with patched(case_fun_generate, CASE_FILE_TYPE=case_file_type, INTERFACE_DIR=interface_dir,
+                     AUTO_CASE_DIR=auto_case_dir, AUTO_CASE_YAML_DIR=os.path.join(auto_case_dir, "yaml_case"),
+                     AUTO_CASE_EXCEL_DIR=os.path.join(auto_case_dir, "excel_case")):
+            yield run
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@benchmark("generate_cases.yaml_100_files", group="files")
+def bench_generate_cases_yaml():
+    """生成测试用例：10 个项目目录，共 100 个 YAML 用例文件"""
+    yield from _bench_generate_cases(1, samples=(SAMPLE_YAML,), projects=10, files=10)
+
+
+@benchmark("generate_cases.excel_20_files", group="files")
+def bench_generate_cases_excel():
+    """生成测试用例：4 个项目目录，共 20 个 Excel 用例文件"""
+    yield from _bench_generate_cases(2, samples=(SAMPLE_EXCEL,), projects=4, files=5)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : bench_request.py
+# @Desc: 接口请求流程基准测试：使用本地 HTTP 服务，统计一次完整的 api_request_flow 中框架自身的耗时
+
+import os
+import json
+import shutil
+import tempfile
+from benchmarks.bench_runner import benchmark
+from benchmarks.bench_data import make_response_data, SOURCE
+from utils.tools.http_server import HttpServer
+
+
+def _bench_request_flow(items: int):
+    from core.requests_utils.request_control import RequestControl
+
+    root = tempfile.mkdtemp(prefix="bench_request_")
+    with open(os.path.join(root, "customers.json"), "w", encoding="utf-8") as f:
+        json.dump(make_response_data(items), f, ensure_ascii=False)
+    server = HttpServer(port=0, directory=root, quiet=True).start()
+    request_data = {
+        "id": f"bench_flow_{items}",
+        "title": "基准测试-获取客户列表",
+        "url": "${host}/customers.json",
+        "method": "GET",
+        "request_type": "params",
+        "headers": {"Authorization": "Bearer ${token}"},
+        "payload": {"workspace_id": "${workspace_id}", "page": 1},
+        "validate": {
+            "status_code": 200,
+            "assert_code": {"assert_type": "==", "expect_value": 0, "type_jsonpath": "$.code"},
+            "assert_total": {"assert_type": "==", "expect_value": items, "type_jsonpath": "$.data.total"},
+        },
+        "extract": {"response": {"type_jsonpath": {"first_id": "$.data.list[0].id"}}},
+    }
+    global_var = dict(SOURCE, host=server.url)
+    control = RequestControl()
+    try:
+        yield lambda: control.api_request_flow(request_data=request_data, global_var=global_var)
+    finally:
+        server.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@benchmark("api_request_flow.small_response", group="request")
+def bench_request_flow_small():
+    """完整接口请求流程：本地 HTTP 服务，响应 10 条数据"""
+    yield from _bench_request_flow(10)
+
+
+@benchmark("api_request_flow.large_response", group="request")
+def bench_request_flow_large():
+    """完整接口请求流程：本地 HTTP 服务，响应 2000 条数据"""
+    yield from _bench_request_flow(2000)
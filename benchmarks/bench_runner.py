@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : bench_runner.py
+# @Desc: 基准测试执行模块，负责注册、执行基准测试，输出 JSON 结果并与基准结果对比
+
+import os
+import re
+import gc
+import sys
+import json
+import time
+import platform
+import statistics
+import importlib
+import subprocess
+from loguru import logger
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from config.settings import BASE_DIR, REPORT_DIR
+
+# 基准测试结果、基准结果的默认保存路径
+BENCHMARK_RESULT_PATH = os.path.join(REPORT_DIR, "benchmark.json")
+BENCHMARK_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+# 基准测试模块：benchmarks 目录下以 bench_ 开头的模块（bench_runner 除外）
+BENCHMARK_MODULE_PATTERN = re.compile(r"^bench_(?!runner)\w+\.py$")
+
+
+class Benchmark:
+    """
+    一个基准测试：setup 函数负责准备数据，返回需要计时的无参函数；
+    setup 也可以是生成器函数，yield 需要计时的函数，yield 之后的代码在计时结束后执行（清理临时文件、关闭服务等）
+    """
+
+    def __init__(self, name: str, setup: Callable, group: str, number: Optional[int], description: str):
+        self.name = name
+        self.setup = setup
+        self.group = group
+        self.number = number
+        self.description = description
+
+
+# 已注册的基准测试
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: str = "default", number: Optional[int] = None):
+    """
+    注册基准测试
+    :param name: 名称，建议使用 "模块.场景" 的格式，例如 data_handle.variables
+    :param group: 分组，用于筛选
+    :param number: 每轮调用次数，不传则根据 min_time 自动计算
+    """
+
+    def decorator(setup: Callable):
+        if name in BENCHMARKS:
+            raise ValueError(f"基准测试名称重复：{name}")
+        BENCHMARKS[name] = Benchmark(name=name, setup=setup, group=group, number=number,
+                                     description=(setup.__doc__ or "").strip().splitlines()[0]
+                                     if setup.__doc__ else "")
+        return setup
+
+    return decorator
+
+
+def discover() -> Dict[str, Benchmark]:
+    """
+    导入 benchmarks 目录下所有的基准测试模块
+    """
+    for filename in sorted(os.listdir(os.path.dirname(__file__))):
+        if BENCHMARK_MODULE_PATTERN.match(filename):
+            importlib.import_module(f"{__package__}.{filename[:-3]}")
+    return BENCHMARKS
+
+
+def _calibrate(func: Callable, min_time: float) -> int:
+    """
+    计算每轮的调用次数，使每轮耗时不少于 min_time 秒
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            return number
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+
+def measure(bench: Benchmark, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    执行一个基准测试：预热一次后执行 repeat 轮，每轮调用 number 次，统计单次调用的耗时
+    """
+    setup = bench.setup()
+    is_generator = hasattr(setup, "__next__")
+    func = next(setup) if is_generator else setup
+    try:
+        func()
+        number = bench.number or _calibrate(func, min_time)
+        timings = []
+        gc_enabled = gc.isenabled()
+        gc.collect()
+        # 计时过程中关闭垃圾回收，减少波动
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for _ in range(number):
+                    func()
+                timings.append((time.perf_counter() - start) / number)
+        finally:
+            if gc_enabled:
+                gc.enable()
+    finally:
+        if is_generator:
+            setup.close()
+    median = statistics.median(timings)
+    return {
+        "group": bench.group,
+        "description": bench.description,
+        "number": number,
+        "repeat": repeat,
+        "min_ms": round(min(timings) * 1000, 6),
+        "median_ms": round(median * 1000, 6),
+        "mean_ms": round(statistics.mean(timings) * 1000, 6),
+        "stdev_ms": round(statistics.stdev(timings) * 1000, 6) if len(timings) > 1 else 0.0,
+        "ops_per_sec": round(1 / median, 3) if median else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True, timeout=5)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(keyword: str = None, group: str = None, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    执行基准测试
+    :param keyword: 只执行名称中包含该关键字的基准测试
+    :param group: 只执行该分组的基准测试
+    :return: {"meta": 运行环境信息, "benchmarks": {名称: 统计结果}}
+    """
+    results = {}
+    for name, bench in sorted(discover().items()):
+        if (keyword and keyword not in name) or (group and group != bench.group):
+            continue
+        logger.info(f"执行基准测试：{name}")
+        try:
+            results[name] = measure(bench, repeat=repeat, min_time=min_time)
+        except Exception as e:
+            logger.error(f"基准测试 {name} 执行失败：{e!r}")
+            results[name] = {"group": bench.group, "error": repr(e)}
+    return {
+        "meta": {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "min_time": min_time,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.2) -> List[dict]:
+    """
+    与基准结果对比单次调用耗时的中位数
+    :param threshold: 耗时增加超过该比例时视为性能退化，例如 0.2 表示变慢 20%
+    :return: 每个基准测试的对比结果，status 为 regressed（退化）、improved（提升）、unchanged、new（基准中不存在）、error
+    """
+    rows = []
+    baseline_benchmarks = baseline.get("benchmarks", {})
+    for name, current in results["benchmarks"].items():
+        row = {"name": name, "median_ms": current.get("median_ms"), "baseline_ms": None, "ratio": None}
+        base = baseline_benchmarks.get(name) or {}
+        if "error" in current:
+            row["status"] = "error"
+        elif not base.get("median_ms"):
+            row["status"] = "new"
+        else:
+            row["baseline_ms"] = base["median_ms"]
+            row["ratio"] = round(current["median_ms"] / base["median_ms"], 3)
+            row["status"] = "regressed" if row["ratio"] > 1 + threshold else \
+                "improved" if row["ratio"] < 1 / (1 + threshold) else "unchanged"
+        rows.append(row)
+    return rows
+
+
+def format_results(results: dict, rows: List[dict] = None) -> str:
+    """
+    输出结果表格，传入对比结果时同时输出基准耗时及变化比例
+    """
+    comparison = {row["name"]: row for row in rows or []}
+    lines = [f"{'基准测试':<40}{'中位数(ms)':>14}{'最小值(ms)':>14}{'次/秒':>14}"
+             + (f"{'基准(ms)':>14}{'比例':>10}  状态" if rows is not None else "")]
+    for name, result in results["benchmarks"].items():
+        if "error" in result:
+            lines.append(f"{name:<40}{'执行失败：' + result['error']}")
+            continue
+        line = f"{name:<40}{result['median_ms']:>14.4f}{result['min_ms']:>14.4f}{result['ops_per_sec']:>14.1f}"
+        if rows is not None:
+            row = comparison.get(name, {})
+            baseline_ms = f"{row['baseline_ms']:.4f}" if row.get("baseline_ms") else "-"
+            ratio = f"{row['ratio']:.3f}" if row.get("ratio") else "-"
+            line += f"{baseline_ms:>14}{ratio:>10}  {row.get('status', '')}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def save_json(data: dict, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def quiet_logs(level: str = "WARNING"):
+    """
+    基准测试过程中框架只输出 level 及以上级别的日志，避免输出日志的耗时影响结果，基准测试自身的日志正常输出
+    """
+    min_level = logger.level(level).no
+    logger.remove()
+    logger.add(sys.stderr, level="INFO",
+               filter=lambda record: record["level"].no >= min_level or record["name"].startswith(__package__))
@@ -20,6 +20,23 @@ REPORT = {
     "department": "成都后台研发",
     "env": "test"
 }
+# Allure 报告生成配置
+REPORT_BUILD = {
+    # 压缩报告的线程数，None 表示 CPU 核数
+    "zip_workers": None,
+    # 压缩级别，1-9，越大压缩包越小、耗时越长
+    "zip_level": 6,
+    # 运行用例的同时压缩 allure_results 中已生成的附件，生成报告后压缩时直接使用
+    "precompress": True,
+    # 预先压缩的附件最多占用的内存，单位：字节
+    "precompress_max_bytes": 256 * 1024 * 1024,
+    # 不小于该大小的文件（报告的 app.js 等静态资源）压缩结果缓存到磁盘，下次运行直接使用
+    "disk_cache_min_size": 256 * 1024,
+    # 磁盘缓存中超过该天数未使用的压缩结果会被删除
+    "disk_cache_days": 7,
+    # 运行结束后在后台打开报告（allure open），不等待、不阻塞程序退出；设置了 CI 环境变量时不打开
+    "open_report": True,
+}
 # ------------------------------------ pytest相关配置 ----------------------------------------------------#
 # 失败重跑次数
 RERUN = 0
@@ -27,6 +44,159 @@ RERUN = 0
 RERUN_DELAY = 5
 # 当达到最大失败数，停止执行
 MAX_FAIL = "100"
+# ------------------------------------ 请求相关配置 ----------------------------------------------------#
+# 每个线程的 Session 连接池大小（同一个host最多保持的连接数）
+REQUEST_POOL_SIZE = 10
+# 测试结束后，在终端输出耗时最长的接口个数（按p90排序）
+SLOWEST_INTERFACES_TOP = 10
+# 响应压缩配置：请求头 Accept-Encoding 只包含本地可以解压的编码，br 需要安装 brotli，zstd 需要安装 backports.zstd
+COMPRESSION = {
+    # 是否声明支持压缩，False 时 Accept-Encoding 为 identity
+    "enabled": True,
+    # 希望使用的压缩编码，按优先级排列
+    "encodings": ["zstd", "br", "gzip", "deflate"],
+}
+# gRPC 请求（request_type 为 grpc）配置
+GRPC = {
+    # 默认超时时间，单位：秒
+    "timeout": 30,
+    # channel 参数，每个 target 只创建一个 channel，在所有用例之间共享
+    "channel_options": {
+        "grpc.keepalive_time_ms": 30000,
+        "grpc.max_receive_message_length": 64 * 1024 * 1024,
+    },
+}
+# 文件下载（request_type 为 export）配置，下载的文件保存在 outputs/download_files
+DOWNLOAD = {
+    # 每次从响应中读取、写入文件的字节数
+    "chunk_size": 1024 * 1024,
+    # 服务端支持 Range 请求（Accept-Ranges: bytes）时，并行下载的分段数
+    "parallel": 4,
+    # 每个分段的最小字节数，文件小于 2 个分段时不分段
+    "min_part_size": 8 * 1024 * 1024,
+    # 每个分段下载失败后的重试次数，重试时从已下载的位置继续下载
+    "retries": 3,
+    # 边下载边计算的校验值算法（hashlib 支持的算法），None 表示不计算
+    "checksum": "sha256",
+}
+# 调用链追踪配置，追踪文件保存在 outputs/report/trace.json，可在 chrome://tracing 或 https://ui.perfetto.dev 中打开
+TRACING = {
+    # 是否记录运行、用例、依赖、数据库查询等 span
+    "enabled": True,
+    # 是否在请求头中注入 W3C traceparent，便于与服务端调用链关联
+    "traceparent": False,
+}
+# 运行指标导出配置，每次运行结束后都会保存 Prometheus 文本格式的指标到 outputs/report/metrics.prom
+METRICS_EXPORTER = {
+    # 是否在运行过程中定时保存指标快照，并在定时任务模式（-cron）下启动指标服务
+    "enabled": False,
+    # 指标服务地址：http://127.0.0.1:9464/metrics，仅监听本机
+    "host": "127.0.0.1",
+    "port": 9464,
+    # 运行过程中保存指标快照的间隔，单位：秒
+    "interval": 15,
+}
+# ------------------------------------ 常驻进程模式配置 ----------------------------------------------------#
+WARM_DAEMON = {
+    # 常驻进程监听的本机地址，通过 python run.py -submit 提交运行请求
+    "host": "127.0.0.1",
+    "port": 9527,
+    # 等待单次运行完成的超时时间，单位：秒
+    "timeout": 3600,
+}
+# FakerData 数据池配置：按方法及参数预先生成一批数据，取值时直接从池中获取，池中数据不足时后台补充
+FAKER_POOL = {
+    # 是否启用数据池
+    "enabled": True,
+    # 每个数据池的大小
+    "size": 100,
+    # 数据池中数据少于该数量时，后台线程开始补充，需要大于 0 且小于 size
+    "watermark": 20,
+    # 同一次运行中需要保证不重复的方法，例如：["generate_phone", "generate_email"]
+    "unique": [],
+    # 随机种子，设置后每次运行生成的数据序列相同，None 表示使用运行种子（RUN_SEED）
+    "seed": None,
+}
+# 渲染结果缓存配置：只包含 ${var} 变量替换的数据（url、headers、payload 等），变量的值不变时直接使用之前的渲染结果
+RENDER_CACHE = {
+    # 是否启用
+    "enabled": True,
+    # 最多缓存的渲染结果个数
+    "max_size": 2048,
+}
+# 运行随机种子配置：每个用例的随机种子由运行种子推导，运行种子会记录在报告及 test_result.txt 中，
+# 通过 python run.py -seed <种子> 可以复现某次运行生成的数据
+RUN_SEED = {
+    # 运行种子，None 表示每次运行随机生成
+    "seed": None,
+    # 是否缓存渲染后的请求数据：--reruns 失败重跑、显式指定 -seed 重新运行时发送与之前完全相同的请求；
+    # 同一次运行中再次执行相同的用例时仍然重新渲染
+    "replay": False,
+    # 保留最近几个运行种子的请求数据缓存（outputs/cache/payloads）
+    "keep": 5,
+    # 请求数据写入磁盘前脱敏的字段（请求头、请求参数中的字段，任意层级，不区分大小写）；包含这些字段的请求数据重新运行时重新渲染
+    "redact_fields": ["password", "passwd", "pwd", "secret", "token", "access_token", "refresh_token",
+                      "Authorization", "Cookie", "X-Api-Key"],
+}
+# 接口响应缓存配置：幂等的 GET/HEAD 请求（例如用例依赖中的获取渠道列表、获取工作台信息）再次发送相同的请求时直接使用缓存的响应，
+# 遵循响应头 Cache-Control、Expires，缓存过期且有 ETag/Last-Modified 时发送条件请求重新验证，304 时继续使用缓存；每次运行开始时清空
+RESPONSE_CACHE = {
+    # 缓存策略：off（关闭）、marked（只缓存用例中 cacheable 为 true 的请求）、all（缓存所有 GET/HEAD 请求，cacheable 为 false 的除外）
+    "policy": "marked",
+    # 响应头中没有 Cache-Control（max-age、no-cache）、Expires 时的有效期，单位：秒；只对用例中显式设置了 cacheable: true 的请求有效
+    "default_ttl": 60,
+    # 缓存 key 包含的请求头，不同用户（token）的响应分别缓存；响应头 Vary 中的请求头也会参与匹配
+    "vary_headers": ["Authorization", "Cookie", "Accept", "Accept-Language"],
+    # 缓存的响应体总大小，单位：字节，超过时淘汰最久未使用的响应
+    "max_bytes": 64 * 1024 * 1024,
+    # 单个响应体超过该大小时不缓存，单位：字节
+    "max_entry_bytes": 4 * 1024 * 1024,
+}
+# 请求录制回放配置：python run.py -cassette record 录制每个请求渲染后的数据及完整响应，-cassette replay 直接返回录制的响应，
+# 不发送网络请求，用于反复调试断言、提取；录制文件按运行环境保存在 outputs/cassettes/<env>，gRPC、export 类型的请求不录制
+CASSETTE = {
+    # 未传 -cassette 时的模式：off（关闭）、record（录制）、replay（回放，未录制的请求报错）、auto（回放，未录制的请求发送后录制）
+    "mode": "off",
+    # 请求指纹是否包含协议、域名、端口，False 时不同地址的环境可以共用录制文件
+    "match_host": True,
+    # 请求指纹包含的请求头，默认不包含（token、traceparent 等每次运行都可能变化），例如：["Content-Type"]
+    "match_headers": [],
+    # 计算请求指纹时忽略的查询参数、请求体字段（任意层级），例如：["timestamp", "nonce", "sign"]
+    "ignore_fields": [],
+    # 记录不小于该大小时压缩保存，单位：字节
+    "compress_min_size": 512,
+    # 每次录制新增一个分段，分段数超过该数量时，运行结束后合并分段，并删除被重新录制覆盖的记录
+    "max_segments": 8,
+    # 录制时脱敏的请求头、响应头（不区分大小写），请求中的 cookies 也会脱敏；响应体、响应 cookies 回放时需要提取，原样保存
+    "filter_headers": ["Authorization", "Proxy-Authorization", "Cookie", "X-Api-Key"],
+    # 录制时脱敏的请求体字段（任意层级，不区分大小写）
+    "filter_fields": ["password", "passwd", "pwd", "secret", "token", "access_token", "refresh_token"],
+}
+# ------------------------------------ 压测模式配置 ----------------------------------------------------#
+MOCK_SERVER = {
+    # 本地模拟接口服务的地址，python run.py -mock 时自动启动，并将 host 指向该服务
+    "host": "127.0.0.1",
+    "port": 18000,
+    # 响应延迟分布，单位：毫秒；distribution 可选：none、fixed（mean）、uniform（min~max）、
+    # normal（mean、stdev）、lognormal（mean、stdev），normal、lognormal 的结果限制在 min~max 之间
+    "latency": {"distribution": "none", "mean": 20, "stdev": 10, "min": 0, "max": 1000},
+    # 错误注入：按比例返回 error_status 状态码的响应
+    "error_rate": 0.0,
+    "error_status": 500,
+    # 随机种子，设置后每次启动的延迟、错误注入序列相同
+    "seed": None,
+    # 覆盖或补充根据用例生成的路由，例如：
+    # {"POST /api/crm/v4/user/login": {"status": 200, "body": {...}, "headers": {...}, "latency": {...}, "error_rate": 0.1}}
+    "routes": {},
+}
+LOAD_TEST = {
+    # 默认并发数（工作线程数）
+    "concurrency": 10,
+    # 默认压测时长，单位：秒
+    "duration": 60,
+    # 压测时的日志级别，压测时请求量大，日志级别过低会严重影响压测结果
+    "log_level": "INFO",
+}
 # ------------------------------------ 配置信息 ----------------------------------------------------#
 # 1 代表 yaml文件，2 代表 excel文件，3 代表同时支持yaml和excel，其他数值将不自动生成用例
 CASE_FILE_TYPE = 2
@@ -52,6 +222,10 @@ email = {
     "user": os.getenv("EMAIL_USER"),
     "password": os.getenv("EMAIL_PASSWORD"),
     "host": os.getenv("EMAIL_HOST"),
+    # SMTP 端口，不配置时 SSL 使用 465，否则使用 587
+    "port": int(os.getenv("EMAIL_PORT")) if os.getenv("EMAIL_PORT") else None,
+    # 是否使用 SSL 连接，本地调试用的 SMTP 服务可以设置 EMAIL_SSL=false
+    "smtp_ssl": os.getenv("EMAIL_SSL", "true").lower() != "false",
     "to": os.getenv("EMAIL_TO_LIST", "").split(",") if os.getenv("EMAIL_TO_LIST") else []
 }
 
@@ -105,6 +279,17 @@ ding_talk_content = """
 wechat = {
     "webhook_url": os.getenv("WECHAT_WEBHOOK"),
 }
+# ------------------------------------ 通知发送配置 ----------------------------------------------------#
+NOTIFY = {
+    # 各渠道单次请求的超时时间，单位：秒
+    "timeout": {"email": 60, "ding_talk": 10, "wechat": 60},
+    # 发送失败后的重试次数
+    "retries": 2,
+    # 重试等待时间，第 n 次重试前等待 backoff * 2 ** (n - 1) 秒
+    "backoff": 2,
+    # 通知在后台并发发送，不阻塞运行结束；程序退出前最多等待未发送完成的通知的时间，单位：秒
+    "exit_wait": 120,
+}
 # ------------------------------------ 企业微信通知内容 ----------------------------------------------------#
 wechat_content = """
            各位同事, 大家好:
@@ -164,6 +349,20 @@ AUTO_CASE_DIR = os.path.join(CASE_DIR, "test_auto_case")
 AUTO_CASE_YAML_DIR = os.path.join(AUTO_CASE_DIR, "yaml_case")
 # Excel用例生成目录
 AUTO_CASE_EXCEL_DIR = os.path.join(AUTO_CASE_DIR, "excel_case")
+# 运行指标原始数据目录：接口耗时直方图、请求流程各阶段耗时等（多进程运行时，每个进程一个文件，结束后合并）
+METRICS_DIR = os.path.join(REPORT_DIR, "metrics")
+# 缓存目录
+CACHE_DIR = os.path.join(OUT_DIR, "cache")
+# 渲染后的请求数据缓存目录，每个运行种子一个子目录
+PAYLOAD_CACHE_DIR = os.path.join(CACHE_DIR, "payloads")
+# .proto 编译结果（描述符集、消息索引）缓存目录，按 .proto 及其导入文件的内容哈希保存
+PROTO_CACHE_DIR = os.path.join(CACHE_DIR, "protos")
+# Allure 报告压缩结果缓存目录
+REPORT_ZIP_CACHE_DIR = os.path.join(CACHE_DIR, "report_zip")
+# 请求录制文件目录，每个运行环境一个子目录
+CASSETTE_DIR = os.path.join(OUT_DIR, "cassettes")
+# 常驻进程的认证令牌文件（仅当前用户可读写），-submit 提交运行请求时读取
+WARM_DAEMON_TOKEN_FILE = os.path.join(CACHE_DIR, "warm_daemon.token")
 # Allure报告，测试结果集目录
 ALLURE_RESULTS_DIR = os.path.join(REPORT_DIR, "allure_results")
 # Allure报告，HTML测试报告目录
@@ -5,10 +5,22 @@
 
 import time
 import os
+import shutil
+import pytest
 from datetime import datetime
 from loguru import logger
-from config.settings import REPORT_DIR, CUSTOM_MARKERS, ENV_DIR, GLOBAL_VARS
-from utils.files_utils.files_handle import load_yaml_file
+from config.settings import REPORT_DIR, CUSTOM_MARKERS, ENV_DIR, GLOBAL_VARS, METRICS_DIR, SLOWEST_INTERFACES_TOP, \
+    METRICS_EXPORTER, CASSETTE
+from utils.files_utils.files_handle import load_yaml_file, get_files
+from core.metrics_utils.latency_histogram import latency_recorder, LatencyRecorder
+from core.metrics_utils.phase_timer import phase_timer, PhaseTimer
+from core.metrics_utils.tracing import tracer, Tracer
+from core.metrics_utils import metrics_exporter
+from core.metrics_utils.metrics_exporter import MetricsRegistry, PeriodicDumper
+from core.data_utils.run_seed import init_run_seed, seed_case, set_case_attempt, payload_cache
+from core.requests_utils.cassette import cassette, cassette_path, recorded_seed
+from core.requests_utils.response_cache import response_cache
+from core.report_utils.result_collector import ResultCollector
 
 
 # ------------------------------------- START: pytest钩子函数处理---------------------------------------#
@@ -17,12 +29,21 @@ def pytest_addoption(parser):
     注册自定义命令行参数
     """
     parser.addoption("--env", action="store", default="test", help="run env: test or live")
+    parser.addoption("--seed", action="store", default=None, type=int,
+                     help="run seed: reuse the seed of a previous run to reproduce its data")
+    parser.addoption("--seed-rerun", action="store_true", default=False,
+                     help="the seed is given explicitly: reuse the payloads cached by earlier runs with this seed")
+    parser.addoption("--host", action="store", default=None,
+                     help="override the host of the env config, e.g. the local mock server")
+    parser.addoption("--cassette", action="store", default=None, choices=["off", "record", "replay", "auto"],
+                     help="record responses to, or replay them from, the cassette of the env")
 
 
 def pytest_configure(config):
     """
     1. 加载环境配置到全局变量
-    2. 注册自定义标记
+    2. 初始化运行随机种子
+    3. 注册自定义标记
     """
     # 加载环境配置
     env = config.getoption("--env")
@@ -37,6 +58,36 @@ def pytest_configure(config):
             GLOBAL_VARS.update(__env)
         else:
             logger.warning(f"Environment config file not found: {env}")
+    # 覆盖环境配置中的接口地址，例如使用本地模拟接口服务（python run.py -mock）
+    if config.getoption("--host"):
+        GLOBAL_VARS["host"] = config.getoption("--host")
+
+    # 接口响应缓存只在一次运行中有效，常驻进程模式下每次运行前清空
+    response_cache.clear()
+    # 请求录制回放：录制文件按运行环境保存
+    cassette.configure(mode=config.getoption("--cassette") or CASSETTE["mode"], path=cassette_path(env))
+    seed = config.getoption("--seed")
+    if seed is None and cassette.replaying:
+        # 回放时使用录制时的运行种子，生成与录制时相同的请求数据
+        seed = recorded_seed(cassette.path)
+
+    # 初始化运行种子，xdist 的 worker 进程通过环境变量使用主进程的种子
+    config._run_seed = init_run_seed(seed)
+    logger.info(f"本次运行的随机种子：{config._run_seed}")
+    # 渲染后的请求数据缓存：失败重跑时使用内存中的缓存，显式指定种子重新运行时才使用磁盘上的缓存
+    payload_cache.configure(reuse_disk=config.getoption("--seed-rerun") or (seed is not None and cassette.replaying))
+
+    # 主进程清空上一次运行的指标数据（xdist 的 worker 进程在主进程之后启动）
+    if not hasattr(config, "workerinput"):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        payload_cache.prune(current_seed=config._run_seed)
+        # 主进程汇总测试结果，run.py 运行时会传入自己的收集器，不重复注册
+        if not any(isinstance(plugin, ResultCollector) for plugin in config.pluginmanager.get_plugins()):
+            config.pluginmanager.register(ResultCollector(), "result_collector")
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    # 请求流程各阶段记录为 api_request_flow 的子 span
+    phase_timer.add_hook(tracer.phase_hook)
+    phase_timer.add_hook(metrics_exporter.phase_hook)
 
     # 注册自定义标记
     logger.debug(f"需要注册的标记：{CUSTOM_MARKERS}")
@@ -54,6 +105,74 @@ def pytest_configure(config):
                 config.addinivalue_line('markers', f'{k}:{v}')
 
 
+def pytest_sessionstart(session):
+    """
+    开始记录本进程的运行 span，用例、依赖、请求等 span 都是它的子 span
+    """
+    config = session.config
+    worker_id = config.workerinput["workerid"] if hasattr(config, "workerinput") else "main"
+    config._run_span = tracer.span("pytest_session", "run", worker=worker_id).start()
+    # 运行过程中定时保存指标快照，定时任务模式下的指标服务会读取这些快照
+    if METRICS_EXPORTER["enabled"]:
+        config._metrics_dumper = PeriodicDumper(metrics_exporter.registry,
+                                                os.path.join(METRICS_DIR, f"prom_{worker_id}.json"),
+                                                interval=METRICS_EXPORTER["interval"]).start()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """
+    每个用例（包含 fixture 的前置、后置处理）记录为一个 span
+    """
+    with tracer.span(item.nodeid, "case"):
+        yield
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """
+    使用由运行种子推导出的用例种子，失败重跑时生成相同的随机数据
+    """
+    callspec = getattr(item, "callspec", None)
+    case = callspec.params.get("case") if callspec else None
+    # 失败重跑（pytest-rerunfailures）时 execution_count 从 2 开始
+    set_case_attempt(max(getattr(item, "execution_count", 1) - 1, 0))
+    seed_case(case.get("id") if isinstance(case, dict) and case.get("id") else item.nodeid)
+
+
+def pytest_sessionfinish(session):
+    """
+    保存当前进程的接口耗时直方图、请求流程各阶段耗时、调用链、运行指标；主进程合并所有进程的数据，生成汇总文件
+    """
+    config = session.config
+    worker_id = config.workerinput["workerid"] if hasattr(config, "workerinput") else "main"
+    run_span = getattr(config, "_run_span", None)
+    if run_span is not None:
+        run_span.end()
+    if tracer.enabled:
+        tracer.dump(os.path.join(METRICS_DIR, f"trace_{worker_id}.json"), process_name=worker_id)
+    metrics_dumper = getattr(config, "_metrics_dumper", None)
+    if metrics_dumper is not None:
+        metrics_dumper.stop()
+    else:
+        metrics_exporter.registry.dump(os.path.join(METRICS_DIR, f"prom_{worker_id}.json"))
+    cassette.close(compact=worker_id == "main")
+    latency_recorder.dump(os.path.join(METRICS_DIR, f"latency_{worker_id}.json"))
+    phase_timer.dump(os.path.join(METRICS_DIR, f"phase_{worker_id}.json"))
+    if worker_id == "main":
+        merged = LatencyRecorder.load(get_files(target=METRICS_DIR, start="latency_", end=".json"))
+        merged.write_summary(os.path.join(REPORT_DIR, "latency_summary.json"))
+        config._latency_recorder = merged
+        merged_phases = PhaseTimer.load(get_files(target=METRICS_DIR, start="phase_", end=".json"))
+        merged_phases.write_report(os.path.join(REPORT_DIR, "phase_timing.json"))
+        config._phase_timer = merged_phases
+        MetricsRegistry.load(get_files(target=METRICS_DIR, start="prom_", end=".json")).write_text(
+            os.path.join(REPORT_DIR, "metrics.prom"))
+        if tracer.enabled:
+            Tracer.merge_files(get_files(target=METRICS_DIR, start="trace_", end=".json"),
+                               os.path.join(REPORT_DIR, "trace.json"), trace_id=tracer.trace_id)
+
+
 def pytest_terminal_summary(terminalreporter, config):
     """
     收集测试结果
@@ -83,6 +202,7 @@ def pytest_terminal_summary(terminalreporter, config):
     _sessionstarttime = getattr(config, "_sessionstarttime", time.time())
 
     _DURATION = time.time() - _sessionstarttime
+    _SEED = getattr(config, "_run_seed", None)
 
     session_start_time = datetime.fromtimestamp(_sessionstarttime)
     _START_TIME = f"{session_start_time.year}年{session_start_time.month}月{session_start_time.day}日 " \
@@ -100,6 +220,7 @@ def pytest_terminal_summary(terminalreporter, config):
                 f"- 失败用例个数（failed）: {_FAILED} 个\n" \
                 f"- 异常用例个数（error）: {_ERROR} 个\n" \
                 f"- 重跑的用例数(--reruns的值): {_RERUN} 个 ({reruns_value})\n" \
+                f"- 随机种子(seed): {_SEED} （复现本次运行的数据：python run.py -seed {_SEED}）\n" \
                 f"--------------------------------------------------------------\n" \
                 f"- 忽略(deselected)的用例:\n{deselected_cases}\n" \
                 f"--------------------------------------------------------------\n"
@@ -112,6 +233,24 @@ def pytest_terminal_summary(terminalreporter, config):
         test_result = "- 用例成功率: 0.00 %\n"
         logger.critical(f"{test_info}{test_result}")
 
+    # 输出耗时最长的接口
+    merged = getattr(config, "_latency_recorder", None)
+    if merged and merged.histograms:
+        terminalreporter.write_sep("-", f"耗时最长的接口（Top {SLOWEST_INTERFACES_TOP}，按p90排序）")
+        terminalreporter.write_line(f"{'接口ID':<40}{'请求数':>8}{'p50(ms)':>12}{'p90(ms)':>12}{'p99(ms)':>12}{'max(ms)':>12}")
+        for interface_id, item in merged.slowest(top=SLOWEST_INTERFACES_TOP):
+            terminalreporter.write_line(f"{interface_id:<40}{item['count']:>8}{item['p50_ms']:>12}"
+                                        f"{item['p90_ms']:>12}{item['p99_ms']:>12}{item['max_ms']:>12}")
+
+    # 输出请求流程各阶段的耗时占比，用于区分框架自身耗时与接口响应耗时
+    merged_phases = getattr(config, "_phase_timer", None)
+    if merged_phases and merged_phases.run:
+        terminalreporter.write_sep("-", "请求流程各阶段耗时")
+        terminalreporter.write_line(f"{'阶段':<24}{'次数':>8}{'总耗时(ms)':>14}{'平均(ms)':>12}{'最大(ms)':>12}{'占比%':>10}")
+        for phase, item in merged_phases.report()["run"].items():
+            terminalreporter.write_line(f"{phase:<24}{item['count']:>8}{item['total_ms']:>14}{item['mean_ms']:>12}"
+                                        f"{item['max_ms']:>12}{item.get('percent', 0.0):>10}")
+
     # 这里是方便在流水线里面发送测试结果到钉钉/企业微信的
     with open(file=os.path.join(REPORT_DIR, "test_result.txt"), mode="w", encoding="utf-8") as f:
         f.write(f"{test_info}{test_result}")
@@ -29,6 +29,8 @@ class AssertUtils:
         """
         self.assert_data = assert_data
         self.response = response
+        # 缓存解析后的响应json，避免多个断言重复解析大体积的列表响应
+        self._response_json = None
         if assert_data and db_info:
             self.db_connect = MysqlServer(**db_info)
 
@@ -76,23 +78,36 @@ class AssertUtils:
             raise ValueError("断言数据: {self.assert_data} 缺少 'sql' 属性或 'sql' 为空")
         return self.db_connect.query_all(sql=self.assert_data["sql"])
 
+    @property
+    def response_json(self):
+        """
+        获取解析后的响应json，只解析一次
+        """
+        if self._response_json is None:
+            self._response_json = self.response.json()
+        return self._response_json
+
     def get_actual_value_by_response(self):
         """
         从接口响应中获取实际值。
-        优先级：JSONPath > 正则表达式 > 响应文本。
+        优先级：JSONPath > 正则表达式 > 响应文本（schema 断言为整个响应json）。
         
         Returns:
             Any: 从响应中提取的实际值。
         """
         # 1. 尝试使用 JSONPath 提取
         if "type_jsonpath" in self.assert_data and self.assert_data["type_jsonpath"]:
-            return json_extractor(obj=self.response.json(), expr=self.assert_data["type_jsonpath"])
+            return json_extractor(obj=self.response_json, expr=self.assert_data["type_jsonpath"])
         
         # 2. 尝试使用正则表达式提取
         if "type_re" in self.assert_data and self.assert_data["type_re"]:
             return re_extract(obj=self.response.text, expr=self.assert_data["type_re"])
         
-        # 3. 默认返回响应文本
+        # 3. schema 断言默认校验整个响应json
+        if self.assert_data.get("assert_type") == AssertMethod.json_schema.value:
+            return self.response_json
+
+        # 4. 默认返回响应文本
         else:
             return self.response.text
 
@@ -128,6 +143,14 @@ class AssertUtils:
         )
         return self.assert_data.get("expect_value")
 
+    @staticmethod
+    def shorten(value, max_length: int = 500):
+        """
+        截断过长的值，用于日志及allure步骤展示
+        """
+        text = str(value)
+        return text if len(text) <= max_length else f"{text[:max_length]}...(共{len(text)}个字符)"
+
     @property
     def assert_function_mapping(self):
         """
@@ -169,10 +192,10 @@ class AssertUtils:
                      f"expect_value: {expect_value}\n"
                      f"actual_value: {actual_value}\n")
                      
-        # 构造默认的断言描述信息
+        # 构造默认的断言描述信息，集合断言提取出的列可能很长，这里截断后再展示
         message = message or (f"断言 --> "
-                              f"预期结果：{type(expect_value)} || {expect_value}"
-                              f"实际结果：{type(actual_value)} || {actual_value}")
+                              f"预期结果：{type(expect_value)} || {self.shorten(expect_value)}"
+                              f"实际结果：{type(actual_value)} || {self.shorten(actual_value)}")
                               
         # 3. 执行断言并记录 Allure
         with allure.step(message):
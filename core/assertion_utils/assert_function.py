@@ -4,7 +4,8 @@
 # @Desc: 
 
 import allure
-from typing import Any, Union, Text
+from typing import Any, Union, Text, Dict
+from core.assertion_utils import schema_validator
 
 @allure.step("预期结果：{expect_value}  == 实际结果：{actual_value}")
 def equals(expect_value: Any, actual_value: Any, message: Text = ""):
@@ -152,3 +153,190 @@ def endswith(expect_value: Any, actual_value: Any, message: Text = ""):
     检查实际结果的结尾是否和预期结果内容相等
     """
     assert str(actual_value).endswith(str(expect_value)), message
+
+
+# ------------------------------------- 集合断言：针对列表响应中提取出的一整列数据 -------------------------------------#
+# 集合断言用于处理列表接口返回的大量数据，例如通过 $..status 提取出的整列状态值。
+# 每个断言只对提取出的列做一次遍历；当列中全部为数值时，使用 NumPy 向量化运算（未安装 NumPy 时退化为纯 Python 单次遍历）。
+# NumPy 为可选依赖，不在 requirements.txt 中，需要时单独安装：pip install numpy
+# 所有集合断言在提取出的列为空（jsonpath 未匹配到数据）时都断言失败，避免 jsonpath 写错时断言被跳过。
+
+_NUMPY = None
+
+
+def _get_numpy():
+    """
+    延迟导入 numpy，numpy 为可选依赖，未安装时返回 None
+    """
+    global _NUMPY
+    if _NUMPY is None:
+        try:
+            import numpy
+            _NUMPY = numpy
+        except ImportError:
+            _NUMPY = False
+    return _NUMPY or None
+
+
+def _to_column(actual_value: Any) -> list:
+    """
+    将 jsonpath 提取结果统一转换为列表，列为空时断言失败
+    json_extractor 提取到单个值时会直接返回该值，未提取到时返回 None，这里统一处理成列表
+    """
+    if actual_value is None:
+        column = []
+    elif isinstance(actual_value, (list, tuple)):
+        column = list(actual_value)
+    else:
+        column = [actual_value]
+    assert column, "actual_value 为空，无法进行集合断言"
+    return column
+
+
+def _is_number(value: Any) -> bool:
+    """判断是否为数值（bool 不视为数值）"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _numeric_array(column: list):
+    """
+    当列中全部是数值时，返回 numpy 数组，否则返回 None
+    """
+    np = _get_numpy()
+    if np is None or not column:
+        return None
+    try:
+        array = np.asarray(column)
+    except (ValueError, TypeError):
+        return None
+    return array if array.dtype.kind in "iuf" else None
+
+
+@allure.step("集合断言 --> 所有元素都等于预期结果：{expect_value}")
+def all_equals(expect_value: Any, actual_value: Any, message: Text = ""):
+    """
+    判断提取出的列中，所有元素都等于预期结果
+    """
+    column = _to_column(actual_value)
+    array = _numeric_array(column) if _is_number(expect_value) else None
+    if array is not None:
+        assert bool((array == expect_value).all()), message
+    else:
+        assert all(item == expect_value for item in column), message
+
+
+@allure.step("集合断言 --> 至少有一个元素等于预期结果：{expect_value}")
+def any_equals(expect_value: Any, actual_value: Any, message: Text = ""):
+    """
+    判断提取出的列中，至少有一个元素等于预期结果
+    """
+    column = _to_column(actual_value)
+    array = _numeric_array(column) if _is_number(expect_value) else None
+    if array is not None:
+        assert bool((array == expect_value).any()), message
+    else:
+        assert any(item == expect_value for item in column), message
+
+
+@allure.step("集合断言 --> 没有任何元素等于预期结果：{expect_value}")
+def none_equals(expect_value: Any, actual_value: Any, message: Text = ""):
+    """
+    判断提取出的列中，没有任何元素等于预期结果
+    """
+    column = _to_column(actual_value)
+    array = _numeric_array(column) if _is_number(expect_value) else None
+    if array is not None:
+        assert not bool((array == expect_value).any()), message
+    else:
+        assert not any(item == expect_value for item in column), message
+
+
+@allure.step("集合断言 --> 元素按 {expect_value} 排序")
+def sorted_by(expect_value: Text, actual_value: Any, message: Text = ""):
+    """
+    判断提取出的列是否有序
+    :param expect_value: 排序方式，asc 升序， desc 降序
+    """
+    assert str(expect_value).lower() in ("asc", "desc"), "expect_value 需要为 asc/desc"
+    descending = str(expect_value).lower() == "desc"
+    column = _to_column(actual_value)
+    array = _numeric_array(column)
+    if array is not None:
+        # 直接比较相邻元素，不做减法：无符号整数相减会溢出回绕
+        ordered = array[1:] <= array[:-1] if descending else array[1:] >= array[:-1]
+        assert bool(ordered.all()), message
+    elif descending:
+        assert all(a >= b for a, b in zip(column, column[1:])), message
+    else:
+        assert all(a <= b for a, b in zip(column, column[1:])), message
+
+
+@allure.step("集合断言 --> 元素是否唯一：{expect_value}")
+def unique_by(expect_value: bool, actual_value: Any, message: Text = ""):
+    """
+    判断提取出的列中的元素是否唯一
+    :param expect_value: True 表示元素必须唯一，False 表示必须存在重复元素
+    """
+    assert isinstance(expect_value, bool), "expect_value 需要为 bool 类型"
+    column = _to_column(actual_value)
+    array = _numeric_array(column)
+    if array is not None:
+        is_unique = len(_get_numpy().unique(array)) == len(array)
+    else:
+        seen = set()
+        is_unique = True
+        for item in column:
+            # dict/list 等不可哈希类型，转成字符串后再判断
+            key = item if isinstance(item, (str, int, float, bool, type(None))) else repr(item)
+            if key in seen:
+                is_unique = False
+                break
+            seen.add(key)
+    assert is_unique == expect_value, message
+
+
+@allure.step("集合断言 --> 满足条件的元素个数：{expect_value}")
+def count_where(expect_value: dict, actual_value: Any, message: Text = ""):
+    """
+    判断提取出的列中，等于指定值的元素个数
+    :param expect_value: 格式：{"value": 1, "count": 10}，表示等于1的元素个数为10
+    """
+    assert isinstance(expect_value, dict) and {"value", "count"} <= set(expect_value), \
+        "expect_value 需要为 dict 类型，且包含 value、count 两个键"
+    target = expect_value["value"]
+    column = _to_column(actual_value)
+    array = _numeric_array(column) if _is_number(target) else None
+    if array is not None:
+        count = int((array == target).sum())
+    else:
+        count = sum(1 for item in column if item == target)
+    assert count == expect_value["count"], message or f"满足条件的元素个数：{count}"
+
+
+@allure.step("集合断言 --> 所有元素都在区间 {expect_value} 内")
+def range_between(expect_value: Union[list, tuple], actual_value: Any, message: Text = ""):
+    """
+    判断提取出的数值列中，所有元素都在闭区间 [min, max] 内
+    :param expect_value: 格式：[min, max]
+    """
+    assert isinstance(expect_value, (list, tuple)) and len(expect_value) == 2, \
+        "expect_value 需要为 [min, max] 格式"
+    min_val, max_val = expect_value
+    column = _to_column(actual_value)
+    array = _numeric_array(column)
+    if array is not None:
+        assert bool(((array >= min_val) & (array <= max_val)).all()), message
+    else:
+        assert all(_is_number(item) and min_val <= item <= max_val for item in column), message
+
+
+@allure.step("JSON Schema 断言 --> 响应数据符合预期的 schema")
+def json_schema(expect_value: Union[Dict, Text], actual_value: Any, message: Text = ""):
+    """
+    使用 JSON Schema 校验整个响应（或 jsonpath 提取出的部分数据）
+    :param expect_value: schema 字典，或者 schema 文件路径（json/yaml，相对路径基于 FILES_DIR）
+    """
+    try:
+        schema_validator.validate(schema=expect_value, instance=actual_value)
+    except AssertionError as e:
+        raise AssertionError(f"{message}\n{e}" if message else str(e)) from None
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : schema_validator.py
+# @Desc: JSON Schema 校验模块，schema 编译为校验函数后按 schema 哈希缓存
+
+import os
+import json
+import hashlib
+import threading
+import fastjsonschema
+from loguru import logger
+from typing import Any, Callable, Dict, Union
+from config.settings import FILES_DIR
+from utils.files_utils.files_handle import load_yaml_file, load_json_file
+
+# 已编译的校验函数缓存，key 为 schema 的哈希值
+_VALIDATOR_CACHE: Dict[str, Callable] = {}
+# 从文件加载的 schema 缓存，key 为 (文件路径, 修改时间)
+_SCHEMA_FILE_CACHE: Dict[tuple, Dict] = {}
+_LOCK = threading.Lock()
+
+# OpenAPI 中常见但 JSON Schema 未定义的 format，编译时按“不校验”处理
+_OPENAPI_FORMATS = {
+    fmt: (lambda value: True) for fmt in ("int32", "int64", "float", "double", "byte", "binary", "password")
+}
+
+
+def schema_hash(schema: Dict) -> str:
+    """
+    计算 schema 的哈希值，键排序后序列化，保证相同结构的 schema 哈希一致
+    """
+    content = json.dumps(schema, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def load_schema(schema: Union[Dict, str]) -> Dict:
+    """
+    获取 schema，支持直接传入 dict，或者传入 schema 文件路径（json/yaml，相对路径基于 FILES_DIR）
+    """
+    if isinstance(schema, dict):
+        return schema
+    if isinstance(schema, str):
+        file_path = schema if os.path.isabs(schema) else os.path.join(FILES_DIR, schema)
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"schema 文件不存在：{file_path}")
+        key = (file_path, os.path.getmtime(file_path))
+        if key not in _SCHEMA_FILE_CACHE:
+            loader = load_json_file if file_path.lower().endswith(".json") else load_yaml_file
+            _SCHEMA_FILE_CACHE[key] = loader(file_path)
+        return _SCHEMA_FILE_CACHE[key]
+    raise TypeError(f"schema 仅支持 dict 或 schema 文件路径，当前类型：{type(schema)}")
+
+
+def get_schema_validator(schema: Union[Dict, str]) -> Callable:
+    """
+    获取 schema 对应的校验函数，首次使用时编译，之后按 schema 哈希复用
+    """
+    schema = load_schema(schema)
+    key = schema_hash(schema)
+    validator = _VALIDATOR_CACHE.get(key)
+    if validator is None:
+        with _LOCK:
+            validator = _VALIDATOR_CACHE.get(key)
+            if validator is None:
+                logger.trace(f"编译 JSON Schema，schema 哈希：{key}")
+                validator = fastjsonschema.compile(schema, formats=_OPENAPI_FORMATS)
+                _VALIDATOR_CACHE[key] = validator
+    return validator
+
+
+def validate(schema: Union[Dict, str], instance: Any) -> None:
+    """
+    使用编译后的校验函数校验数据，不符合 schema 时抛出 AssertionError
+    """
+    validator = get_schema_validator(schema)
+    try:
+        validator(instance)
+    except fastjsonschema.JsonSchemaValueException as e:
+        raise AssertionError(f"响应数据不符合 schema：{e.message}，校验规则：{e.rule}={e.rule_definition}")
@@ -141,7 +141,9 @@ class CaseDataCheck:
                         "wait_seconds": self.case_data.get(TestCaseEnum.WAIT_SECONDS.value[0]),
                         "validate": self.case_data.get(TestCaseEnum.VALIDATE.value[0]) or self.case_data.get("assert_response"),
                         'extract': self.case_data.get(TestCaseEnum.EXTRACT.value[0]),
-                        "case_dependence": self.case_data.get(TestCaseEnum.CASE_DEPENDENCE.value[0])
+                        "case_dependence": self.case_data.get(TestCaseEnum.CASE_DEPENDENCE.value[0]),
+                        "proto": self.case_data.get(TestCaseEnum.PROTO.value[0]),
+                        "cacheable": self.case_data.get(TestCaseEnum.CACHEABLE.value[0])
                     }
                     case_list.append(case_data)
 
@@ -11,6 +11,7 @@ from datetime import datetime
 from utils.files_utils.files_handle import load_yaml_file, get_files, get_relative_path
 from utils.files_utils.excel_handle import ExcelHandle
 from config.settings import CASE_FILE_TYPE, CUSTOM_MARKERS, AUTO_CASE_DIR, INTERFACE_DIR, AUTO_CASE_YAML_DIR, AUTO_CASE_EXCEL_DIR
+from core.metrics_utils.tracing import tracer
 from core.case_generate_utils.case_data_analysis import CaseDataCheck, CaseCheckException
 
 """
@@ -80,6 +81,61 @@ def clean_case_data(data):
 
 
 
+def load_excel_case_file(file: str) -> dict:
+    """
+    读取 Excel 用例文件，转换为与 YAML 用例文件相同的结构：
+    case_common 表单为公共配置，其他表单的每一行为一个用例（ID 为空的行跳过），单元格中的 JSON 字符串解析为对象
+    """
+    excel = ExcelHandle(file)
+    sheets = excel.read()
+    yaml_data = {}
+    case_list = []
+    for sheet in sheets:
+        if sheet['sheet_name'] == "case_common":
+            if sheet['data']:
+                common_data = sheet['data'][0]
+                # 处理 case_common 中的 json 字段
+                for k, v in common_data.items():
+                    common_data[k] = try_parse_json(v)
+                    
+                yaml_data["case_common"] = common_data
+                # 特殊处理 case_markers，如果解析后仍是字符串，按逗号分隔
+                if "case_markers" in yaml_data["case_common"]:
+                    markers = yaml_data["case_common"]["case_markers"]
+                    if isinstance(markers, str):
+                        yaml_data["case_common"]["case_markers"] = [m.strip() for m in markers.split(',')]
+        else:
+            # 处理用例数据中的 JSON 字段
+            valid_rows = []
+            for row in sheet['data']:
+                # 过滤掉 ID 为空的行（可能是空行或注释行）
+                if not row.get('id'):
+                    continue
+                    
+                for k, v in row.items():
+                    row[k] = try_parse_json(v)
+                
+                # 数据清洗：处理 password 等敏感字段的类型转换
+                clean_case_data(row)
+                
+                valid_rows.append(row)
+            case_list.extend(valid_rows)
+    
+    # 如果没有找到 case_common，尝试使用默认值或报错
+    # 为了兼容性，如果没有 case_common，可能在 case_list 中
+    
+    # 将收集到的所有 case 放入 case_info
+    yaml_data["case_info"] = case_list
+    
+    # 确保 case_common 存在，防止后续处理报错
+    if "case_common" not in yaml_data:
+        yaml_data["case_common"] = {}
+        
+    # 兼容 common_dependence
+    yaml_data["common_dependence"] = None
+    return yaml_data
+
+
 def __load_case_file(file):
     """
     读取用例数据(yaml/excel)并生成对应的测试用例文件 (.py)
@@ -96,53 +152,7 @@ def __load_case_file(file):
             if file.endswith(('.yaml', '.yml')):
                 yaml_data = load_yaml_file(file)
             elif file.endswith(('.xlsx', '.xls')):
-                excel = ExcelHandle(file)
-                sheets = excel.read()
-                yaml_data = {}
-                case_list = []
-                for sheet in sheets:
-                    if sheet['sheet_name'] == "case_common":
-                        if sheet['data']:
-                            common_data = sheet['data'][0]
-                            # 处理 case_common 中的 json 字段
-                            for k, v in common_data.items():
-                                common_data[k] = try_parse_json(v)
-                                
-                            yaml_data["case_common"] = common_data
-                            # 特殊处理 case_markers，如果解析后仍是字符串，按逗号分隔
-                            if "case_markers" in yaml_data["case_common"]:
-                                markers = yaml_data["case_common"]["case_markers"]
-                                if isinstance(markers, str):
-                                    yaml_data["case_common"]["case_markers"] = [m.strip() for m in markers.split(',')]
-                    else:
-                        # 处理用例数据中的 JSON 字段
-                        valid_rows = []
-                        for row in sheet['data']:
-                            # 过滤掉 ID 为空的行（可能是空行或注释行）
-                            if not row.get('id'):
-                                continue
-                                
-                            for k, v in row.items():
-                                row[k] = try_parse_json(v)
-                            
-                            # 数据清洗：处理 password 等敏感字段的类型转换
-                            clean_case_data(row)
-                            
-                            valid_rows.append(row)
-                        case_list.extend(valid_rows)
-                
-                # 如果没有找到 case_common，尝试使用默认值或报错
-                # 为了兼容性，如果没有 case_common，可能在 case_list 中
-                
-                # 将收集到的所有 case 放入 case_info
-                yaml_data["case_info"] = case_list
-                
-                # 确保 case_common 存在，防止后续处理报错
-                if "case_common" not in yaml_data:
-                    yaml_data["case_common"] = {}
-                    
-                # 兼容 common_dependence
-                yaml_data["common_dependence"] = None 
+                yaml_data = load_excel_case_file(file)
             else:
                 logger.error(f"不支持的文件类型: {file}")
                 return False
@@ -236,6 +246,7 @@ def __load_case_file(file):
         return False
 
 
+@tracer.traced("generate_cases", "generate")
 def generate_cases():
     """
     入口函数：根据配置文件，从指定类型文件中读取所有用例数据，并自动生成测试用例
@@ -271,7 +282,8 @@ def generate_cases():
         for file in files:
             try:
                 logger.trace(f"正在处理文件: {file}")
-                __load_case_file(file=file)
+                with tracer.span(os.path.basename(file), "generate", file=file):
+                    __load_case_file(file=file)
             except Exception as e:
                 logger.error(f"自动生成测试用例时发生错误, 用例文件：{file} | 错误信息: {str(e)}")
     except Exception as e:
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : warm_daemon.py
+# @Desc: 常驻进程模块，保持解释器、依赖库、已生成的用例以及连接池常驻，通过本机 socket 接收运行请求（需要令牌认证）
+
+import os
+import sys
+import json
+import time
+import hmac
+import uuid
+import queue
+import shutil
+import hashlib
+import secrets
+import socket
+import threading
+import socketserver
+from loguru import logger
+from concurrent.futures import Future
+from typing import Callable, Optional
+from config.settings import INTERFACE_DIR, CASE_DIR, AUTO_CASE_DIR, REPORT_DIR, CASE_FILE_TYPE, GLOBAL_VARS, \
+    CUSTOM_MARKERS, WARM_DAEMON, WARM_DAEMON_TOKEN_FILE, FAKER_POOL
+from core.case_generate_utils.case_fun_generate import generate_cases, CASE_TEMPLATE_DIR, CONFTEST_TEMPLATE_DIR
+from core.metrics_utils.tracing import tracer
+from core.metrics_utils.phase_timer import phase_timer
+from core.metrics_utils.latency_histogram import latency_recorder
+from core.metrics_utils.metrics_exporter import registry
+from core.data_utils.data_handle import faker_pool
+from core.data_utils.run_seed import payload_cache
+
+
+def case_fingerprint() -> str:
+    """
+    计算用例数据的指纹：接口池中所有文件的路径、修改时间、大小，以及用例模板、用例文件类型配置
+    """
+    digest = hashlib.sha1(str(CASE_FILE_TYPE).encode())
+    paths = [CASE_TEMPLATE_DIR, CONFTEST_TEMPLATE_DIR]
+    for dirpath, dirnames, filenames in os.walk(INTERFACE_DIR):
+        dirnames.sort()
+        paths.extend(os.path.join(dirpath, filename) for filename in sorted(filenames))
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{path}|{stat.st_mtime_ns}|{stat.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def purge_case_modules():
+    """
+    从 sys.modules 中移除已导入的用例模块（包括用例目录下的 conftest），下次运行时 pytest 会重新导入
+    """
+    case_dir = os.path.normcase(os.path.abspath(CASE_DIR)) + os.sep
+    for name, module in list(sys.modules.items()):
+        file = getattr(module, "__file__", None)
+        if file and os.path.normcase(os.path.abspath(file)).startswith(case_dir):
+            del sys.modules[name]
+
+
+def write_token(path: str = WARM_DAEMON_TOKEN_FILE) -> str:
+    """
+    生成新的认证令牌，写入仅当前用户可读写（0600）的文件
+    """
+    token = secrets.token_hex(32)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    # 文件已存在时 os.open 不会修改权限
+    os.chmod(path, 0o600)
+    return token
+
+
+def read_token(path: str = WARM_DAEMON_TOKEN_FILE) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        raise RuntimeError(f"读取常驻进程令牌失败：{path}，请确认常驻进程已启动，且使用启动常驻进程的用户提交运行请求")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    每个连接发送一行 JSON 请求，返回一行 JSON 结果，例如：
+        请求：{"token": "...", "env": "test", "m": "smoke", "report": "no", "seed": null}
+        返回：{"exit_code": 0, "duration": 3.21, "regenerated": false, "summary": "..."}
+    发送 {"token": "...", "action": "ping"} 可以查看常驻进程状态；token 与令牌文件中的不一致时拒绝请求
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8") or "{}")
+            token = request.pop("token", None)
+            if not isinstance(token, str) or not hmac.compare_digest(token, self.server.warm_daemon.token):
+                logger.warning(f"常驻进程拒绝未认证的请求：{self.client_address}")
+                result = {"error": "认证失败：令牌不正确"}
+            elif request.pop("action", "run") == "ping":
+                result = self.server.warm_daemon.status()
+            else:
+                result = self.server.warm_daemon.submit(**request).result()
+        except Exception as e:
+            logger.exception(f"常驻进程处理请求失败：{e}")
+            result = {"error": f"{type(e).__name__}: {e}"}
+        self.wfile.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+class _DaemonServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class WarmDaemon:
+    """
+    常驻进程：
+    1. 启动时完成依赖库导入、用例生成，之后只有用例数据（接口池文件、模板）变化时才重新生成用例
+    2. 所有运行都在同一个执行线程中依次进行，线程内的请求 Session（连接池）在多次运行之间复用
+    3. 每次运行前重置全局变量、移除已导入的用例模块，清空上一次运行的耗时、调用链、指标数据
+    """
+
+    def __init__(self, runner: Callable, host: str = WARM_DAEMON["host"], port: int = WARM_DAEMON["port"],
+                 token_file: str = WARM_DAEMON_TOKEN_FILE):
+        """
+        :param runner: 执行一次测试的函数，参数为 env, m, report, regenerate, seed，返回 (pytest退出码, 报告路径)
+        :param host: 监听地址，仅支持本机地址
+        :param port: 监听端口
+        :param token_file: 认证令牌文件，启动时生成新的令牌
+        """
+        self.runner = runner
+        self.host = host
+        self.port = port
+        self.token_file = token_file
+        self.token: Optional[str] = None
+        self.fingerprint: Optional[str] = None
+        self.runs = 0
+        self.running = False
+        self._queue: "queue.Queue" = queue.Queue()
+        self._server: Optional[_DaemonServer] = None
+
+    def prepare_cases(self) -> bool:
+        """
+        用例数据有变化（或者用例目录不存在）时重新生成用例
+        :return: 是否重新生成了用例
+        """
+        fingerprint = case_fingerprint()
+        if fingerprint == self.fingerprint and os.path.exists(AUTO_CASE_DIR):
+            return False
+        logger.info("用例数据有变化，重新生成测试用例")
+        if os.path.exists(AUTO_CASE_DIR):
+            shutil.rmtree(AUTO_CASE_DIR)
+        CUSTOM_MARKERS.clear()
+        generate_cases()
+        self.fingerprint = fingerprint
+        return True
+
+    @staticmethod
+    def reset_run_state():
+        """
+        清空上一次运行留下的全局变量及统计数据
+        """
+        GLOBAL_VARS.clear()
+        latency_recorder.clear()
+        phase_timer.clear()
+        registry.clear()
+        tracer.clear(trace_id=uuid.uuid4().hex)
+        # 数据池中的数据及不重复记录只在一次运行内有效
+        if faker_pool is not None:
+            faker_pool.reset(seed=FAKER_POOL["seed"])
+        payload_cache.clear()
+        purge_case_modules()
+
+    def _run(self, env: str = "test", m: str = None, report: str = "no", seed: int = None) -> dict:
+        start = time.perf_counter()
+        self.reset_run_state()
+        regenerated = self.prepare_cases()
+        exit_code, report_path = self.runner(env=env, m=m, report=report, regenerate=False, seed=seed)
+        summary = None
+        result_path = os.path.join(REPORT_DIR, "test_result.txt")
+        if os.path.exists(result_path):
+            with open(result_path, "r", encoding="utf-8") as f:
+                summary = f.read()
+        self.runs += 1
+        return {"exit_code": int(exit_code), "duration": round(time.perf_counter() - start, 3),
+                "regenerated": regenerated, "report_path": report_path, "summary": summary}
+
+    def _worker(self):
+        """
+        执行线程：依次执行运行请求
+        """
+        while True:
+            kwargs, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            self.running = True
+            try:
+                future.set_result(self._run(**kwargs))
+            except BaseException as e:
+                # pytest 可能抛出 SystemExit/KeyboardInterrupt，不能让执行线程退出
+                logger.exception(f"常驻进程执行测试失败：{e}")
+                future.set_exception(e if isinstance(e, Exception) else RuntimeError(repr(e)))
+            finally:
+                self.running = False
+
+    def submit(self, env: str = "test", m: str = None, report: str = "no", seed: int = None) -> Future:
+        """
+        提交一次运行请求
+        :return: Future，结果为 {"exit_code", "duration", "regenerated", "report_path", "summary"}
+        """
+        future = Future()
+        self._queue.put(({"env": env, "m": m, "report": report, "seed": seed}, future))
+        return future
+
+    def status(self) -> dict:
+        return {"pid": os.getpid(), "runs": self.runs, "running": self.running, "queued": self._queue.qsize()}
+
+    def start(self) -> "WarmDaemon":
+        """
+        生成用例、启动执行线程以及 socket 服务
+        """
+        self.prepare_cases()
+        threading.Thread(target=self._worker, name="warm-daemon-runner", daemon=True).start()
+        self.token = write_token(self.token_file)
+        self._server = _DaemonServer((self.host, self.port), _RequestHandler)
+        self._server.warm_daemon = self
+        # port 为 0 时使用系统分配的端口
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="warm-daemon-server", daemon=True).start()
+        logger.info(f"常驻进程已启动：{self.host}:{self.port}，pid={os.getpid()}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.token and os.path.exists(self.token_file):
+            os.remove(self.token_file)
+
+
+def send_run_request(env: str = "test", m: str = None, report: str = "no", seed: int = None,
+                     host: str = WARM_DAEMON["host"], port: int = WARM_DAEMON["port"],
+                     timeout: float = WARM_DAEMON["timeout"], token_file: str = WARM_DAEMON_TOKEN_FILE) -> dict:
+    """
+    向常驻进程提交运行请求，等待运行结束并返回结果
+    """
+    request = {"token": read_token(token_file), "env": env, "m": m, "report": report, "seed": seed}
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline().decode("utf-8"))
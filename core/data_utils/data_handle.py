@@ -7,20 +7,35 @@ import uuid
 import copy
 import json
 import random
+import threading
+from collections import OrderedDict
 from string import Template
 from core.data_utils.data_tools import *
 from requests.cookies import RequestsCookieJar
 from requests.utils import dict_from_cookiejar
-from utils.data_utils.fake_data import FakerData
+from config.settings import FAKER_POOL, RENDER_CACHE
+from utils.data_utils.fake_data import FakerData, FakerPool
 from core.data_utils.eval_data_handle import eval_data
+from core.metrics_utils.metrics_exporter import record_cache
+
+# FakerData 数据池，未启用时为 None
+faker_pool = FakerPool(size=FAKER_POOL["size"], watermark=FAKER_POOL["watermark"], unique=FAKER_POOL["unique"],
+                       seed=FAKER_POOL["seed"]) if FAKER_POOL["enabled"] else None
+# 占位符：${var}、${func()}、${1+1}、$var
+PLACEHOLDER_PATTERN = re.compile(r"\$(?:\{([^}]*)\}|([A-Za-z_]\w*))")
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_]\w*")
+
 
 class DataHandle:
     def __init__(self):
         # 实例化FakerData类，避免反复实例，提高性能。
-        self.FakerDataClass = FakerData()
+        self.FakerDataClass = FakerData(pool=faker_pool)
         # 获取FakerData类所有自定义方法
         self.method_list = [method for method in dir(FakerData) if
                             callable(getattr(FakerData, method)) and not method.startswith("__")]
+        # 渲染结果缓存：只包含 ${var} 变量替换（不包含函数、表达式）的数据，按数据及变量的值缓存渲染结果
+        self._render_cache = OrderedDict()
+        self._render_lock = threading.Lock()
 
     def process_cookie_jar(self, _data):
         """
@@ -69,7 +84,77 @@ class DataHandle:
             result += '}'
             return replaced_text, result
 
+    @staticmethod
+    def _collect_variables(obj, source: dict, names: set) -> bool:
+        """
+        检查数据是否只依赖变量：只包含 ${var}/$var 占位符，且没有函数调用、表达式
+        :param names: 收集数据中引用的变量名
+        :return: 渲染结果只由数据本身及引用的变量值决定时返回 True
+        """
+        if isinstance(obj, str):
+            # eval_data 会执行字符串表达式，包含 "(" 的字符串可能是函数调用
+            if "(" in obj:
+                return False
+            for braced, bare in PLACEHOLDER_PATTERN.findall(obj):
+                if braced:
+                    # ${var} 在 source 中不存在时，会被当作表达式执行
+                    if not IDENTIFIER_PATTERN.fullmatch(braced) or braced not in source:
+                        return False
+                    names.add(braced)
+                else:
+                    names.add(bare)
+            return True
+        if isinstance(obj, (list, tuple)):
+            return all(DataHandle._collect_variables(item, source, names) for item in obj)
+        if isinstance(obj, dict):
+            return all(isinstance(key, (str, int, float, bool)) and DataHandle._collect_variables(value, source, names)
+                       for key, value in obj.items())
+        return obj is None or isinstance(obj, (int, float, bool))
+
+    def _render_cache_key(self, obj, source=None):
+        """
+        生成渲染结果的缓存key，数据中包含函数、表达式，或者变量的值中包含占位符时返回 None
+        """
+        source = source if isinstance(source, dict) else {}
+        names = set()
+        if not self._collect_variables(obj, source, names):
+            return None
+        values = []
+        for name in sorted(names):
+            value = repr(source.get(name))
+            # 变量的值中包含占位符时，替换后还会再次渲染
+            if "$" in value:
+                return None
+            values.append((name, value))
+        return repr(obj), tuple(values)
+
     def data_handle(self, obj, source=None):
+        """
+        将数据中的${}占位符替换成source中的值；只依赖变量的数据，直接使用之前相同变量值的渲染结果
+        """
+        cache_key = self._render_cache_key(obj, source) if RENDER_CACHE["enabled"] else None
+        if cache_key is None:
+            return self._render(obj, source)
+        with self._render_lock:
+            cached = self._render_cache.get(cache_key, self._render_cache)
+            if cached is not self._render_cache:
+                self._render_cache.move_to_end(cache_key)
+        if cached is not self._render_cache:
+            record_cache("render", True)
+            return copy.deepcopy(cached)
+        record_cache("render", False)
+        result = self._render(obj, source)
+        with self._render_lock:
+            self._render_cache[cache_key] = copy.deepcopy(result)
+            if len(self._render_cache) > RENDER_CACHE["max_size"]:
+                self._render_cache.popitem(last=False)
+        return result
+
+    def clear_render_cache(self):
+        with self._render_lock:
+            self._render_cache.clear()
+
+    def _render(self, obj, source=None):
         obj = copy.deepcopy(eval_data(obj))
         return self.data_handle_(obj, source)
 
@@ -103,7 +188,7 @@ class DataHandle:
                 obj = eval_data(obj)
 
             if not isinstance(obj, str):
-                return self.data_handle(obj)
+                return self._render(obj)
 
             # 再找一遍剩余的${}跟第一步的结果合并，提取漏掉的诸如1+1的表达式(在此认为关键字无法替换的都是表达式，最后表达式也无法处理的情况就报错或者原样返回)
             pattern = r'\$\{([^}]+)\}'  # 定义匹配以"${"开头，"}"结尾的字符串的正则表达式
@@ -112,16 +197,16 @@ class DataHandle:
             # 进行函数调用替换
             obj = self.invoke_funcs(obj, func)
             if not isinstance(obj, str):
-                return self.data_handle(obj)
+                return self._render(obj)
             # 直接返回最后的结果
             return obj
         elif isinstance(obj, list):
             for index, item in enumerate(obj):
-                obj[index] = self.data_handle(item, source)
+                obj[index] = self._render(item, source)
             return obj
         elif isinstance(obj, dict):
             for key, value in obj.items():
-                obj[key] = self.data_handle(value, source)
+                obj[key] = self._render(value, source)
             return obj
         else:
             return obj
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : run_seed.py
+# @Desc: 运行随机种子模块，由运行种子推导出每个用例的种子，并缓存渲染后的请求数据，用于失败重跑时发送相同的请求
+
+import os
+import re
+import json
+import random
+import shutil
+import hashlib
+import threading
+from loguru import logger
+from typing import Optional
+from config.settings import RUN_SEED, FAKER_POOL, PAYLOAD_CACHE_DIR
+from core.data_utils.data_handle import data_handle, faker_pool
+from core.metrics_utils.metrics_exporter import record_cache
+
+# 运行种子通过环境变量传递给 xdist 的 worker 进程
+RUN_SEED_ENV = "API_RUN_SEED"
+# 用例数据中引用的变量：${var}、$var，${func()} 中的函数名也会被匹配到，取不到值时不影响缓存
+VARIABLE_PATTERN = re.compile(r"\$\{?([A-Za-z_]\w*)")
+# 写入磁盘时敏感字段替换成的值
+REDACTED = "******"
+
+
+def redact(value, fields: frozenset = None):
+    """
+    递归替换字典中的敏感字段（不区分大小写），例如 password、Authorization
+    """
+    if fields is None:
+        fields = frozenset(name.lower() for name in RUN_SEED["redact_fields"])
+    if isinstance(value, dict):
+        return {k: REDACTED if str(k).lower() in fields and v not in (None, "") else redact(v, fields)
+                for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item, fields) for item in value]
+    return value
+
+
+def new_seed() -> int:
+    # 不使用 random 模块，避免受到上一次 random.seed 的影响
+    return int.from_bytes(os.urandom(4), "big")
+
+
+def init_run_seed(seed: Optional[int] = None) -> int:
+    """
+    初始化本次运行的随机种子：优先使用传入的种子，其次是 settings.RUN_SEED、环境变量，都没有时随机生成
+    FakerData 数据池未单独配置种子时，使用运行种子
+    """
+    if seed is None:
+        seed = RUN_SEED["seed"]
+    if seed is None and os.environ.get(RUN_SEED_ENV):
+        seed = os.environ[RUN_SEED_ENV]
+    seed = new_seed() if seed is None else int(seed)
+    os.environ[RUN_SEED_ENV] = str(seed)
+    if faker_pool is not None and FAKER_POOL["seed"] is None:
+        faker_pool.reset(seed=seed)
+    return seed
+
+
+# 当前线程正在执行的用例是第几次重跑，0 表示第一次执行
+_case_attempt = threading.local()
+
+
+def set_case_attempt(attempt: int):
+    _case_attempt.value = attempt
+
+
+def is_retry() -> bool:
+    return getattr(_case_attempt, "value", 0) > 0
+
+
+def get_run_seed() -> Optional[int]:
+    seed = os.environ.get(RUN_SEED_ENV)
+    return int(seed) if seed else None
+
+
+def derive_seed(run_seed: int, case_id: str) -> int:
+    """
+    由运行种子和用例ID推导出用例的种子，与用例的执行顺序、执行进程无关
+    """
+    return int.from_bytes(hashlib.sha256(f"{run_seed}:{case_id}".encode("utf-8")).digest()[:8], "big")
+
+
+def seed_case(case_id: str) -> Optional[int]:
+    """
+    用例执行前，使用用例种子设置 random 模块、FakerData 的随机数生成器以及数据池，${random.choice(...)}、
+    ${generate_random_int()}、${generate_name()} 等表达式每次运行生成相同的数据。
+    只设置随机数生成器的种子，Faker 实例仍然在第一次使用时才创建
+    :return: 用例种子，未初始化运行种子时返回 None
+    """
+    run_seed = get_run_seed()
+    if run_seed is None:
+        return None
+    case_seed = derive_seed(run_seed, case_id)
+    random.seed(case_seed)
+    data_handle.__self__.FakerDataClass.rng.seed(case_seed)
+    if faker_pool is not None:
+        faker_pool.seed_case(case_seed)
+    return case_seed
+
+
+class PayloadCache:
+    """
+    渲染后的请求数据缓存，按 (运行种子, 用例ID, 用例原始数据及引用的变量值) 保存：
+    1. --reruns 失败重跑时，直接使用第一次执行时缓存在内存中的请求数据，发送完全相同的请求；
+       同一次运行中再次执行相同的用例（被多个用例依赖的接口、--count 等）时重新渲染，${func()}、随机数据每次都重新生成
+    2. 显式指定 -seed 重新运行时（reuse_disk），使用之前相同种子的运行保存到磁盘的请求数据；
+       磁盘上的数据会脱敏 settings.RUN_SEED["redact_fields"] 中的字段，包含脱敏字段的请求数据不会被使用，而是重新渲染
+    3. 用例数据或引用的变量（例如 token）有变化时，缓存失效，重新渲染
+    """
+
+    def __init__(self, cache_dir: str = PAYLOAD_CACHE_DIR, keep: int = RUN_SEED["keep"]):
+        """
+        :param cache_dir: 缓存目录，每个运行种子一个子目录
+        :param keep: 保留最近几个运行种子的缓存
+        """
+        self.cache_dir = cache_dir
+        self.keep = keep
+        self.reuse_disk = False
+        self._memory = {}
+        # 本次运行中已经渲染过或已经使用过的 key，非重跑时不再使用缓存
+        self._used = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(run_seed: int, request_data: dict, source: dict = None) -> Optional[str]:
+        """
+        :return: 缓存key，用例数据无法序列化时返回 None
+        """
+        try:
+            raw = json.dumps(request_data, sort_keys=True, ensure_ascii=False, default=str)
+            variables = {name: (source or {}).get(name) for name in sorted(set(VARIABLE_PATTERN.findall(raw)))}
+            text = json.dumps(variables, sort_keys=True, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            return None
+        digest = hashlib.sha1(f"{raw}|{text}".encode("utf-8")).hexdigest()
+        return f"{run_seed}/{request_data.get('id')}-{digest}"
+
+    def _path(self, key: str) -> str:
+        run_seed, name = key.split("/", 1)
+        return os.path.join(self.cache_dir, run_seed, re.sub(r"[^\w.-]", "_", name) + ".json")
+
+    def configure(self, reuse_disk: bool = False):
+        """
+        每次运行开始时调用：清空内存中的缓存，设置是否使用之前的运行保存到磁盘的请求数据
+        """
+        self.clear()
+        self.reuse_disk = reuse_disk
+
+    def get(self, key: str, retry: bool = False) -> Optional[dict]:
+        """
+        :param retry: 当前用例是否为失败重跑
+        """
+        with self._lock:
+            if retry and key in self._memory:
+                record_cache("payload", True)
+                return json.loads(self._memory[key])
+            if key in self._used or not self.reuse_disk:
+                record_cache("payload", False)
+                return None
+            self._used.add(key)
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            record_cache("payload", False)
+            return None
+        if REDACTED in text:
+            # 包含脱敏字段（密码、token 等），使用脱敏后的数据无法发送正确的请求
+            record_cache("payload", False)
+            return None
+        record_cache("payload", True)
+        return json.loads(text)
+
+    def set(self, key: str, request_data: dict):
+        try:
+            text = json.dumps(request_data, ensure_ascii=False)
+            redacted = json.dumps(redact(request_data), ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            # 例如 cookies 为 CookieJar 对象，不缓存
+            logger.debug(f"请求数据无法序列化，不缓存：{key}，{e}")
+            return
+        with self._lock:
+            self._memory[key] = text
+            self._used.add(key)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(redacted)
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._used.clear()
+
+    def prune(self, current_seed: int = None):
+        """
+        只保留最近 keep 个运行种子的缓存
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        dirs = sorted((os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                       if name != str(current_seed)), key=os.path.getmtime, reverse=True)
+        for path in dirs[max(self.keep - 1, 0):]:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# 当前进程的请求数据缓存
+payload_cache = PayloadCache()
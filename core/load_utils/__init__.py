@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : __init__.py
+# @Desc: 
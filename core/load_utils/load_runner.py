@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : load_runner.py
+# @Desc: 压测模块，复用接口池中的 YAML 用例，按指定并发数或 RPS 持续发送请求
+
+import os
+import json
+import time
+import threading
+from loguru import logger
+from datetime import datetime
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from core.metrics_utils.tracing import tracer
+from core.metrics_utils.latency_histogram import LatencyHistogram
+from config.settings import INTERFACE_DIR, REPORT_DIR
+from core.requests_utils.request_control import RequestControl
+from core.requests_utils.case_dependence import CaseDependenceHandler
+
+
+class _Pacer:
+    """
+    控制全局发送速率：所有工作线程共享一个发送时间表，保证整体 RPS 不超过目标值
+    """
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps
+        self.next_time = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def wait(self, deadline: float) -> bool:
+        """
+        等待下一个发送时间点，超过压测截止时间则返回 False
+        """
+        with self.lock:
+            # 工作线程跟不上目标速率时，不补发积压的请求，避免瞬间突发
+            send_time = max(self.next_time, time.perf_counter())
+            self.next_time = send_time + self.interval
+        if send_time >= deadline:
+            return False
+        delay = send_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+
+class _CaseStats:
+    """
+    单个接口的压测统计数据，每个工作线程独立持有，压测结束后再合并，避免加锁
+    """
+
+    def __init__(self):
+        self.latencies = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.error_types: Dict[str, int] = {}
+
+    def record(self, latency_ms: Optional[float], error: Optional[str] = None):
+        """
+        :param latency_ms: 响应耗时，请求未发送（例如渲染请求数据失败）时为 None，不计入耗时统计
+        :param error: 错误类型
+        """
+        self.requests += 1
+        if latency_ms is not None:
+            self.latencies.record(latency_ms * 1000)
+        if error:
+            self.errors += 1
+            self.error_types[error] = self.error_types.get(error, 0) + 1
+
+    def merge(self, other: "_CaseStats"):
+        self.latencies.merge(other.latencies)
+        self.requests += other.requests
+        self.errors += other.errors
+        for error, count in other.error_types.items():
+            self.error_types[error] = self.error_types.get(error, 0) + count
+
+
+class LoadRunner:
+    """
+    压测执行类
+    1. 从接口池中加载指定ID的用例，并执行一次用例的前置依赖（case_dependence.setup）
+    2. 多个工作线程循环发送请求，每次请求前都会通过 data_handle 重新渲染请求数据
+    3. 统计每个接口的吞吐量、错误率以及 p50/p90/p99/max 响应耗时
+    """
+    # 渲染请求数据失败后，工作线程重试前等待的时间，连续失败时逐次翻倍，单位：秒
+    RENDER_BACKOFF = 0.1
+    RENDER_BACKOFF_MAX = 2.0
+
+    def __init__(self, case_ids: List[str], source: dict, concurrency: int = 10, rps: float = None,
+                 duration: float = 60, api_file_path: str = INTERFACE_DIR, db_info: dict = None):
+        """
+        :param case_ids: 需要压测的用例ID列表
+        :param source: 全局变量，用于渲染请求数据
+        :param concurrency: 并发数（工作线程数）
+        :param rps: 目标每秒请求数，不传则每个工作线程收到响应后立即发送下一个请求
+        :param duration: 压测时长，单位：秒
+        :param api_file_path: 接口池路径
+        :param db_info: 数据库配置，用于处理数据库依赖
+        """
+        if not case_ids:
+            raise ValueError("压测模式至少需要指定一个用例ID")
+        self.case_ids = case_ids
+        self.source = source
+        self.concurrency = max(int(concurrency), 1)
+        self.rps = float(rps) if rps else None
+        self.duration = float(duration)
+        self.api_file_path = api_file_path
+        self.db_info = db_info
+        self.api_data: Dict[str, dict] = {}
+
+    def setup(self):
+        """
+        加载用例数据，并执行用例的前置依赖
+        """
+        dependence_handler = CaseDependenceHandler(self.source)
+        for case_id in self.case_ids:
+            api_data = RequestControl.get_api_data(api_file_path=self.api_file_path, key=case_id)
+            self.api_data[case_id] = api_data
+            setup = (api_data.get("case_dependence") or {}).get("setup")
+            if setup:
+                logger.info(f"压测前置依赖处理：{case_id}")
+                self.source.update(dependence_handler.case_dependence_handle(setup, db_info=self.db_info) or {})
+
+    def teardown(self):
+        """
+        执行用例的后置依赖
+        """
+        dependence_handler = CaseDependenceHandler(self.source)
+        for case_id, api_data in self.api_data.items():
+            teardown = (api_data.get("case_dependence") or {}).get("teardown")
+            if teardown:
+                logger.info(f"压测后置依赖处理：{case_id}")
+                dependence_handler.case_dependence_handle(teardown, db_info=self.db_info)
+
+    def _worker(self, index: int, deadline: float, pacer: Optional[_Pacer]) -> Dict[str, _CaseStats]:
+        """
+        工作线程：按顺序轮流发送各个用例的请求，直到压测结束
+        """
+        request_control = RequestControl()
+        stats = {case_id: _CaseStats() for case_id in self.case_ids}
+        count = index
+        backoff = 0.0
+        try:
+            while True:
+                if pacer is not None:
+                    if not pacer.wait(deadline):
+                        break
+                elif time.perf_counter() >= deadline:
+                    break
+                case_id = self.case_ids[count % len(self.case_ids)]
+                count += 1
+                try:
+                    # 每次请求都重新渲染请求数据，保证随机数据、函数等每次都不同
+                    request_data = request_control.before_request(request_data=self.api_data[case_id],
+                                                                  source_data=self.source)
+                except Exception as e:
+                    # 请求未发送，只记录错误，不记录耗时；等待一段时间后再重试，避免空转
+                    if not backoff:
+                        logger.warning(f"压测渲染请求数据失败：{case_id}，{e}")
+                    stats[case_id].record(None, f"render {type(e).__name__}")
+                    backoff = min(backoff * 2 or self.RENDER_BACKOFF, self.RENDER_BACKOFF_MAX)
+                    time.sleep(max(min(backoff, deadline - time.perf_counter()), 0))
+                    continue
+                backoff = 0.0
+                error = None
+                start = time.perf_counter()
+                try:
+                    response = request_control.send_request(request_data)
+                    error = self.response_error(request_data, response)
+                except Exception as e:
+                    error = type(e).__name__
+                stats[case_id].record((time.perf_counter() - start) * 1000, error)
+        finally:
+            request_control.close_session()
+        return stats
+
+    @staticmethod
+    def response_error(request_data: dict, response) -> Optional[str]:
+        """
+        根据响应判断请求是否失败：gRPC 请求的状态码非 0（1~16）为失败，其他请求的 HTTP 状态码 >= 400 为失败
+        """
+        if str(request_data.get("request_type") or "").lower() == "grpc":
+            return f"gRPC {response.status_code}" if response.status_code != 0 else None
+        return f"HTTP {response.status_code}" if response.status_code >= 400 else None
+
+    def run(self) -> dict:
+        """
+        执行压测，返回压测报告
+        """
+        # 压测时请求量大，不记录调用链，避免 span 大量占用内存，压测结束后恢复
+        tracer_enabled = tracer.enabled
+        tracer.enabled = False
+        try:
+            self.setup()
+            logger.info(f"开始压测：用例={self.case_ids}，并发数={self.concurrency}，"
+                        f"目标RPS={self.rps or '不限制'}，压测时长={self.duration}s")
+            start_time = datetime.now()
+            pacer = _Pacer(self.rps) if self.rps else None
+            begin = time.perf_counter()
+            deadline = begin + self.duration
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="load") as executor:
+                futures = [executor.submit(self._worker, i, deadline, pacer) for i in range(self.concurrency)]
+                results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - begin
+
+            merged = {case_id: _CaseStats() for case_id in self.case_ids}
+            for worker_stats in results:
+                for case_id, case_stats in worker_stats.items():
+                    merged[case_id].merge(case_stats)
+            self.teardown()
+        finally:
+            tracer.enabled = tracer_enabled
+
+        report = self.build_report(merged, elapsed, start_time)
+        self.save_report(report)
+        return report
+
+    def build_report(self, merged: Dict[str, _CaseStats], elapsed: float, start_time: datetime) -> dict:
+        """
+        汇总压测结果
+        """
+        cases = {}
+        total_requests = total_errors = 0
+        for case_id, case_stats in merged.items():
+            latencies = case_stats.latencies.summary()
+            requests_count = case_stats.requests
+            total_requests += requests_count
+            total_errors += case_stats.errors
+            cases[case_id] = {
+                "title": self.api_data[case_id].get("title"),
+                "requests": requests_count,
+                "errors": case_stats.errors,
+                "error_rate": round(case_stats.errors / requests_count * 100, 2) if requests_count else 0.0,
+                "error_types": case_stats.error_types,
+                "throughput": round(requests_count / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": latencies["p50_ms"],
+                "p90_ms": latencies["p90_ms"],
+                "p99_ms": latencies["p99_ms"],
+                "max_ms": latencies["max_ms"],
+            }
+        return {
+            "summary": {
+                "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
+                "duration": round(elapsed, 2),
+                "concurrency": self.concurrency,
+                "target_rps": self.rps,
+                "requests": total_requests,
+                "errors": total_errors,
+                "error_rate": round(total_errors / total_requests * 100, 2) if total_requests else 0.0,
+                "throughput": round(total_requests / elapsed, 2) if elapsed else 0.0,
+            },
+            "cases": cases,
+        }
+
+    @staticmethod
+    def save_report(report: dict, report_path: str = os.path.join(REPORT_DIR, "load_test_report.json")):
+        """
+        输出压测结果到日志，并保存为json文件
+        """
+        summary = report["summary"]
+        lines = [f"{'用例ID':<30}{'请求数':>10}{'错误率%':>10}{'吞吐量/s':>12}"
+                 f"{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}"]
+        for case_id, item in report["cases"].items():
+            lines.append(f"{case_id:<30}{item['requests']:>10}{item['error_rate']:>10}{item['throughput']:>12}"
+                         f"{item['p50_ms']:>10}{item['p90_ms']:>10}{item['p99_ms']:>10}{item['max_ms']:>10}")
+        logger.success(f"\n压测完成：总请求数={summary['requests']}，错误率={summary['error_rate']}%，"
+                       f"吞吐量={summary['throughput']}/s，耗时={summary['duration']}s\n" + "\n".join(lines))
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"压测报告已保存：{report_path}")
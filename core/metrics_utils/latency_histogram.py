@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : latency_histogram.py
+# @Desc: 接口耗时直方图模块，按接口ID记录每次请求的耗时，支持多进程（xdist）合并
+
+import json
+import threading
+from loguru import logger
+from typing import Dict, Iterable, List, Optional
+
+# 耗时阶段：connect（DNS解析+TCP连接）、tls（TLS握手）、ttfb（首字节）、download（下载响应体）、total（总耗时）
+PHASES = ("connect", "tls", "upload", "ttfb", "download", "total")
+
+
+class LatencyHistogram:
+    """
+    HDR 风格的对数分桶直方图，记录单位为微秒。
+    每个 2 的幂区间再线性划分为 2^SUB_BUCKET_BITS 个子桶，相对误差小于 1%，
+    内存占用与记录次数无关，多个直方图可以直接按桶相加合并。
+    """
+    SUB_BUCKET_BITS = 7
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    @classmethod
+    def bucket_index(cls, value: int) -> int:
+        """
+        计算数值所在的桶编号，小于 SUB_BUCKET_COUNT 的数值精确记录
+        """
+        if value < cls.SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        return (shift << cls.SUB_BUCKET_BITS) + (value >> shift)
+
+    @classmethod
+    def bucket_value(cls, index: int) -> int:
+        """
+        桶编号对应的代表值（桶区间的中间值）
+        """
+        if index < cls.SUB_BUCKET_COUNT:
+            return index
+        # 桶编号 = (shift << SUB_BUCKET_BITS) + mantissa，mantissa 的取值范围是 [SUB_BUCKET_COUNT/2, SUB_BUCKET_COUNT)
+        shift, mantissa = index >> cls.SUB_BUCKET_BITS, index & (cls.SUB_BUCKET_COUNT - 1)
+        return (mantissa << shift) + (1 << shift) // 2
+
+    def record(self, value_us: int, count: int = 1):
+        """
+        记录一次耗时
+        :param value_us: 耗时，单位：微秒
+        :param count: 记录次数
+        """
+        value_us = max(int(value_us), 0)
+        index = self.bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value_us * count
+        self.min = value_us if self.min is None else min(self.min, value_us)
+        self.max = value_us if self.max is None else max(self.max, value_us)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """
+        合并另一个直方图
+        """
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, pct: float) -> int:
+        """
+        获取百分位耗时，单位：微秒
+        :param pct: 百分位，例如 99 表示 p99
+        """
+        if not self.count:
+            return 0
+        target = max(int(pct / 100 * self.count + 0.5), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(max(self.bucket_value(index), self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """
+        汇总统计数据，单位：毫秒
+        """
+        to_ms = lambda value: round((value or 0) / 1000, 2)
+        return {
+            "count": self.count,
+            "min_ms": to_ms(self.min),
+            "mean_ms": to_ms(self.total / self.count if self.count else 0),
+            "p50_ms": to_ms(self.percentile(50)),
+            "p90_ms": to_ms(self.percentile(90)),
+            "p99_ms": to_ms(self.percentile(99)),
+            "max_ms": to_ms(self.max),
+        }
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts, "count": self.count, "total": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data.get("counts", {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("total", 0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
+
+
+class LatencyRecorder:
+    """
+    按接口ID、耗时阶段记录请求耗时
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, interface_id: str, timings: dict):
+        """
+        记录一次请求的各阶段耗时
+        :param interface_id: 接口ID
+        :param timings: 各阶段耗时，单位：毫秒，例如：{"ttfb": 12.3, "download": 1.2, "total": 13.5}
+        """
+        interface_id = str(interface_id)
+        with self._lock:
+            phases = self.histograms.setdefault(interface_id, {})
+            for phase, value_ms in timings.items():
+                if phase in PHASES and value_ms is not None:
+                    phases.setdefault(phase, LatencyHistogram()).record(value_ms * 1000)
+
+    def merge(self, other: "LatencyRecorder") -> "LatencyRecorder":
+        with self._lock:
+            for interface_id, phases in other.histograms.items():
+                for phase, histogram in phases.items():
+                    self.histograms.setdefault(interface_id, {}).setdefault(phase, LatencyHistogram()).merge(histogram)
+        return self
+
+    def clear(self):
+        with self._lock:
+            self.histograms.clear()
+
+    def summary(self) -> dict:
+        """
+        每个接口的耗时汇总，total 为总耗时，phases 为各阶段耗时
+        """
+        result = {}
+        for interface_id, phases in self.histograms.items():
+            if "total" not in phases:
+                continue
+            result[interface_id] = {
+                **phases["total"].summary(),
+                "phases": {phase: phases[phase].summary() for phase in PHASES if phase in phases and phase != "total"}
+            }
+        return result
+
+    def slowest(self, top: int = 10, key: str = "p90_ms") -> List[tuple]:
+        """
+        获取耗时最长的接口
+        :param top: 数量
+        :param key: 排序依据，默认按 p90 排序
+        """
+        items = self.summary().items()
+        return sorted(items, key=lambda item: item[1][key], reverse=True)[:top]
+
+    def dump(self, file_path: str):
+        """
+        保存直方图原始数据，用于多进程合并
+        """
+        with self._lock:
+            data = {interface_id: {phase: histogram.to_dict() for phase, histogram in phases.items()}
+                    for interface_id, phases in self.histograms.items()}
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, file_paths: Iterable[str]) -> "LatencyRecorder":
+        """
+        从多个原始数据文件中加载并合并直方图
+        """
+        recorder = cls()
+        for file_path in file_paths:
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"耗时数据文件读取失败：{file_path}，{e}")
+                continue
+            other = cls()
+            for interface_id, phases in data.items():
+                other.histograms[interface_id] = {phase: LatencyHistogram.from_dict(item)
+                                                  for phase, item in phases.items()}
+            recorder.merge(other)
+        return recorder
+
+    def write_summary(self, file_path: str):
+        """
+        保存耗时汇总文件
+        """
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        logger.debug(f"接口耗时汇总已保存：{file_path}")
+
+
+# 当前进程的耗时记录器，api_request_flow 中的每次请求都会记录到这里
+latency_recorder = LatencyRecorder()
+
+
+def response_timings(response) -> dict:
+    """
+    获取响应对象上记录的各阶段耗时（毫秒），由 BaseRequest 发送请求时写入
+    """
+    timings = getattr(response, "timings", None)
+    if timings:
+        return timings
+    elapsed = getattr(response, "elapsed", None)
+    return {"total": elapsed.total_seconds() * 1000} if elapsed is not None else {}
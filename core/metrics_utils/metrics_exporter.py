@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : metrics_exporter.py
+# @Desc: 运行指标模块，以 Prometheus 文本格式输出请求数、接口耗时、断言失败数、缓存命中、数据库连接数、模板渲染耗时等指标
+
+import os
+import json
+import bisect
+import threading
+import contextlib
+from loguru import logger
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 耗时直方图的默认分桶，单位：秒
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# 渲染等框架内部操作的耗时分桶，单位：秒
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """
+    指标基类，按标签值分别记录数据
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _labels(self, key: Tuple[str, ...], extra: str = None) -> str:
+        items = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+        if extra:
+            items.append(extra)
+        return "{" + ",".join(items) + "}" if items else ""
+
+    def _render_values(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{self._labels(key)} {_format_value(value)}"
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+            lines.extend(self._render_values())
+        return "\n".join(lines)
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(key), value] for key, value in self.values.items()]
+
+    def merge_values(self, values: list):
+        with self._lock:
+            for key, value in values:
+                key = tuple(key)
+                self.values[key] = self.values.get(key, 0) + value
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+
+
+class Counter(_Metric):
+    """
+    计数器，只增不减
+    """
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+    仪表盘，可增可减，多进程合并时取各进程之和
+    """
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """
+    直方图，记录每个分桶的数量、总和及次数
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            data["buckets"][index] += 1
+            data["sum"] += value
+            data["count"] += 1
+
+    def _render_values(self):
+        for key, data in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), data["buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(float(bound))
+                le_label = f'le="{le}"'
+                yield f"{self.name}_bucket{self._labels(key, le_label)} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {_format_value(round(data['sum'], 6))}"
+            yield f"{self.name}_count{self._labels(key)} {data['count']}"
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(key), {"buckets": list(data["buckets"]), "sum": data["sum"], "count": data["count"]}]
+                    for key, data in self.values.items()]
+
+    def merge_values(self, values: list):
+        with self._lock:
+            for key, other in values:
+                data = self.values.setdefault(tuple(key), {"buckets": [0] * (len(self.buckets) + 1),
+                                                           "sum": 0.0, "count": 0})
+                data["buckets"] = [a + b for a, b in zip(data["buckets"], other["buckets"])]
+                data["sum"] += other["sum"]
+                data["count"] += other["count"]
+
+
+class MetricsRegistry:
+    """
+    指标注册表：统一输出为 Prometheus 文本格式，支持保存为快照文件及合并多个进程的快照
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.setdefault(metric.name, metric)
+        return self.metrics[metric.name]
+
+    def counter(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        """
+        输出 Prometheus 文本格式（text exposition format 0.0.4）
+        """
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+    def snapshot(self) -> dict:
+        return {name: {"type": metric.type, "help": metric.documentation, "labels": list(metric.label_names),
+                       "buckets": list(getattr(metric, "buckets", ())), "values": metric.snapshot()}
+                for name, metric in self.metrics.items()}
+
+    def merge(self, snapshot: dict, gauges: bool = True) -> "MetricsRegistry":
+        """
+        合并快照数据：计数器、直方图、仪表盘均按数值相加；注册表中不存在的指标按快照中的定义创建
+        :param gauges: 是否合并仪表盘，累计多次运行的指标时，仪表盘只反映当时的状态，不需要合并
+        """
+        for name, item in snapshot.items():
+            if not gauges and item["type"] == "gauge":
+                continue
+            metric = self.metrics.get(name)
+            if metric is None:
+                if item["type"] == "histogram":
+                    metric = self.histogram(name, item["help"], item["labels"], item["buckets"])
+                elif item["type"] == "gauge":
+                    metric = self.gauge(name, item["help"], item["labels"])
+                else:
+                    metric = self.counter(name, item["help"], item["labels"])
+            metric.merge_values(item["values"])
+        return self
+
+    def clear(self):
+        for metric in self.metrics.values():
+            metric.clear()
+
+    def dump(self, file_path: str):
+        """
+        保存快照文件，先写临时文件再替换，避免读取到写了一半的文件
+        """
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False)
+        os.replace(temp_path, file_path)
+
+    @classmethod
+    def load(cls, file_paths: Iterable[str]) -> "MetricsRegistry":
+        """
+        从多个快照文件中加载并合并指标
+        """
+        registry = cls()
+        for file_path in file_paths:
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    registry.merge(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"指标快照文件读取失败：{file_path}，{e}")
+        return registry
+
+    def write_text(self, file_path: str):
+        """
+        保存为 Prometheus 文本文件，可以直接被 node_exporter 的 textfile collector 采集
+        """
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temp_path, file_path)
+
+
+# 当前进程的指标注册表及框架内置指标
+registry = MetricsRegistry()
+REQUESTS_TOTAL = registry.counter("api_requests_total", "发送的请求数", ("interface", "status_code"))
+REQUEST_DURATION = registry.histogram("api_request_duration_seconds", "接口响应耗时（秒）", ("interface",))
+ASSERTION_FAILURES = registry.counter("api_assertion_failures_total", "断言失败次数", ("interface", "type"))
+CACHE_REQUESTS = registry.counter("api_cache_requests_total", "框架内部缓存的查询次数", ("cache", "result"))
+DB_CONNECTIONS = registry.gauge("api_db_connections", "当前打开的数据库连接数")
+RESPONSE_BYTES = registry.counter("api_response_bytes_total", "响应体字节数，wire 为网络传输的字节数，decoded 为解压后的字节数",
+                                  ("interface", "type"))
+TRANSFER_BYTES = registry.counter("api_transfer_bytes_total", "文件上传、下载的字节数", ("direction",))
+PHASE_DURATION = registry.histogram("api_phase_duration_seconds",
+                                    "请求流程各阶段耗时（秒），before_request 即模板渲染耗时", ("phase",), FAST_BUCKETS)
+
+
+def record_request(interface: str, status_code: int, seconds: float):
+    """
+    记录一次接口请求
+    """
+    REQUESTS_TOTAL.inc(interface=interface, status_code=status_code)
+    REQUEST_DURATION.observe(seconds, interface=interface)
+
+
+def record_response_size(interface: str, wire_bytes: int, decoded_bytes: int):
+    """
+    记录一次响应的传输字节数及解压后的字节数
+    """
+    if wire_bytes is not None:
+        RESPONSE_BYTES.inc(wire_bytes, interface=interface, type="wire")
+    RESPONSE_BYTES.inc(decoded_bytes, interface=interface, type="decoded")
+
+
+def record_transfer(direction: str, size: int):
+    """
+    记录文件传输的字节数
+    :param direction: upload 或 download
+    """
+    TRANSFER_BYTES.inc(size, direction=direction)
+
+
+def record_cache(cache: str, hit: bool):
+    """
+    记录一次缓存查询结果
+    """
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+@contextlib.contextmanager
+def count_assertion_failures(interface: str, assert_type: str):
+    """
+    统计断言失败次数，断言异常会继续向上抛出
+    """
+    try:
+        yield
+    except AssertionError:
+        ASSERTION_FAILURES.inc(interface=interface, type=assert_type)
+        raise
+
+
+def phase_hook(case_id: str, phase: str, duration_ns: int):
+    """
+    PhaseTimer 的回调函数：记录请求流程各阶段耗时
+    """
+    PHASE_DURATION.observe(duration_ns / 1e9, phase=phase)
+
+
+class PeriodicDumper:
+    """
+    后台线程定时保存指标快照，用于运行过程中查看实时指标
+    """
+
+    def __init__(self, metrics_registry: MetricsRegistry, file_path: str, interval: float = 15):
+        self.registry = metrics_registry
+        self.file_path = file_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.registry.dump(self.file_path)
+            except OSError as e:
+                logger.warning(f"指标快照保存失败：{e}")
+
+    def start(self) -> "PeriodicDumper":
+        self._thread = threading.Thread(target=self._run, name="metrics-dumper", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        停止定时保存，并保存最后一次快照
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.registry.dump(self.file_path)
+
+
+class MetricsServer:
+    """
+    在本地启动 HTTP 服务，通过 /metrics 输出 Prometheus 文本格式的指标
+    """
+
+    def __init__(self, collect: Callable[[], str], host: str = "127.0.0.1", port: int = 9464):
+        """
+        :param collect: 每次请求时调用，返回 Prometheus 文本格式的指标
+        """
+
+        class _Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                try:
+                    body = collect().encode("utf-8")
+                except Exception as e:
+                    logger.error(f"采集指标失败：{e}")
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.trace(f"指标服务：{format % args}")
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logger.info(f"指标服务已启动：{self.address}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
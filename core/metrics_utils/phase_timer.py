@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : phase_timer.py
+# @Desc: 接口请求流程各阶段耗时统计模块，用于区分框架自身耗时与接口响应耗时
+
+import json
+import time
+import threading
+from loguru import logger
+from typing import Callable, Dict, Iterable, List
+
+# api_request_flow 中的各个阶段
+PHASES = (
+    "before_request",  # 请求数据处理：变量替换、函数调用、Faker 数据生成等
+    "send_request",  # 发送请求，包含接口响应耗时
+    "wait_seconds",  # 请求后等待
+    "parse_response",  # 解析响应数据
+    "step_record",  # 记录日志及 allure 步骤
+    "assert_response",  # 响应断言
+    "assert_sql",  # 数据库断言
+    "after_request",  # 参数提取
+)
+
+
+class _PhaseStats:
+    """
+    单个阶段的耗时统计，单位：纳秒
+    """
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self, count: int = 0, total: int = 0, max_ns: int = 0):
+        self.count = count
+        self.total = total
+        self.max = max_ns
+
+    def add(self, duration_ns: int):
+        self.count += 1
+        self.total += duration_ns
+        self.max = max(self.max, duration_ns)
+
+    def merge(self, other: "_PhaseStats"):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def summary(self, run_total: int = 0) -> dict:
+        result = {
+            "count": self.count,
+            "total_ms": round(self.total / 1e6, 3),
+            "mean_ms": round(self.total / self.count / 1e6, 3) if self.count else 0.0,
+            "max_ms": round(self.max / 1e6, 3),
+        }
+        if run_total:
+            result["percent"] = round(self.total / run_total * 100, 2)
+        return result
+
+
+class _PhaseContext:
+    """
+    阶段计时上下文，使用 perf_counter_ns 计时
+    """
+    __slots__ = ("timer", "case_id", "phase", "start")
+
+    def __init__(self, timer: "PhaseTimer", case_id: str, phase: str):
+        self.timer = timer
+        self.case_id = case_id
+        self.phase = phase
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.timer.record(self.case_id, self.phase, time.perf_counter_ns() - self.start)
+        return False
+
+
+class PhaseTimer:
+    """
+    按用例ID、阶段统计耗时，同时汇总整个运行的耗时。
+    可以通过 add_hook 注册回调函数，每个阶段结束时调用：func(case_id, phase, duration_ns)
+    """
+
+    def __init__(self):
+        self.cases: Dict[str, Dict[str, _PhaseStats]] = {}
+        self.run: Dict[str, _PhaseStats] = {}
+        self._hooks: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, func: Callable):
+        """
+        注册阶段耗时回调函数
+        :param func: 回调函数，参数为 (case_id, phase, duration_ns)
+        """
+        if func not in self._hooks:
+            self._hooks.append(func)
+
+    def remove_hook(self, func: Callable):
+        if func in self._hooks:
+            self._hooks.remove(func)
+
+    def phase(self, case_id: str, phase: str) -> _PhaseContext:
+        """
+        统计一个阶段的耗时，用法：
+            with phase_timer.phase(case_id, "send_request"):
+                response = send_request(...)
+        """
+        return _PhaseContext(self, str(case_id), phase)
+
+    def record(self, case_id: str, phase: str, duration_ns: int):
+        """
+        记录一个阶段的耗时
+        """
+        with self._lock:
+            self.cases.setdefault(case_id, {}).setdefault(phase, _PhaseStats()).add(duration_ns)
+            self.run.setdefault(phase, _PhaseStats()).add(duration_ns)
+        for hook in self._hooks:
+            try:
+                hook(case_id, phase, duration_ns)
+            except Exception as e:
+                logger.warning(f"阶段耗时回调函数 {hook} 执行失败：{e}")
+
+    def clear(self):
+        with self._lock:
+            self.cases.clear()
+            self.run.clear()
+
+    def merge(self, other: "PhaseTimer") -> "PhaseTimer":
+        with self._lock:
+            for case_id, phases in other.cases.items():
+                for phase, stats in phases.items():
+                    self.cases.setdefault(case_id, {}).setdefault(phase, _PhaseStats()).merge(stats)
+            for phase, stats in other.run.items():
+                self.run.setdefault(phase, _PhaseStats()).merge(stats)
+        return self
+
+    def report(self) -> dict:
+        """
+        生成耗时报告：run 为整个运行各阶段的耗时及占比，cases 为每个用例各阶段的耗时
+        """
+        run_total = sum(stats.total for stats in self.run.values())
+        ordered = lambda phases: [phase for phase in PHASES if phase in phases] + \
+                                 [phase for phase in phases if phase not in PHASES]
+        return {
+            "run": {phase: self.run[phase].summary(run_total) for phase in ordered(self.run)},
+            "cases": {
+                case_id: {phase: phases[phase].summary() for phase in ordered(phases)}
+                for case_id, phases in self.cases.items()
+            },
+        }
+
+    def dump(self, file_path: str):
+        """
+        保存原始统计数据，用于多进程合并
+        """
+        with self._lock:
+            data = {case_id: {phase: [stats.count, stats.total, stats.max] for phase, stats in phases.items()}
+                    for case_id, phases in self.cases.items()}
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, file_paths: Iterable[str]) -> "PhaseTimer":
+        """
+        从多个原始数据文件中加载并合并统计数据
+        """
+        timer = cls()
+        for file_path in file_paths:
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"阶段耗时数据文件读取失败：{file_path}，{e}")
+                continue
+            for case_id, phases in data.items():
+                for phase, (count, total, max_ns) in phases.items():
+                    stats = _PhaseStats(count, total, max_ns)
+                    timer.cases.setdefault(case_id, {}).setdefault(phase, _PhaseStats()).merge(stats)
+                    timer.run.setdefault(phase, _PhaseStats()).merge(stats)
+        return timer
+
+    def write_report(self, file_path: str):
+        """
+        保存耗时报告
+        """
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        logger.debug(f"接口请求流程各阶段耗时报告已保存：{file_path}")
+
+
+# 当前进程的阶段耗时统计器
+phase_timer = PhaseTimer()
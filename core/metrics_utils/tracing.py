@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : tracing.py
+# @Desc: 调用链追踪模块，记录运行、用例、依赖、数据库查询等 span，导出为 Chrome trace-event JSON
+
+import os
+import json
+import time
+import functools
+import threading
+import contextvars
+from loguru import logger
+from typing import Callable, Iterable, List, Optional
+from config.settings import TRACING
+
+# 整个运行共用一个 trace_id，通过环境变量传递给 xdist 的 worker 进程
+TRACE_ID_ENV = "API_TRACE_ID"
+# 当前上下文正在执行的 span
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(size: int) -> str:
+    # 不使用 random 模块，避免用例固定随机种子后各进程生成相同的 ID
+    return os.urandom(size).hex()
+
+
+class Span:
+    """
+    一次操作的耗时记录，结束时写入 Tracer
+    """
+    __slots__ = ("tracer", "name", "category", "attributes", "span_id", "parent_id", "start_ts", "start_ns",
+                 "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.span_id = _new_id(8)
+        self.parent_id = None
+        self.start_ts = 0
+        self.start_ns = 0
+        self._token = None
+
+    @property
+    def traceparent(self) -> str:
+        """
+        W3C Trace Context 格式的 traceparent 请求头
+        """
+        return f"00-{self.tracer.trace_id}-{self.span_id}-01"
+
+    def set_attributes(self, **attributes):
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def start(self) -> "Span":
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = _current_span.set(self)
+        # 时间戳使用系统时间，多个进程的 span 才能在同一条时间线上对齐；耗时使用 perf_counter_ns 计算
+        self.start_ts = time.time_ns() // 1000
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def end(self, error: BaseException = None):
+        duration = (time.perf_counter_ns() - self.start_ns) // 1000
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # 在其他上下文中结束（例如 pytest 钩子中开始和结束的 span），直接清空
+                _current_span.set(None)
+            self._token = None
+        if error is not None:
+            self.attributes["error"] = f"{type(error).__name__}: {error}"
+        self.tracer.add_event(self, duration)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end(exc_val)
+        return False
+
+
+class _NoopSpan:
+    """
+    关闭追踪时使用的空 span
+    """
+    traceparent = None
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def start(self):
+        return self
+
+    def end(self, error: BaseException = None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    调用链追踪器，用法：
+        with tracer.span("case_dependence_handle", "dependence", case_id="login_01"):
+            ...
+
+        @tracer.traced("generate_cases", "generate")
+        def generate_cases():
+            ...
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.trace_id = os.environ.setdefault(TRACE_ID_ENV, _new_id(16))
+        self.events: List[dict] = []
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str = "function", **attributes):
+        """
+        创建一个 span，作为上下文管理器使用
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, category, {key: value for key, value in attributes.items() if value is not None})
+
+    def traced(self, name: str = None, category: str = "function"):
+        """
+        装饰器：函数的每次调用记录为一个 span
+        """
+
+        def decorator(func: Callable):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(span_name, category):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def current_span():
+        """
+        获取当前正在执行的 span，关闭追踪或不存在时返回空 span
+        """
+        return _current_span.get() or _NOOP_SPAN
+
+    def phase_hook(self, case_id: str, phase: str, duration_ns: int):
+        """
+        PhaseTimer 的回调函数：将 api_request_flow 各阶段的耗时记录为当前 span 的子 span
+        """
+        parent = _current_span.get()
+        if not self.enabled or parent is None:
+            return
+        duration = duration_ns // 1000
+        event = self._event(name=phase, category="phase", ts=time.time_ns() // 1000 - duration, dur=duration,
+                            args={"case_id": case_id, "span_id": _new_id(8), "parent_id": parent.span_id})
+        with self._lock:
+            self.events.append(event)
+
+    @staticmethod
+    def _event(name: str, category: str, ts: int, dur: int, args: dict) -> dict:
+        return {"name": name, "cat": category, "ph": "X", "ts": ts, "dur": dur,
+                "pid": os.getpid(), "tid": threading.get_native_id(), "args": args}
+
+    def add_event(self, span: Span, duration: int):
+        args = {key: value if isinstance(value, (str, int, float, bool)) else str(value)
+                for key, value in span.attributes.items()}
+        args.update({"span_id": span.span_id, "parent_id": span.parent_id})
+        event = self._event(name=span.name, category=span.category, ts=span.start_ts, dur=duration, args=args)
+        with self._lock:
+            self.events.append(event)
+
+    def clear(self, trace_id: str = None):
+        """
+        清空已记录的 span；传入 trace_id 时开始一条新的调用链
+        """
+        with self._lock:
+            self.events.clear()
+        if trace_id:
+            self.trace_id = os.environ[TRACE_ID_ENV] = trace_id
+
+    def dump(self, file_path: str, process_name: str = None):
+        """
+        保存当前进程记录的 span，用于多进程合并
+        """
+        with self._lock:
+            events = list(self.events)
+        if process_name:
+            events.insert(0, {"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": process_name}})
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(events, f, ensure_ascii=False)
+
+    @staticmethod
+    def merge_files(file_paths: Iterable[str], file_path: str, trace_id: Optional[str] = None) -> int:
+        """
+        合并多个进程的 span，生成可以在 chrome://tracing 或 https://ui.perfetto.dev 中打开的 trace 文件
+        :return: span 数量
+        """
+        events = []
+        for path in file_paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    events.extend(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"调用链数据文件读取失败：{path}，{e}")
+        events.sort(key=lambda event: event.get("ts", 0))
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": trace_id}},
+                      f, ensure_ascii=False)
+        logger.debug(f"调用链追踪文件已保存：{file_path}")
+        return sum(1 for event in events if event.get("ph") == "X")
+
+
+# 当前进程的调用链追踪器
+tracer = Tracer(enabled=TRACING["enabled"])
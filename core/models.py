@@ -78,6 +78,8 @@ class TestCaseEnum(Enum):
     VALIDATE = ("validate", True)
     ASSERT_SQL = ("assert_sql", False)
     CASE_DEPENDENCE = ("case_dependence", False)
+    PROTO = ("proto", False)
+    CACHEABLE = ("cacheable", False)
 
 
 class TestCase(BaseModel):
@@ -100,6 +102,8 @@ class TestCase(BaseModel):
     assert_response: Union[None, Dict, Text]
     assert_sql: Union[None, Dict, Text] = None
     case_dependence: Union[None, Dict] = None
+    proto: Union[None, Text] = None
+    cacheable: Union[None, bool, Text] = None
 
 
 class Method(Enum):
@@ -113,6 +117,7 @@ class Method(Enum):
     DELETE = "DELETE"
     HEAD = "HEAD"
     OPTION = "OPTION"
+    GRPC = "GRPC"
 
 
 class RequestType(Enum):
@@ -124,6 +129,7 @@ class RequestType(Enum):
     DATA = "DATA"
     FILE = 'FILE'
     EXPORT = "EXPORT"
+    GRPC = "GRPC"
     NONE = "NONE"
 
 
@@ -149,3 +155,13 @@ class AssertMethod(Enum):
     contained_by = 'contained_by'
     startswith = 'startswith'
     endswith = 'endswith'
+    # 集合断言，针对通过 jsonpath 提取出的一整列数据
+    all_equals = 'all_eq'
+    any_equals = 'any_eq'
+    none_equals = 'none_eq'
+    sorted_by = 'sorted'
+    unique_by = 'unique'
+    count_where = 'count_eq'
+    range_between = 'between'
+    # 使用 JSON Schema 校验整个响应结构
+    json_schema = 'schema'
@@ -3,12 +3,17 @@
 # @File    : allure_handle.py
 # @Desc: allure报告处理模块
 import os
+import sys
 import json
 import allure
+import threading
 import subprocess
+from loguru import logger
+from config.settings import REPORT_BUILD
 from core.models import AllureAttachmentType
 from core.report_utils.platform_handle import PlatformHandle
 from utils.files_utils.files_handle import zip_file, copy_file
+from utils.files_utils.zip_handle import DeflateCache, deflate_cache
 
 
 def allure_title(title: str) -> None:
@@ -173,6 +178,89 @@ class AllureReportBeautiful:
         with open(os.path.join(self.allure_html_path, "widgets", "environment.json"), 'w', encoding="utf-8") as f:
             json.dump(envs, f, ensure_ascii=False, indent=4)
 
+    def beautify(self, windows_title=None, report_name=None, env_info: dict = None):
+        """
+        一次完成报告美化：每个文件只读写一次
+        @param windows_title: 浏览器窗口标题
+        @param report_name: Overview 的标题
+        @param env_info: 环境信息
+        """
+        if windows_title:
+            index_path = os.path.join(self.allure_html_path, "index.html")
+            with open(index_path, 'r', encoding="utf-8") as f:
+                content = f.read()
+            with open(index_path, 'w', encoding="utf-8") as f:
+                f.write(content.replace("Allure Report", windows_title))
+        if report_name:
+            self.set_report_name(new_name=report_name)
+        if env_info:
+            self.set_report_env_on_html(env_info=env_info)
+
+
+class AllureResultsWatcher:
+    """
+    运行用例的同时，预先压缩 allure_results 中已生成的附件：
+    allure generate 会将附件原样复制到报告的 data/attachments 中，压缩报告时内容相同的附件直接使用预先压缩的结果
+    """
+
+    def __init__(self, allure_results_path: str, cache: DeflateCache = deflate_cache, interval: float = 1):
+        self.allure_results_path = allure_results_path
+        self.cache = cache
+        self.interval = interval
+        self._seen = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _scan(self):
+        try:
+            names = os.listdir(self.allure_results_path)
+        except OSError:
+            return
+        for name in names:
+            if "-attachment" not in name or name in self._seen:
+                continue
+            self._seen.add(name)
+            try:
+                self.cache.compress_file(os.path.join(self.allure_results_path, name), remember=True)
+            except OSError:
+                pass
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._scan()
+
+    def start(self):
+        if REPORT_BUILD["precompress"]:
+            self._thread = threading.Thread(target=self._run, name="allure-results-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        停止监听，并压缩剩余的附件
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._scan()
+
+
+def open_allure_report(report_path):
+    """
+    在后台打开allure报告（allure open），不等待报告服务结束。
+    报告服务在程序退出后继续运行，只在终端中交互运行时打开；定时任务、常驻进程、流水线（CI）等非交互运行不打开，避免报告服务进程越来越多
+    :return: 报告服务进程，未打开时返回None
+    """
+    if not REPORT_BUILD["open_report"] or os.environ.get("CI") or not (sys.stdin.isatty() and sys.stdout.isatty()):
+        return None
+    cmd = [PlatformHandle().allure, "open", report_path]
+    # 报告服务与当前进程分离，程序退出后继续运行，查看完成后手动关闭
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL,
+                            start_new_session=True)
+    logger.info(f"Allure报告服务已在后台启动，进程ID：{proc.pid}，查看完成后可关闭该进程")
+    return proc
+
 
 def allure_logo_change(allure_path, logo_path):
     r"""
@@ -238,20 +326,10 @@ def generate_allure_report(**kwargs):
         print("错误输出:", e.stderr)
         raise  # 把异常抛出去，外层能感知失败
     # ----------------美化allure测试报告 ------------------------------------------
-    # 设置打开的 Allure 报告的浏览器窗口标题文案
+    # 设置报告窗口的标题、Overview的标题文案，并往widgets/environment.json中写入环境信息
     allure_beautiful = AllureReportBeautiful(allure_html_path=allure_report_dir, allure_results_path=allure_results_dir)
-
-    # 设置报告窗口的标题
-    allure_beautiful.set_windows_title(
-        new_title=kwargs.get("windows_title"))
-
-    # 修改Allure报告Overview的标题文案
-    allure_beautiful.set_report_name(
-        new_name=kwargs.get("report_name"))
-
-    # 在allure-html报告中往widgets/environment.json中写入环境信息
-    allure_beautiful.set_report_env_on_html(
-        env_info=kwargs.get("env_info"))
+    allure_beautiful.beautify(windows_title=kwargs.get("windows_title"), report_name=kwargs.get("report_name"),
+                              env_info=kwargs.get("env_info"))
 
     # ----------------压缩allure测试报告，方便后续发送压缩包------------------------------------------
     # 复制http_server.exe以及双击打开Allure报告.bat，以便windows环境下，直接打开查看allure html报告
@@ -265,5 +343,8 @@ def generate_allure_report(**kwargs):
 
     attachment_path = kwargs.get("attachment_path")  # allure报告压缩的路径，例如：report/allure_report.zip
     zip_file(in_path=allure_report_dir, out_path=attachment_path)
+    # 预先压缩的附件只用于本次报告
+    deflate_cache.clear_memory()
+    deflate_cache.prune()
 
     return allure_report_dir, attachment_path
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : result_collector.py
+# @Desc: 测试结果收集模块，运行过程中直接汇总用例结果，不依赖 allure 报告生成
+
+import os
+import json
+import time
+from loguru import logger
+from typing import Dict, Optional
+from config.settings import REPORT_DIR, GLOBAL_VARS
+from utils.tools.time_handle import timestamp_strftime
+
+# 运行结果汇总文件
+RUN_SUMMARY_PATH = os.path.join(REPORT_DIR, "run_summary.json")
+
+
+class ResultCollector:
+    """
+    pytest 插件：在主进程中汇总每个用例的最终结果（xdist 的 worker 进程的结果也会汇总到主进程），
+    结果状态与 allure 报告保持一致：
+    1. passed：用例通过
+    2. failed：断言失败
+    3. broken：断言以外的异常，以及前置、后置处理异常
+    4. skipped：跳过（包括 xfail）
+    """
+
+    def __init__(self):
+        self.results: Dict[str, str] = {}
+        self.durations: Dict[str, float] = {}
+        self.rerun = 0
+        self.start = None
+        self.stop = None
+        self.environment = {}
+
+    @staticmethod
+    def _status(report) -> Optional[str]:
+        if report.outcome == "passed":
+            return "passed" if report.when == "call" else None
+        if report.outcome == "skipped":
+            return "skipped"
+        if report.outcome == "failed":
+            if report.when != "call":
+                return "broken"
+            crash = getattr(report.longrepr, "reprcrash", None)
+            message = getattr(crash, "message", "") or ""
+            return "failed" if message.startswith("AssertionError") or message.startswith("assert ") else "broken"
+        return None
+
+    def pytest_sessionstart(self, session):
+        self.start = time.time()
+        self.environment = {"运行环境": GLOBAL_VARS.get("host", None),
+                            "随机种子": getattr(session.config, "_run_seed", None)}
+
+    def pytest_runtest_logreport(self, report):
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
+        if report.outcome == "rerun":
+            self.rerun += 1
+            # 重跑后以最后一次的结果为准
+            self.results.pop(report.nodeid, None)
+            return
+        status = self._status(report)
+        if status is None:
+            return
+        # 后置处理只有出现异常时才覆盖用例执行的结果
+        if report.when == "teardown" and status != "broken":
+            return
+        self.results[report.nodeid] = status
+
+    def pytest_sessionfinish(self, session):
+        self.stop = time.time()
+        self.dump()
+
+    def summary(self) -> Dict:
+        """
+        汇总结果，字段与 get_test_results_from_from_allure_report 的返回值一致，可以直接用于发送通知
+        """
+        counts = {status: 0 for status in ("passed", "failed", "broken", "skipped")}
+        for status in self.results.values():
+            counts[status] += 1
+        total = sum(counts.values())
+        start = self.start or time.time()
+        stop = self.stop or time.time()
+        summary = dict(counts, total=total)
+        summary["pass_rate"] = round((counts["passed"] + counts["skipped"]) / total * 100, 2) if total else 0.0
+        summary["run_time"] = round(stop - start, 2)
+        summary["start_time"] = timestamp_strftime(start * 1000)
+        summary["stop_time"] = timestamp_strftime(stop * 1000)
+        summary["rerun"] = self.rerun
+        summary.update(self.environment)
+        summary["failed_cases"] = sorted(nodeid for nodeid, status in self.results.items()
+                                         if status in ("failed", "broken"))
+        summary["case_duration"] = round(sum(self.durations.values()), 3)
+        return summary
+
+    def dump(self, path: str = RUN_SUMMARY_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        logger.debug(f"运行结果汇总已保存：{path}")
+
+
+def load_run_summary(path: str = RUN_SUMMARY_PATH) -> Optional[Dict]:
+    """
+    读取最近一次运行的结果汇总，不存在时返回 None
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -4,139 +4,164 @@
 # @Desc: 发送测试结果通知模块
 
 from loguru import logger
+from typing import List
+from concurrent.futures import Future
 from core.models import NotificationType
 from core.data_utils.data_handle import data_handle
 from utils.notify_utils.wechat_bot import WechatBot
 from utils.notify_utils.dingding_bot import DingTalkBot
 from utils.notify_utils.yagmail_bot import YagEmailServe
+from utils.notify_utils.notify_dispatcher import notify_dispatcher, retry_call
 from core.report_utils.get_results_handle import get_test_results_from_from_allure_report
-from config.settings import SEND_RESULT_TYPE, email, ding_talk, wechat, email_subject, email_content, ding_talk_title, \
-    ding_talk_content, wechat_content
+from config.settings import NOTIFY, SEND_RESULT_TYPE, email, ding_talk, wechat, email_subject, email_content, \
+    ding_talk_title, ding_talk_content, wechat_content
 
 
-def send_email(user, pwd, host, subject, content, to, attachments):
+def send_email(user, pwd, host, subject, content, to, attachments, port=None, smtp_ssl=True, timeout=None):
     """
-    发送邮件
+    发送邮件，失败后按退避时间重试
+    :return: 是否发送成功
     """
-    try:
-        yag = YagEmailServe(user=user, password=pwd, host=host)
-        info = {
-            "subject": subject,
-            "contents": content,
-            "to": to,
-            "attachments": attachments
+    yag = YagEmailServe(user=user, password=pwd, host=host, port=port, smtp_ssl=smtp_ssl, timeout=timeout)
+    info = {
+        "subject": subject,
+        "contents": content,
+        "to": to,
+        "attachments": attachments
 
-        }
-        yag.send_email(info)
-    except Exception as e:
-        logger.error(f"发送邮件通知异常， 错误信息：{e}")
+    }
+    return retry_call(lambda: yag.send_email(info), name="发送邮件通知")
+
+
+def send_dingding(webhook_url, secret, title, content, timeout=None):
+    """
+    发送钉钉消息，失败后按退避时间重试
+    :return: 是否发送成功
+    """
+    bot_dingding = DingTalkBot(webhook_url=webhook_url, secret=secret, timeout=timeout)
+    res = retry_call(lambda: bot_dingding.send_markdown(title=title, text=content, is_at_all=True),
+                     name="发送钉钉通知")
+    if res:
+        logger.debug(f"发送钉钉通知成功~")
+    return res
+
+
+def send_wechat(webhook_url, content, attachment=None, timeout=None):
+    """
+    发送企业微信消息，文本和附件分别重试，附件发送失败时不会重复发送文本
+    :return: 是否发送成功
+    """
+    bot_wechat = WechatBot(webhook_url=webhook_url, timeout=timeout)
+    if not retry_call(lambda: bot_wechat.send_markdown(content=content), name="发送企业微信（文本）"):
+        return False
+    if not attachment:
+        return True
 
+    def send_file():
+        media_id = bot_wechat.upload_file(attachment)
+        return bool(media_id) and bot_wechat.send_file(media_id)
 
-def send_dingding(webhook_url, secret, title, content):
+    res = retry_call(send_file, name="发送企业微信通知(附件)")
+    if res:
+        logger.debug(f"发送企业微信通知(包括文本以及附件)成功~")
+    return res
+
+
+_ATTACHMENT_ARGS = ("attachments", "attachment")
+
+
+def _resolve_attachment(sender_args: dict) -> dict:
     """
-    发送钉钉消息
+    附件参数是函数时，调用函数获取附件路径；附件生成失败时不发送附件
     """
-    try:
-        bot_dingding = DingTalkBot(webhook_url=webhook_url, secret=secret)
-        res = bot_dingding.send_markdown(title=title, text=content, is_at_all=True)
-        if res:
-            logger.debug(f"发送钉钉通知成功~")
-        else:
-            logger.error(f"发送钉钉通知失败~")
-    except Exception as e:
-        logger.error(f"发送钉钉通知异常， 错误信息：{e}")
-
-
-def send_wechat(webhook_url, content, attachment=None):
+    sender_args = dict(sender_args)
+    for key in _ATTACHMENT_ARGS:
+        if callable(sender_args.get(key)):
+            try:
+                sender_args[key] = sender_args[key]()
+            except Exception as e:
+                logger.error(f"获取通知附件失败，不发送附件：{e}")
+                sender_args[key] = None
+    return sender_args
+
+
+def _send(notification: dict):
     """
-    发送企业微信消息
+    在后台线程中调用：等待附件生成后发送
     """
-    try:
-        bot_wechat = WechatBot(webhook_url=webhook_url)
-        msg = bot_wechat.send_markdown(content=content)
-        if msg:
-            if attachment:
-                file = bot_wechat.send_file(bot_wechat.upload_file(attachment))
-                if file:
-                    logger.debug(f"发送企业微信通知(包括文本以及附件)成功~")
-                else:
-                    logger.error(f"发送企业微信通知(附件)失败~")
-        else:
-            logger.error(f"发送企业微信（文本）失败~")
-    except Exception as e:
-        logger.error(f"发送企业微信通知异常， 错误信息：{e}")
-
-
-def send_result(report_info: dict, report_path: str, attachment_path: str = None):
+    return notification['sender'](**_resolve_attachment(notification['sender_args']))
+
+
+def send_result(report_info: dict, report_path: str = None, attachment_path=None, results: dict = None) -> List[Future]:
     """
-    根据用户配置，采取指定方式，发送测试结果
+    根据用户配置，采取指定方式，发送测试结果。
+    各渠道在后台并发发送，不等待发送完成，程序退出前最多等待 NOTIFY["exit_wait"] 秒
     :param report_info: 报告相关信息，包括tester, department, env
-    :param report_path: 报告路径
-    :param attachment_path: 发送的附件， pytest-html就是报告本身作为附件发送， allure是压缩包发送
+    :param report_path: 报告路径，未传入 results 时从报告中读取测试结果
+    :param attachment_path: 发送的附件， pytest-html就是报告本身作为附件发送， allure是压缩包发送；
+                            可以是返回附件路径的函数，只在需要发送附件时调用（等待附件生成）
+    :param results: 测试结果，例如 ResultCollector.summary() 的返回值
+    :return: 各渠道发送结果的 Future，需要等待发送完成时可以调用 future.result()
     """
     # 默认不发送任何通知
     if SEND_RESULT_TYPE == NotificationType.DEFAULT.value:
         logger.trace(f"SEND_RESULT_TYPE={SEND_RESULT_TYPE}， 配置了不发送任何邮件")
-        return
+        return []
 
-    results = get_test_results_from_from_allure_report(report_path)
+    results = dict(results) if results is not None else get_test_results_from_from_allure_report(report_path)
     for k, v in report_info.items():
         results[k] = v
 
     # 建立发送消息的内容、函数以及参数的映射关系
     notification_mappings = {
         NotificationType.EMAIL.value: {
+            'name': "邮件通知",
             'sender': send_email,
             'sender_args': {
                 'user': email.get("user"),
                 'pwd': email.get("password"),
                 'host': email.get("host"),
+                'port': email.get("port"),
+                'smtp_ssl': email.get("smtp_ssl", True),
                 'subject': email_subject,
                 'content': email_content,
                 'to': email.get("to"),
                 'attachments': attachment_path,
+                'timeout': NOTIFY["timeout"]["email"],
             }
         },
         NotificationType.DING_TALK.value: {
+            'name': "钉钉通知",
             'sender': send_dingding,
             'sender_args': {
                 'webhook_url': ding_talk["webhook_url"],
                 'secret': ding_talk["secret"],
                 'title': ding_talk_title,
                 'content': ding_talk_content,
+                'timeout': NOTIFY["timeout"]["ding_talk"],
             }
         },
         NotificationType.WECHAT.value: {
+            'name': "企业微信通知",
             'sender': send_wechat,
             'sender_args': {
                 'webhook_url': wechat["webhook_url"],
                 'content': wechat_content,
                 'attachment': attachment_path,
+                'timeout': NOTIFY["timeout"]["wechat"],
             }
         }
     }
-    # 单一渠道发送消息
+    # 单一渠道发送消息，或者全渠道发送消息
     if SEND_RESULT_TYPE in notification_mappings:
-        notification = notification_mappings[SEND_RESULT_TYPE]
+        notifications = [notification_mappings[SEND_RESULT_TYPE]]
+    else:
+        notifications = list(notification_mappings.values())
+    futures = []
+    for notification in notifications:
         # 获取消息内容并替换
         notification['sender_args']['content'] = data_handle(obj=notification['sender_args']['content'],
                                                              source=results)
-        # 获取消息发送函数
-        sender = notification['sender']
-        # 获取对应消息发送函数的参数
-        sender_args = notification['sender_args']
-        # 调用消息发送函数
-        sender(**sender_args)
-    # 全渠道发送消息
-    else:
-        # 遍历所有消息发送方式
-        for notification in notification_mappings.values():
-            # 获取消息内容并替换
-            notification['sender_args']['content'] = data_handle(obj=notification['sender_args']['content'],
-                                                                 source=results)
-            # 获取消息发送函数
-            sender = notification['sender']
-            # 获取对应消息发送函数的参数
-            sender_args = notification['sender_args']
-            # 调用消息发送函数
-            sender(**sender_args)
+        # 每个渠道在独立的后台线程中发送，需要附件的渠道在后台线程中等待附件生成，不影响其他渠道
+        futures.append(notify_dispatcher.submit(notification['name'], _send, notification))
+    return futures
@@ -4,12 +4,51 @@
 # @Desc: 请求操作封装模块
 
 import os
+import re
+import json
 import time
 import requests
+import mimetypes
+import threading
+import http.cookiejar
 from loguru import logger
-from config.settings import OUT_DIR
-from typing import Optional, Union, Dict, Text
-from requests_toolbelt import MultipartEncoder
+from urllib.parse import unquote
+from config.settings import OUT_DIR, REQUEST_POOL_SIZE, TRACING, COMPRESSION, DOWNLOAD
+from core.metrics_utils.tracing import tracer
+from core.metrics_utils.metrics_exporter import record_transfer
+from core.requests_utils.ranged_download import RangedDownloader, stream_to_file
+from core.requests_utils.cassette import cassette
+from core.requests_utils.response_cache import response_cache
+from core.requests_utils.timed_connection import TimedHTTPAdapter, reset_connection_timings, get_connection_timings
+from typing import Optional, Union, Dict, List, Text
+from urllib3.util.request import ACCEPT_ENCODING as DECODABLE_ENCODINGS
+from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
+
+
+def accept_encoding() -> str:
+    """
+    生成请求头 Accept-Encoding：settings.COMPRESSION 中配置的、本地可以解压（urllib3 支持）的压缩编码
+    """
+    decodable = DECODABLE_ENCODINGS.split(",")
+    encodings = [encoding for encoding in COMPRESSION["encodings"] if encoding in decodable]
+    return ", ".join(encodings) if COMPRESSION["enabled"] and encodings else "identity"
+
+
+def response_sizes(response: requests.Response) -> dict:
+    """
+    响应体大小：wire 为网络传输的字节数（压缩后），decoded 为解压后的字节数，ratio 为压缩率
+    """
+    decoded = len(response.content or b"")
+    encoding = response.headers.get("Content-Encoding")
+    wire = response.raw.tell() if response.raw is not None and hasattr(response.raw, "tell") else 0
+    if not wire:
+        # 分块传输等情况下 urllib3 不统计读取的字节数
+        content_length = response.headers.get("Content-Length")
+        wire = int(content_length) if content_length and content_length.isdigit() \
+            else (None if encoding else decoded)
+    return {"encoding": encoding, "wire": wire, "decoded": decoded,
+            "ratio": round(wire / decoded, 3) if wire is not None and decoded else None}
+
 
 class BaseRequest:
     """
@@ -17,14 +56,103 @@ class BaseRequest:
     """
 
     TIMEOUT = 30
+    # 每个线程独立持有一个 Session，复用 TCP 连接（keep-alive）
+    _local = threading.local()
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """
+        获取当前线程的 Session，首次调用时创建。
+        Session 不保存响应中返回的 cookies，每次请求只携带用例中配置的 cookies，与直接调用 requests.request 的行为一致
+        """
+        session = getattr(cls._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = TimedHTTPAdapter(pool_connections=REQUEST_POOL_SIZE, pool_maxsize=REQUEST_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            # 声明本地可以解压的压缩编码，用例中配置了 Accept-Encoding 时以用例为准
+            session.headers["Accept-Encoding"] = accept_encoding()
+            cls._local.session = session
+        return session
+
+    @classmethod
+    def close_session(cls):
+        """
+        关闭当前线程的 Session，释放连接池
+        """
+        session = getattr(cls._local, "session", None)
+        if session is not None:
+            session.close()
+            cls._local.session = None
+
+    @classmethod
+    def _request(cls, **kwargs) -> requests.Response:
+        """
+        所有请求统一从这里发出，使用连接池复用连接。
+        同时统计请求各阶段耗时（毫秒），保存在 response.timings 中：
+        connect（DNS解析+TCP连接）、tls（TLS握手），复用连接时没有这两项；ttfb（首字节）；download（下载响应体）；total（总耗时）
+        """
+        traceparent = tracer.current_span().traceparent
+        if TRACING["traceparent"] and traceparent:
+            # 注入 W3C traceparent 请求头，服务端的调用链可以与本次运行关联；用例中已配置时不覆盖
+            headers = dict(kwargs.get("headers") or {})
+            if not any(key.lower() == "traceparent" for key in headers):
+                headers["traceparent"] = traceparent
+            kwargs["headers"] = headers
+        reset_connection_timings()
+        start = time.perf_counter()
+        response = cls.get_session().request(**kwargs)
+        total = time.perf_counter() - start
+
+        timings = get_connection_timings()
+        elapsed = response.elapsed.total_seconds()
+        timings["ttfb"] = max(elapsed - timings.get("connect", 0.0) - timings.get("tls", 0.0), 0.0)
+        # 流式请求（如文件导出）的响应体在之后才读取，这里不统计下载耗时及响应大小
+        if not kwargs.get("stream"):
+            timings["download"] = max(total - elapsed, 0.0)
+            response.sizes = response_sizes(response)
+        timings["total"] = total
+        response.timings = {phase: round(seconds * 1000, 3) for phase, seconds in timings.items()}
+        return response
 
     @classmethod
     def send_request(cls, req_data):
         """
-        处理请求数据，转换成可用数据发送请求
+        处理请求数据，转换成可用数据发送请求。
+        开启请求录制回放（-cassette）时：回放模式直接返回录制的响应，不发送网络请求；录制模式发送请求后录制响应
         :param req_data: 请求数据
         :return: 响应对象
         """
+        if not cassette.supports(req_data):
+            return cls._send_request(req_data)
+        if cassette.replaying:
+            response = cassette.play(req_data)
+            if response is not None:
+                return response
+        response = cls._send_request(req_data)
+        if cassette.recording:
+            cassette.record(req_data, response)
+        return response
+
+    @classmethod
+    def _send_request(cls, req_data):
+        """
+        可以缓存的 GET/HEAD 请求（settings.RESPONSE_CACHE）优先使用缓存的响应；POST/PUT/PATCH/DELETE 请求之后清除同一地址缓存的响应
+        """
+        if response_cache.cacheable(req_data):
+            return response_cache.fetch(req_data, cls._dispatch)
+        try:
+            return cls._dispatch(req_data)
+        finally:
+            response_cache.invalidate(req_data)
+
+    @classmethod
+    def _dispatch(cls, req_data):
+        """
+        根据请求类型发送请求
+        """
         try:
             request_type = req_data.get("request_type", None)
             url = req_data.get("url", "")
@@ -33,6 +161,7 @@ class BaseRequest:
             payload = req_data.get("payload", None)
             files = req_data.get("files", None)
             cookies = req_data.get("cookies", None)
+            proto = req_data.get("proto", None)
 
             if request_type and request_type.lower() == "json":
                 return cls.request_type_for_json(method=method, url=url, headers=headers, json=payload, cookies=cookies)
@@ -44,9 +173,11 @@ class BaseRequest:
             elif request_type and request_type.lower() == "params":
                 return cls.request_type_for_params(method=method, url=url, headers=headers, params=payload,
                                                    cookies=cookies)
-            # todo 待后续补充
-            # elif request_type and request_type.lower() == "export":
-            #     return cls.request_type_for_export(method=method, url=url, headers=headers, **req_data)
+            elif request_type and request_type.lower() == "grpc":
+                return cls.request_type_for_grpc(url=url, headers=headers, payload=payload, proto=proto)
+            elif request_type and request_type.lower() == "export":
+                return cls.request_type_for_export(method=method, url=url, headers=headers, payload=payload,
+                                                   cookies=cookies)
             else:
                 return cls.request_type_for_none(method=method, url=url, headers=headers, cookies=cookies)
 
@@ -70,7 +201,7 @@ class BaseRequest:
                      f"headers={headers}\n"
                      f"json={json}\n"
                      f"其他参数：{kwargs}\n")
-        return requests.request(
+        return cls._request(
             method=method,
             url=url,
             json=json,
@@ -93,7 +224,7 @@ class BaseRequest:
                      f"headers={headers}\n"
                      f"params={params}\n"
                      f"其他参数：{kwargs}\n")
-        return requests.request(
+        return cls._request(
             method=method,
             url=url,
             headers=headers,
@@ -117,7 +248,7 @@ class BaseRequest:
                      f"headers={headers}\n"
                      f"data={data}\n"
                      f"其他参数：{kwargs}\n")
-        return requests.request(
+        return cls._request(
             method=method,
             url=url,
             headers=headers,
@@ -126,27 +257,62 @@ class BaseRequest:
             **kwargs
         )
 
+    @staticmethod
+    def _multipart_fields(fields: Union[Dict, Text, None], files: Union[Text, List, Dict]):
+        """
+        构建 multipart/form-data 的表单字段，文件以只读方式打开，由 MultipartEncoder 分块读取
+        :param fields: 字符串表示文件字段名（默认 "file"）；字典表示普通表单字段
+        :param files: 文件路径；文件路径列表（使用同一个文件字段名）；或者 {文件字段名: 文件路径或文件路径列表}
+        :return: (表单字段列表, 打开的文件对象列表)
+        """
+        file_field = fields if isinstance(fields, str) and fields else "file"
+        if isinstance(files, dict):
+            file_items = [(name, path) for name, paths in files.items()
+                          for path in (paths if isinstance(paths, (list, tuple)) else [paths])]
+        elif isinstance(files, (list, tuple)):
+            file_items = [(file_field, path) for path in files]
+        else:
+            file_items = [(file_field, files)]
+
+        form_fields, opened = [], []
+        if isinstance(fields, dict):
+            for name, value in fields.items():
+                for item in (value if isinstance(value, (list, tuple)) else [value]):
+                    form_fields.append((name, item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)))
+        try:
+            for name, path in file_items:
+                file = open(path, "rb")
+                opened.append(file)
+                form_fields.append((name, (os.path.basename(path), file, mimetypes.guess_type(path)[0]
+                                           or "application/octet-stream")))
+        except Exception:
+            for file in opened:
+                file.close()
+            raise
+        return form_fields, opened
+
     @classmethod
     def request_type_for_file(cls, method: Text, url: Text, headers: Optional[Dict],
                               fields: Union[Dict, Text, None],
-                              files: Text, **kwargs):
+                              files: Union[Text, List, Dict], **kwargs):
         """
         处理 requestType 为 file 类型
 
         本方法用于构建和发送包含文件上传的 HTTP 请求。它通过多部分表单数据格式来上传文件，
         这是HTTP协议中用于上传文件的标准方法。
+        请求体由 MultipartEncoder 边发送边从磁盘分块读取，不会把整个文件读入内存，大文件上传也只占用少量内存。
 
         参数:
         - method (Text): HTTP 方法，如 'POST'。
         - url (Text): 请求的URL。
         - headers (Dict): 请求的HTTP头。
-        - fields (Dict): 请求的表单字段。通常包含文件字段的信息。
-        - files: 要上传的文件路径。
+        - fields (Dict/Text): 字符串表示文件字段名（默认 "file"）；字典表示随文件一起提交的普通表单字段。
+        - files: 要上传的文件路径，支持多个文件：文件路径列表，或者 {文件字段名: 文件路径或文件路径列表}。
         - cookies (Optional): 请求的cookies。
         - **kwargs: 其他请求参数，如标签和回调函数等。
 
         返回:
-        - requests.Response: 发送请求后的响应对象。
+        - requests.Response: 发送请求后的响应对象，response.upload 中保存上传的字节数、耗时及速率。
         """
         logger.trace("发送请求：\n"
                      "request_type=file\n"
@@ -156,35 +322,73 @@ class BaseRequest:
                      f"fields={fields}\n"
                      f"files={files}\n"
                      f"其他参数：{kwargs}\n")
-        # 如果fields没有指定，则默认使用 "file" 作为字段名
-        _fields = fields or "file"
-
-        # 构建多部分表单数据的编码器，设置边界参数为当前时间戳
-        encoder = MultipartEncoder(
-            fields={
-                _fields: (
-                    os.path.basename(files),  # 使用文件的基名作为文件名
-                    open(files, "rb")  # 打开文件以二进制读取模式
-                )
-            },
-            boundary='------------------------' + str(time.time())  # 生成唯一的边界标记
-        )
+        form_fields, opened = cls._multipart_fields(fields=fields, files=files)
+        try:
+            # 构建多部分表单数据的编码器，设置边界参数为当前时间戳
+            encoder = MultipartEncoder(
+                fields=form_fields,
+                boundary='------------------------' + str(time.time())  # 生成唯一的边界标记
+            )
+            # 记录请求体开始读取、读取完毕的时间，用于计算上传速率
+            upload = {"start": None, "end": None}
 
-        # 设置Content-Type头为multipart/form-data，这是文件上传所需的
-        headers['Content-Type'] = encoder.content_type
+            def on_read(monitor: MultipartEncoderMonitor):
+                now = time.perf_counter()
+                if upload["start"] is None:
+                    upload["start"] = now
+                upload["end"] = now
 
-        # 发送请求，使用multipart/form-data编码的数据
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=headers,
-            data=encoder.to_string(),  # 将编码数据转换为字符串形式
-            timeout=cls.TIMEOUT,  # 使用类定义的超时时间
-            **kwargs  # 传递其他请求参数
-        )
+            monitor = MultipartEncoderMonitor(encoder, on_read)
+
+            # 设置Content-Type头为multipart/form-data，这是文件上传所需的
+            headers = dict(headers or {})
+            headers['Content-Type'] = monitor.content_type
+
+            # 发送请求，直接传入编码器，由 requests 分块读取并发送
+            response = cls._request(
+                method=method,
+                url=url,
+                headers=headers,
+                data=monitor,
+                timeout=cls.TIMEOUT,  # 使用类定义的超时时间
+                **kwargs  # 传递其他请求参数
+            )
+        finally:
+            for file in opened:
+                file.close()
 
+        seconds = (upload["end"] - upload["start"]) if upload["start"] is not None else 0.0
+        response.upload = {"bytes": monitor.bytes_read, "files": len(opened), "seconds": round(seconds, 3),
+                           "mb_per_s": round(monitor.bytes_read / seconds / 1024 / 1024, 3) if seconds else None}
+        # 首字节耗时不包含上传请求体的耗时
+        response.timings["upload"] = round(seconds * 1000, 3)
+        response.timings["ttfb"] = round(max(response.timings.get("ttfb", 0.0) - seconds * 1000, 0.0), 3)
+        record_transfer("upload", monitor.bytes_read)
+        logger.debug(f"文件上传完成：{len(opened)} 个文件，{monitor.bytes_read} 字节，耗时 {seconds:.3f} s，"
+                     f"速率 {response.upload['mb_per_s']} MB/s")
         return response
 
+    @classmethod
+    def request_type_for_grpc(cls, url: Text, headers: Optional[Dict], payload: Optional[Dict], proto: Text):
+        """
+        处理 requestType 为 grpc 类型
+        url 格式为 grpc://host:port/package.Service/Method，proto 为服务定义的 .proto 文件（相对路径基于 files 目录），
+        payload 为请求消息，headers 作为 metadata 发送；返回的 GrpcResponse 中 status_code 为 gRPC 状态码（0 表示成功），
+        响应内容为响应消息转换的 JSON
+        """
+        # grpc、protobuf 导入较慢，只在发送 gRPC 请求时导入
+        from core.requests_utils.grpc_request import grpc_client
+
+        logger.trace("发送请求：\n"
+                     "request_type=grpc\n"
+                     f"url={url}\n"
+                     f"proto={proto}\n"
+                     f"metadata={headers}\n"
+                     f"payload={payload}\n")
+        with tracer.span("grpc_call", "request", url=url):
+            # 超时时间使用 settings.GRPC["timeout"]
+            return grpc_client.call(url=url, proto=proto, payload=payload, headers=headers)
+
     @classmethod
     def request_type_for_none(cls, method: Text, url: Text, headers: Optional[Dict], **kwargs):
         """处理 requestType 为 None"""
@@ -194,7 +398,7 @@ class BaseRequest:
                      f"url={url}\n"
                      f"headers={headers}\n"
                      f"其他参数：{kwargs}\n")
-        return requests.request(
+        return cls._request(
             method=method,
             url=url,
             headers=headers,
@@ -207,6 +411,10 @@ class BaseRequest:
                                 **kwargs):
         """
         判断 requestType 为 export 导出类型
+        1. 响应体按 settings.DOWNLOAD["chunk_size"] 分块写入文件，边下载边计算校验值
+        2. GET 请求、服务端支持 Range 请求且文件不小于 2 个分段（settings.DOWNLOAD["min_part_size"]）时，分段并行下载，失败后从已下载的位置继续下载
+        3. 下载完成后，response.download_file_path 为文件路径，response.download 为下载信息；
+           响应内容替换为下载信息的 JSON，可以使用 $.bytes、$.sha256 等 JSONPath 进行断言
         :param method: 请求方法
         :param url: 请求地址
         :param headers: 请求头
@@ -239,7 +447,7 @@ class BaseRequest:
             request_kwargs["json"] = payload
 
         try:
-            response = requests.request(**request_kwargs)
+            response = cls._request(**request_kwargs)
             logger.debug(f"Export请求响应状态码: {response.status_code}")
 
             if response.status_code == 200:
@@ -248,27 +456,46 @@ class BaseRequest:
                 content_disposition = response.headers.get("Content-Disposition")
                 filename = None
                 if content_disposition:
-                    import re
                     # 尝试匹配 filename="xxx" 或 filename*=utf-8''xxx
                     filename_match = re.search(r'filename\*?=(?:UTF-8\'\')?["\']?([^";\r\n]+)["\']?', content_disposition)
                     if filename_match:
-                        from urllib.parse import unquote
                         filename = unquote(filename_match.group(1))
 
                 # 如果无法获取文件名，使用时间戳生成
                 if not filename:
                     filename = f"export_{int(time.time())}.bin"
 
-                file_path = os.path.join(download_dir, filename)
+                file_path = os.path.join(download_dir, os.path.basename(filename))
 
-                # 写入文件
-                with open(file_path, "wb") as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                logger.info(f"文件下载成功，保存路径: {file_path}")
+                start = time.perf_counter()
+                size = int(response.headers.get("Content-Length") or 0)
+                # 文件至少可以分成 2 个分段时才分段下载，否则直接使用当前响应下载
+                ranged = (method.upper() == "GET" and size >= 2 * DOWNLOAD["min_part_size"]
+                          and response.headers.get("Accept-Ranges", "").lower() == "bytes"
+                          and not response.headers.get("Content-Encoding"))
+                if ranged:
+                    # 分段下载：关闭当前响应，使用 Range 请求重新下载
+                    response.close()
+                    download = RangedDownloader(request=cls._request, url=response.url, size=size,
+                                                file_path=file_path, headers=headers,
+                                                validator=response.headers.get("ETag")
+                                                or response.headers.get("Last-Modified"),
+                                                timeout=cls.TIMEOUT, close_session=cls.close_session,
+                                                **kwargs).download()
+                else:
+                    download = stream_to_file(response, file_path)
+                seconds = time.perf_counter() - start
+                download.update({"path": file_path, "ranged": ranged, "seconds": round(seconds, 3),
+                                 "mb_per_s": round(download["bytes"] / seconds / 1024 / 1024, 3) if seconds else None})
+                logger.info(f"文件下载成功，保存路径: {file_path}，{download['bytes']} 字节，"
+                            f"{download['parts']} 个分段，耗时 {seconds:.3f} s")
                 # 将文件路径附加到响应对象中，方便后续断言或提取
                 response.download_file_path = file_path
+                response.download = download
+                # 响应体已经写入文件，响应内容替换为下载信息
+                response._content = json.dumps(download, ensure_ascii=False).encode("utf-8")
+                response.encoding = "utf-8"
+                response.timings["download"] = round(seconds * 1000, 3)
 
             else:
                 logger.warning(f"Export请求失败，状态码: {response.status_code}, 响应内容: {response.text[:200]}")
@@ -7,6 +7,7 @@ import allure
 from loguru import logger
 from config.settings import INTERFACE_DIR
 from core.data_utils.data_handle import data_handle
+from core.metrics_utils.tracing import tracer
 from core.report_utils.allure_handle import allure_step
 from utils.database_utils.mysql_handle import MysqlServer
 from core.requests_utils.request_control import RequestControl
@@ -35,6 +36,7 @@ class CaseDependenceHandler:
             logger.debug(f"依赖环境变量 --> {key}={new_value}")
             self.source.update({key: new_value})
 
+    @tracer.traced("handle_interfaces", "dependence")
     def handle_interfaces(self, interfaces):
         """
         处理接口依赖
@@ -47,10 +49,12 @@ class CaseDependenceHandler:
         request_control = RequestControl()
         for interface in (interfaces if isinstance(interfaces, list) else [interfaces]):
             api_data = request_control.get_api_data(api_file_path=INTERFACE_DIR, key=interface)
-            with allure.step(f"依赖接口：{api_data['title']}({interface})"):
+            with allure.step(f"依赖接口：{api_data['title']}({interface})"), \
+                    tracer.span(f"依赖接口：{interface}", "dependence", interface=interface):
                 result = request_control.api_request_flow(request_data=api_data, global_var=self.source)
                 self.source.update(result)
 
+    @tracer.traced("handle_database_dependence", "dependence")
     def handle_database_dependence(self, database_dependence, db_info: dict):
         """
         处理数据库依赖
@@ -94,6 +98,7 @@ class CaseDependenceHandler:
             else:
                 logger.error("数据库依赖参数必须传入sql")
 
+    @tracer.traced("case_dependence_handle", "dependence")
     def case_dependence_handle(self, case_dependence: dict, db_info: dict = None):
         """
         处理用例依赖，支持接口依赖，环境变量依赖，SQL依赖。关键字：variables, interface, database,
@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : cassette.py
+# @Desc: 请求录制回放模块：录制渲染后的请求及完整响应，回放时直接从录制文件返回响应，不发送网络请求
+
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import hashlib
+import datetime
+import threading
+import requests
+from loguru import logger
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from requests.structures import CaseInsensitiveDict
+from config.settings import CASSETTE, CASSETTE_DIR
+from core.metrics_utils.metrics_exporter import record_cache
+
+# 录制模式：off（关闭）、record（录制）、replay（回放，未录制的请求报错）、auto（回放，未录制的请求发送后录制）
+MODES = ("off", "record", "replay", "auto")
+# 不录制的请求类型：gRPC 响应不是 requests.Response，export 的响应体已写入下载文件
+SKIP_REQUEST_TYPES = ("grpc", "export")
+# 分段文件头：魔数 + 版本
+MAGIC = b"APICAS1\n"
+# 索引项：请求指纹（16 字节）、记录在数据文件中的偏移量、长度、同一指纹在本次录制中的序号、标志位
+INDEX_ENTRY = struct.Struct("<16sQIIB")
+# 记录的长度前缀：请求及响应信息（JSON）的字节数，之后是响应体
+META_LENGTH = struct.Struct("<I")
+FLAG_COMPRESSED = 1
+# 响应体保存的是解压后的内容，回放时不需要这些响应头
+SKIP_RESPONSE_HEADERS = ("content-encoding", "transfer-encoding")
+# 录制时的运行种子等信息，回放时使用相同的种子，生成相同的请求数据
+CASSETTE_META_FILE = "cassette.json"
+# 录制文件中敏感信息替换成的值
+REDACTED = "******"
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """
+    回放模式下请求没有录制的响应
+    """
+
+
+def _strip_fields(value, fields: frozenset):
+    """
+    递归删除字典中需要忽略的字段
+    """
+    if not fields:
+        return value
+    if isinstance(value, dict):
+        return {k: _strip_fields(v, fields) for k, v in value.items() if k not in fields}
+    if isinstance(value, (list, tuple)):
+        return [_strip_fields(item, fields) for item in value]
+    return value
+
+
+def _redact(value, fields: frozenset):
+    """
+    递归替换字典中的敏感字段（不区分大小写）
+    """
+    if isinstance(value, dict):
+        return {k: REDACTED if str(k).lower() in fields and v not in (None, "") else _redact(v, fields)
+                for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact(item, fields) for item in value]
+    return value
+
+
+def redact_request(req_data: dict) -> dict:
+    """
+    录制前脱敏请求数据：settings.CASSETTE["filter_headers"] 中的请求头、cookies 的值，以及请求体中 filter_fields 中的字段
+    """
+    headers = frozenset(name.lower() for name in CASSETTE["filter_headers"])
+    fields = frozenset(name.lower() for name in CASSETTE["filter_fields"])
+    request = dict(req_data)
+    if isinstance(request.get("headers"), dict):
+        request["headers"] = _redact(request["headers"], headers)
+    if isinstance(request.get("cookies"), dict):
+        request["cookies"] = {name: REDACTED for name in request["cookies"]}
+    elif request.get("cookies"):
+        request["cookies"] = REDACTED
+    for name in ("payload", "files"):
+        if name in request:
+            request[name] = _redact(request[name], fields)
+    return request
+
+
+def _query_items(params) -> list:
+    if not params:
+        return []
+    if isinstance(params, (str, bytes)):
+        return parse_qsl(params.decode("utf-8") if isinstance(params, bytes) else params, keep_blank_values=True)
+    items = params.items() if isinstance(params, dict) else params
+    return [(str(k), json.dumps(item, ensure_ascii=False, sort_keys=True) if isinstance(item, (dict, list)) else str(item))
+            for k, v in items for item in (v if isinstance(v, (list, tuple)) else [v])]
+
+
+def normalize_url(url: str, params=None, ignore_fields: frozenset = frozenset(), match_host: bool = True) -> str:
+    """
+    标准化请求地址：协议、域名小写，去掉默认端口、锚点；查询参数与 params 合并后排序，并去掉需要忽略的参数
+    """
+    parts = urlsplit(url or "")
+    scheme, netloc = parts.scheme.lower(), parts.netloc.lower()
+    if (scheme, netloc.rsplit(":", 1)[-1]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) + _query_items(params)
+                   if k not in ignore_fields)
+    if not match_host:
+        scheme, netloc = "", ""
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def fingerprint(req_data: dict) -> bytes:
+    """
+    请求指纹：请求方法、标准化后的地址、请求类型、请求体，以及 settings.CASSETTE["match_headers"] 中的请求头；
+    settings.CASSETTE["ignore_fields"] 中的参数、字段不参与计算
+    """
+    ignore_fields = frozenset(CASSETTE["ignore_fields"])
+    request_type = (req_data.get("request_type") or "none").lower()
+    payload = req_data.get("payload")
+    url = normalize_url(req_data.get("url", ""), params=payload if request_type == "params" else None,
+                        ignore_fields=ignore_fields, match_host=CASSETTE["match_host"])
+    if request_type == "params":
+        body = None
+    elif request_type == "file":
+        files = req_data.get("files")
+        paths = files if isinstance(files, dict) else {"": files}
+        body = {"fields": _strip_fields(payload, ignore_fields),
+                "files": {name: [os.path.basename(str(path)) for path in
+                                 (value if isinstance(value, (list, tuple)) else [value])]
+                          for name, value in paths.items()}}
+    else:
+        body = _strip_fields(payload, ignore_fields)
+    headers = {str(k).lower(): v for k, v in (req_data.get("headers") or {}).items()}
+    match_headers = {name: headers.get(name.lower()) for name in CASSETTE["match_headers"]}
+    text = json.dumps([(req_data.get("method") or "GET").upper(), url, request_type, match_headers, body],
+                      ensure_ascii=False, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def encode_record(req_data: dict, response: requests.Response) -> Tuple[bytes, int]:
+    """
+    将渲染后的请求数据及完整响应（状态码、响应头、cookies、响应体、耗时）编码为一条记录；
+    请求数据及响应头中的敏感信息（settings.CASSETTE["filter_headers"]、["filter_fields"]）脱敏后保存
+    :return: (记录, 标志位)
+    """
+    filter_headers = frozenset(name.lower() for name in CASSETTE["filter_headers"])
+    meta = {
+        "request": redact_request(req_data),
+        "status_code": response.status_code,
+        "reason": response.reason,
+        "url": response.url,
+        "headers": [(k, REDACTED if k.lower() in filter_headers else v) for k, v in response.headers.items()
+                    if k.lower() not in SKIP_RESPONSE_HEADERS],
+        "encoding": response.encoding,
+        "cookies": [(c.name, c.value, c.domain, c.path) for c in response.cookies],
+        "elapsed": response.elapsed.total_seconds(),
+        "timings": getattr(response, "timings", None),
+        "sizes": getattr(response, "sizes", None),
+        "recorded_at": time.time(),
+    }
+    meta_bytes = json.dumps(meta, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+    record = META_LENGTH.pack(len(meta_bytes)) + meta_bytes + (response.content or b"")
+    if len(record) >= CASSETTE["compress_min_size"]:
+        compressed = zlib.compress(record, 6)
+        if len(compressed) < len(record):
+            return compressed, FLAG_COMPRESSED
+    return record, 0
+
+
+def decode_record(record: bytes, flags: int) -> Tuple[dict, bytes]:
+    """
+    :return: (请求及响应信息, 响应体)
+    """
+    if flags & FLAG_COMPRESSED:
+        record = zlib.decompress(record)
+    length = META_LENGTH.unpack_from(record)[0]
+    start = META_LENGTH.size
+    return json.loads(record[start:start + length]), record[start + length:]
+
+
+def build_response(meta: dict, body: bytes) -> requests.Response:
+    """
+    根据录制的记录构造响应对象，与真实请求的响应一样可以断言、提取
+    """
+    response = requests.Response()
+    response.status_code = meta["status_code"]
+    response.reason = meta.get("reason")
+    response.url = meta.get("url")
+    response.headers = CaseInsensitiveDict(meta["headers"])
+    response.headers["Content-Length"] = str(len(body))
+    response.encoding = meta.get("encoding")
+    response._content = body
+    response.elapsed = datetime.timedelta(seconds=meta.get("elapsed") or 0)
+    for name, value, domain, path in meta.get("cookies") or []:
+        response.cookies.set(name, value, domain=domain, path=path)
+    response.timings = meta.get("timings") or {}
+    if meta.get("sizes"):
+        response.sizes = meta["sizes"]
+    response.replayed = True
+    return response
+
+
+class _SegmentWriter:
+    """
+    录制分段：数据文件（.dat）顺序追加记录，索引文件（.idx）追加固定长度的索引项；
+    先写入记录再写入索引项，进程异常退出时最多丢失最后一条记录，不会出现指向不完整记录的索引
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        name = f"seg-{time.time_ns():020d}-{os.getpid()}"
+        self.data_path = os.path.join(directory, f"{name}.dat")
+        self.index_path = os.path.join(directory, f"{name}.idx")
+        self._data = open(self.data_path, "wb")
+        self._index = open(self.index_path, "wb")
+        self._data.write(MAGIC)
+        self._index.write(MAGIC)
+        self._offset = len(MAGIC)
+
+    def append(self, key: bytes, seq: int, record: bytes, flags: int):
+        offset = self._offset
+        self._data.write(record)
+        self._data.flush()
+        self._index.write(INDEX_ENTRY.pack(key, offset, len(record), seq, flags))
+        self._index.flush()
+        self._offset += len(record)
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+
+class Cassette:
+    """
+    请求录制文件：一个目录，每次录制（每个进程）新增一个分段，不修改已有的文件。
+    读取时加载所有分段的索引，数据文件通过内存映射按需读取；同一个指纹在后面的分段中重新录制时，覆盖之前的记录。
+    同一个指纹在一次录制中出现多次（例如新增前后分别查询列表）时按顺序保存，回放时按顺序返回，超出录制次数时返回最后一次的响应
+    """
+
+    def __init__(self):
+        self.mode = "off"
+        self.path = None
+        self._lock = threading.Lock()
+        self._index = None
+        self._maps = []
+        self._writer = None
+        self._recorded = {}
+        self._played = {}
+        self.stats = {"replayed": 0, "missed": 0, "recorded": 0}
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode in ("replay", "auto")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode in ("record", "auto")
+
+    def configure(self, mode: str = None, path: str = None):
+        """
+        设置录制模式及录制文件目录，常驻进程模式下每次运行都会重新设置
+        """
+        mode = (mode or "off").lower()
+        if mode not in MODES:
+            raise ValueError(f"不支持的录制模式：{mode}，可选值：{', '.join(MODES)}")
+        self.close()
+        self.mode = mode
+        self.path = path
+        self.stats = {"replayed": 0, "missed": 0, "recorded": 0}
+        if mode != "off":
+            logger.info(f"请求录制回放：mode={mode}，录制文件目录：{path}")
+        return self
+
+    def supports(self, req_data: dict) -> bool:
+        return self.mode != "off" and (req_data.get("request_type") or "").lower() not in SKIP_REQUEST_TYPES
+
+    def _segments(self) -> list:
+        if not self.path or not os.path.isdir(self.path):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.path) if name.endswith(".idx"))
+
+    def _load(self):
+        """
+        加载所有分段的索引：{指纹: [(数据, 偏移量, 长度, 标志位), ...]}
+        """
+        index = {}
+        for name in self._segments():
+            try:
+                with open(os.path.join(self.path, f"{name}.idx"), "rb") as f:
+                    raw = f.read()
+                if not raw.startswith(MAGIC):
+                    logger.warning(f"录制文件索引格式错误，已忽略：{name}.idx")
+                    continue
+                raw = raw[len(MAGIC):]
+                # 忽略写入中断的最后一个不完整的索引项
+                raw = raw[:len(raw) - len(raw) % INDEX_ENTRY.size]
+                if not raw:
+                    continue
+                with open(os.path.join(self.path, f"{name}.dat"), "rb") as f:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取录制文件失败，已忽略：{name}，{e}")
+                continue
+            self._maps.append(data)
+            for key, offset, length, seq, flags in INDEX_ENTRY.iter_unpack(raw):
+                if offset + length > len(data):
+                    continue
+                entries = index.get(key)
+                if seq == 0 or entries is None:
+                    entries = index[key] = []
+                entries.append((data, offset, length, flags))
+        self._index = index
+        logger.debug(f"加载录制文件：{len(self._maps)} 个分段，{len(index)} 个请求")
+
+    def play(self, req_data: dict) -> Optional[requests.Response]:
+        """
+        回放：返回录制的响应；没有录制时，replay 模式抛出 CassetteMiss，auto 模式返回 None
+        """
+        key = fingerprint(req_data)
+        with self._lock:
+            if self._index is None:
+                self._load()
+            entries = self._index.get(key)
+            if entries:
+                count = self._played.get(key, 0)
+                self._played[key] = count + 1
+                data, offset, length, flags = entries[min(count, len(entries) - 1)]
+                record = data[offset:offset + length]
+                self.stats["replayed"] += 1
+            else:
+                self.stats["missed"] += 1
+        record_cache("cassette", bool(entries))
+        if not entries:
+            if self.mode == "replay":
+                raise CassetteMiss(f"没有录制的响应：{req_data.get('method')} {req_data.get('url')}，"
+                                   f"请先使用 -cassette record 录制，或使用 -cassette auto 回放并录制缺少的响应")
+            return None
+        meta, body = decode_record(record, flags)
+        logger.debug(f"回放录制的响应：{req_data.get('method')} {req_data.get('url')} -> {meta['status_code']}")
+        return build_response(meta, body)
+
+    def record(self, req_data: dict, response: requests.Response):
+        """
+        录制：追加写入当前进程的分段
+        """
+        key = fingerprint(req_data)
+        try:
+            record, flags = encode_record(req_data, response)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"请求无法录制：{req_data.get('url')}，{e}")
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = _SegmentWriter(self.path)
+                self._write_meta()
+            seq = self._recorded.get(key, 0)
+            self._recorded[key] = seq + 1
+            self._writer.append(key, seq, record, flags)
+            self.stats["recorded"] += 1
+            if self._index is not None:
+                # auto 模式：同一次运行中再次发送相同的请求时直接回放
+                self._index.setdefault(key, []).append((record, 0, len(record), flags))
+
+    def _write_meta(self):
+        from core.data_utils.run_seed import get_run_seed
+
+        with open(os.path.join(self.path, CASSETTE_META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"seed": get_run_seed(), "recorded_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")},
+                      f, ensure_ascii=False)
+
+    def compact(self):
+        """
+        合并所有分段：只保留每个指纹最近一次录制的记录，删除原有分段
+        """
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._index = None
+            self._load()
+            old = self._segments()
+            writer = _SegmentWriter(self.path)
+            try:
+                for key, entries in self._index.items():
+                    for seq, (data, offset, length, flags) in enumerate(entries):
+                        writer.append(key, seq, data[offset:offset + length], flags)
+            finally:
+                writer.close()
+            self._release()
+            for name in old:
+                for ext in (".idx", ".dat"):
+                    try:
+                        os.remove(os.path.join(self.path, name + ext))
+                    except OSError:
+                        pass
+        logger.info(f"合并录制文件：{len(old)} 个分段合并为 1 个")
+
+    def _release(self):
+        self._index = None
+        for data in self._maps:
+            data.close()
+        self._maps = []
+
+    def close(self, compact: bool = False):
+        """
+        运行结束：关闭录制分段、释放内存映射；compact 为 True 且分段数超过 settings.CASSETTE["max_segments"] 时合并分段。
+        xdist 的 worker 进程可能还在录制，只在主进程合并
+        """
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._release()
+            self._recorded = {}
+            self._played = {}
+        if self.mode != "off":
+            logger.info(f"请求录制回放：回放 {self.stats['replayed']} 个，未录制 {self.stats['missed']} 个，"
+                        f"录制 {self.stats['recorded']} 个")
+        if compact and self.recording and len(self._segments()) > CASSETTE["max_segments"]:
+            self.compact()
+
+
+def cassette_path(name: str) -> str:
+    """
+    录制文件目录，每个运行环境一个
+    """
+    return os.path.join(CASSETTE_DIR, name or "default")
+
+
+def recorded_seed(path: str) -> Optional[int]:
+    """
+    最近一次录制时的运行种子，回放时使用相同的种子，${generate_xxx()} 等生成的请求数据与录制时相同
+    """
+    try:
+        with open(os.path.join(path, CASSETTE_META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f).get("seed")
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+# 当前进程的请求录制文件
+cassette = Cassette()
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : grpc_request.py
+# @Desc: gRPC请求模块，根据 .proto 动态加载消息类型，复用长连接 channel 发送 unary、server-streaming 请求
+
+import os
+import json
+import time
+import threading
+import datetime
+import requests
+from loguru import logger
+from urllib.parse import urlparse
+from typing import Dict, Optional, Tuple
+from requests.structures import CaseInsensitiveDict
+from config.settings import FILES_DIR, GRPC
+
+# gRPC 内部使用的请求头，不作为 metadata 发送
+_RESERVED_HEADERS = {"content-type", "te", "user-agent", "host", "accept-encoding", "connection"}
+
+
+class GrpcResponse(requests.Response):
+    """
+    gRPC 响应，与 HTTP 响应的用法保持一致，可以直接使用 validate、extract：
+    1. status_code 为 gRPC 状态码，0 表示成功
+    2. json()/text 为响应消息转换的 JSON，server-streaming 调用为消息列表；调用失败时为 {"code": ..., "details": ...}
+    3. headers 为服务端返回的 initial metadata 及 trailing metadata
+    """
+
+    def __init__(self, url: str, status_code: int, content, metadata: Dict[str, str], seconds: float):
+        super().__init__()
+        self.url = url
+        self.status_code = status_code
+        self._content = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        self.encoding = "utf-8"
+        self.headers = CaseInsensitiveDict(metadata)
+        self.headers.setdefault("content-type", "application/json")
+        self.elapsed = datetime.timedelta(seconds=seconds)
+        self.timings = {"total": round(seconds * 1000, 3)}
+        self.reason = GRPC_STATUS_NAMES.get(status_code, str(status_code))
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 0
+
+
+# gRPC 状态码与名称的对应关系，导入 grpc 后填充
+GRPC_STATUS_NAMES: Dict[int, str] = {}
+
+
+class _ProtoLoader:
+    """
+    按 .proto 文件加载描述符，每个 .proto 只编译、加载一次，并缓存动态生成的消息类型
+    """
+
+    def __init__(self):
+        self._pools = {}
+        self._classes = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, proto_path: str):
+        from google.protobuf import descriptor_pool
+        from utils.yaml_case_maker.grpc_for_yaml import GrpcForYaml
+
+        pool = self._pools.get(proto_path)
+        if pool is None:
+            descriptor_set = GrpcForYaml(case_dir=None, proto_path=proto_path)._compile_proto()
+            pool = descriptor_pool.DescriptorPool()
+            for file_proto in descriptor_set.file:
+                pool.Add(file_proto)
+            self._pools[proto_path] = pool
+        return pool
+
+    def method(self, proto_path: str, service: str, method: str):
+        """
+        :return: (方法描述符, 请求消息类型, 响应消息类型)
+        """
+        from google.protobuf import message_factory
+
+        with self._lock:
+            key = (proto_path, service, method)
+            cached = self._classes.get(key)
+            if cached is None:
+                try:
+                    method_desc = self._pool(proto_path).FindServiceByName(service).FindMethodByName(method)
+                except KeyError:
+                    raise ValueError(f"gRPC 方法不存在：{service}/{method}，proto 文件：{proto_path}") from None
+                cached = self._classes[key] = (method_desc,
+                                               message_factory.GetMessageClass(method_desc.input_type),
+                                               message_factory.GetMessageClass(method_desc.output_type))
+            return cached
+
+    def clear(self):
+        with self._lock:
+            self._pools.clear()
+            self._classes.clear()
+
+
+class GrpcClient:
+    """
+    gRPC 客户端：
+    1. 每个 target 只创建一个 channel，channel 基于 HTTP/2 多路复用，可以在多个线程、多个用例之间共享
+    2. 每个方法的调用对象（stub）只创建一次
+    3. URL 格式：grpc://host:port/package.Service/Method，TLS 使用 grpcs://
+    """
+
+    def __init__(self):
+        self.loader = _ProtoLoader()
+        self._channels = {}
+        self._stubs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_url(url: str) -> Tuple[str, str, str, bool]:
+        """
+        :return: (target, 服务全名, 方法名, 是否使用TLS)
+        """
+        parsed = urlparse(url)
+        parts = parsed.path.strip("/").split("/")
+        if parsed.scheme.lower() not in ("grpc", "grpcs") or not parsed.netloc or len(parts) != 2:
+            raise ValueError(f"gRPC 请求地址格式错误：{url}，正确格式：grpc://host:port/package.Service/Method")
+        return parsed.netloc, parts[0], parts[1], parsed.scheme.lower() == "grpcs"
+
+    def channel(self, target: str, secure: bool = False):
+        import grpc
+
+        with self._lock:
+            channel = self._channels.get((target, secure))
+            if channel is None:
+                options = list(GRPC["channel_options"].items())
+                channel = grpc.secure_channel(target, grpc.ssl_channel_credentials(), options=options) \
+                    if secure else grpc.insecure_channel(target, options=options)
+                self._channels[(target, secure)] = channel
+                logger.debug(f"创建 gRPC channel：{target}")
+            return channel
+
+    def _stub(self, target: str, secure: bool, service: str, method_desc, request_class, response_class):
+        key = (target, secure, service, method_desc.name)
+        with self._lock:
+            stub = self._stubs.get(key)
+        if stub is None:
+            channel = self.channel(target, secure)
+            path = f"/{service}/{method_desc.name}"
+            factory = channel.unary_stream if method_desc.server_streaming else channel.unary_unary
+            stub = factory(path, request_serializer=request_class.SerializeToString,
+                           response_deserializer=response_class.FromString)
+            with self._lock:
+                self._stubs[key] = stub
+        return stub
+
+    def call(self, url: str, proto: str, payload: Optional[dict] = None, headers: Optional[dict] = None,
+             timeout: float = None) -> GrpcResponse:
+        """
+        发送 gRPC 请求
+        :param url: grpc://host:port/package.Service/Method
+        :param proto: .proto 文件路径，相对路径基于 files 目录
+        :param payload: 请求消息，字典格式
+        :param headers: 作为 metadata 发送
+        :param timeout: 超时时间，单位：秒，不传时使用 settings.GRPC["timeout"]
+        """
+        import grpc
+        from google.protobuf import json_format
+
+        if not GRPC_STATUS_NAMES:
+            GRPC_STATUS_NAMES.update({code.value[0]: code.name for code in grpc.StatusCode})
+        if not proto:
+            raise ValueError(f"gRPC 请求需要配置 proto 文件：{url}")
+        proto_path = proto if os.path.isabs(proto) else os.path.join(FILES_DIR, proto)
+        target, service, method, secure = self.parse_url(url)
+        method_desc, request_class, response_class = self.loader.method(proto_path, service, method)
+        if method_desc.client_streaming:
+            raise ValueError(f"暂不支持 client-streaming 调用：{service}/{method}")
+        request = json_format.ParseDict(payload or {}, request_class(), ignore_unknown_fields=False)
+        metadata = [(str(key).lower(), str(value)) for key, value in (headers or {}).items()
+                    if str(key).lower() not in _RESERVED_HEADERS]
+        stub = self._stub(target, secure, service, method_desc, request_class, response_class)
+
+        def to_dict(message):
+            # 输出默认值字段（例如 0、空字符串），断言、提取时字段始终存在
+            return json_format.MessageToDict(message, preserving_proto_field_name=True,
+                                             always_print_fields_with_no_presence=True)
+
+        start = time.perf_counter()
+        response_metadata = {}
+        try:
+            if method_desc.server_streaming:
+                responses = stub(request, metadata=metadata, timeout=GRPC["timeout"] if timeout is None else timeout)
+                content = [to_dict(message) for message in responses]
+                call = responses
+            else:
+                message, call = stub.with_call(request, metadata=metadata, timeout=GRPC["timeout"] if timeout is None else timeout)
+                content = to_dict(message)
+            status_code = call.code().value[0]
+            for key, value in (call.initial_metadata() or ()) + (call.trailing_metadata() or ()):
+                response_metadata[key] = value if isinstance(value, str) else value.hex()
+        except grpc.RpcError as e:
+            status_code = e.code().value[0]
+            content = {"code": e.code().name, "details": e.details()}
+            for key, value in (e.trailing_metadata() or ()):
+                response_metadata[key] = value if isinstance(value, str) else value.hex()
+        return GrpcResponse(url=url, status_code=status_code, content=content, metadata=response_metadata,
+                            seconds=time.perf_counter() - start)
+
+    def close(self):
+        """
+        关闭所有 channel
+        """
+        with self._lock:
+            for channel in self._channels.values():
+                channel.close()
+            self._channels.clear()
+            self._stubs.clear()
+
+
+# 当前进程共用的 gRPC 客户端
+grpc_client = GrpcClient()
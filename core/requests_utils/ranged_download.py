@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : ranged_download.py
+# @Desc: 文件下载模块，支持分块流式写入、HTTP Range 并行下载、断点续传以及边下载边计算校验值
+
+import os
+import json
+import time
+import hashlib
+import threading
+from loguru import logger
+from typing import Callable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import DOWNLOAD
+from core.metrics_utils.metrics_exporter import record_transfer
+
+
+class _Part:
+    """
+    文件的一个分段：[start, end]，written 为已写入的字节数
+    """
+    __slots__ = ("start", "end", "written")
+
+    def __init__(self, start: int, end: int, written: int = 0):
+        self.start = start
+        self.end = end
+        self.written = written
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start + 1
+
+    @property
+    def done(self) -> bool:
+        return self.written >= self.size
+
+
+class _OrderedHasher:
+    """
+    按文件顺序计算校验值：分段并行写入时，只有紧接在已计算位置之后的数据才能参与计算。
+    刚写入的数据正好紧接在已计算位置之后时直接使用内存中的数据，否则等前面的数据计算完后再从文件（系统页缓存）中读取
+    """
+
+    def __init__(self, file_path: str, parts: List[_Part], algorithm: str):
+        self.file_path = file_path
+        self.parts = parts
+        self.digest = hashlib.new(algorithm)
+        self.hashed = 0
+        self._lock = threading.Lock()
+
+    def _available(self) -> int:
+        """
+        从已计算位置开始，文件中连续可用的数据结束位置
+        """
+        for part in self.parts:
+            if part.start <= self.hashed <= part.end:
+                return part.start + part.written
+        return self.hashed
+
+    def feed(self, offset: int = None, chunk: bytes = b""):
+        """
+        数据写入文件后调用：offset 为 chunk 在文件中的位置
+        """
+        with self._lock:
+            while True:
+                available = self._available()
+                if available <= self.hashed:
+                    return
+                if offset is not None and offset == self.hashed and offset + len(chunk) == available:
+                    self.digest.update(chunk)
+                    self.hashed = available
+                    continue
+                # 已计算位置之后的数据是之前写入的（其他分段、上一次下载），从文件中读取
+                with open(self.file_path, "rb") as f:
+                    f.seek(self.hashed)
+                    while self.hashed < available:
+                        data = f.read(min(DOWNLOAD["chunk_size"], available - self.hashed))
+                        if not data:
+                            return
+                        self.digest.update(data)
+                        self.hashed += len(data)
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+def stream_to_file(response, file_path: str, chunk_size: int = DOWNLOAD["chunk_size"],
+                   algorithm: str = DOWNLOAD["checksum"]) -> dict:
+    """
+    将流式响应分块写入文件，同时计算校验值
+    :return: {"bytes": 下载字节数, algorithm: 校验值}
+    """
+    digest = hashlib.new(algorithm) if algorithm else None
+    size = 0
+    with open(file_path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                f.write(chunk)
+                size += len(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+    record_transfer("download", size)
+    result = {"bytes": size, "parts": 1, "resumed_bytes": 0}
+    if digest is not None:
+        result[algorithm] = digest.hexdigest()
+    return result
+
+
+class RangedDownloader:
+    """
+    HTTP Range 分段下载：
+    1. 按 parallel 个分段并行下载，每个分段失败后从已下载的位置继续下载，最多重试 retries 次
+    2. 下载过程中的数据保存在 <文件>.part 中，进度保存在 <文件>.part.json 中；
+       下载失败后再次下载同一个文件（url、大小、ETag/Last-Modified 相同）时，从上一次的进度继续下载
+    3. 边下载边计算校验值，不需要下载完成后再重新读取整个文件
+    """
+
+    def __init__(self, request: Callable, url: str, size: int, file_path: str, headers: Optional[dict] = None,
+                 validator: Optional[str] = None, chunk_size: int = DOWNLOAD["chunk_size"],
+                 parallel: int = DOWNLOAD["parallel"], min_part_size: int = DOWNLOAD["min_part_size"],
+                 retries: int = DOWNLOAD["retries"], algorithm: str = DOWNLOAD["checksum"],
+                 close_session: Optional[Callable] = None, **kwargs):
+        """
+        :param request: 发送请求的函数，参数与 requests.request 相同
+        :param close_session: 关闭当前线程 Session 的函数，并行下载的线程下载完成后调用，释放线程中创建的连接
+        :param size: 文件大小（Content-Length）
+        :param validator: ETag 或 Last-Modified，用于判断上一次的进度是否还可以使用
+        :param kwargs: 其他请求参数，例如 cookies、timeout
+        """
+        self.request = request
+        self.url = url
+        self.size = size
+        self.file_path = file_path
+        self.headers = dict(headers or {})
+        self.validator = validator
+        self.chunk_size = chunk_size
+        self.parallel = max(parallel, 1)
+        self.min_part_size = max(min_part_size, 1)
+        self.retries = retries
+        self.algorithm = algorithm
+        self.close_session = close_session
+        self.kwargs = kwargs
+        self.part_path = f"{file_path}.part"
+        self.state_path = f"{file_path}.part.json"
+        self._state_lock = threading.Lock()
+        self.parts: List[_Part] = []
+
+    def _split(self) -> List[_Part]:
+        count = max(min(self.parallel, self.size // self.min_part_size), 1)
+        part_size = -(-self.size // count)
+        return [_Part(start, min(start + part_size, self.size) - 1) for start in range(0, self.size, part_size)]
+
+    def _load_state(self) -> Optional[List[_Part]]:
+        """
+        读取上一次下载的进度，文件已变化时返回 None
+        """
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (state.get("url"), state.get("size"), state.get("validator")) != (self.url, self.size, self.validator) \
+                or not os.path.exists(self.part_path) or not self.validator:
+            return None
+        return [_Part(*item) for item in state["parts"]]
+
+    def _save_state(self):
+        with self._state_lock:
+            state = {"url": self.url, "size": self.size, "validator": self.validator,
+                     "parts": [[part.start, part.end, part.written] for part in self.parts]}
+            temp_path = f"{self.state_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.state_path)
+
+    def _download_part(self, part: _Part, hasher: Optional[_OrderedHasher]):
+        """
+        下载一个分段，失败时从已写入的位置继续下载
+        """
+        attempt = 0
+        with open(self.part_path, "r+b") as f:
+            while not part.done:
+                headers = dict(self.headers, Range=f"bytes={part.start + part.written}-{part.end}")
+                try:
+                    response = self.request(method="get", url=self.url, headers=headers, stream=True, **self.kwargs)
+                    with response:
+                        if response.status_code != 206:
+                            raise IOError(f"分段下载响应状态码为 {response.status_code}，服务端不支持 Range 请求")
+                        saved = part.written
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            if not chunk:
+                                continue
+                            chunk = chunk[:part.size - part.written]
+                            offset = part.start + part.written
+                            f.seek(offset)
+                            f.write(chunk)
+                            part.written += len(chunk)
+                            record_transfer("download", len(chunk))
+                            if hasher is not None:
+                                f.flush()
+                                hasher.feed(offset, chunk)
+                            # 每下载 8 个分块保存一次进度
+                            if part.written - saved >= self.chunk_size * 8:
+                                f.flush()
+                                self._save_state()
+                                saved = part.written
+                            if part.done:
+                                break
+                    if not part.done:
+                        raise IOError(f"分段 {part.start}-{part.end} 下载不完整")
+                except Exception as e:
+                    f.flush()
+                    self._save_state()
+                    attempt += 1
+                    if attempt > self.retries:
+                        raise
+                    logger.warning(f"分段 {part.start}-{part.end} 下载失败，{attempt} 秒后从 "
+                                   f"{part.start + part.written} 继续下载：{e}")
+                    time.sleep(attempt)
+
+    def _download_part_in_worker(self, part: _Part, hasher: Optional[_OrderedHasher]):
+        try:
+            self._download_part(part, hasher)
+        finally:
+            if self.close_session is not None:
+                self.close_session()
+
+    def download(self) -> dict:
+        """
+        :return: {"bytes": 文件大小, "parts": 分段数, "resumed_bytes": 使用上一次进度的字节数, algorithm: 校验值}
+        """
+        self.parts = self._load_state()
+        resumed = sum(part.written for part in self.parts) if self.parts else 0
+        if self.parts is None:
+            self.parts = self._split()
+            with open(self.part_path, "wb") as f:
+                f.truncate(self.size)
+        elif resumed:
+            logger.info(f"继续上一次的下载进度：{resumed}/{self.size} 字节")
+
+        hasher = _OrderedHasher(self.part_path, self.parts, self.algorithm) if self.algorithm else None
+        if hasher is not None:
+            # 上一次已下载的数据
+            hasher.feed()
+        pending = [part for part in self.parts if not part.done]
+        if len(pending) == 1:
+            self._download_part(pending[0], hasher)
+        elif pending:
+            with ThreadPoolExecutor(max_workers=min(self.parallel, len(pending)),
+                                    thread_name_prefix="ranged-download") as executor:
+                for future in [executor.submit(self._download_part_in_worker, part, hasher) for part in pending]:
+                    future.result()
+
+        os.replace(self.part_path, self.file_path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        result = {"bytes": self.size, "parts": len(self.parts), "resumed_bytes": resumed}
+        if hasher is not None:
+            hasher.feed()
+            result[self.algorithm] = hasher.hexdigest()
+        return result
@@ -11,11 +11,16 @@ import requests
 import http.cookiejar
 from loguru import logger
 from requests import Response, utils
-from config.settings import FILES_DIR
+from config.settings import FILES_DIR, RUN_SEED
 from core.data_utils.data_handle import data_handle
+from core.data_utils.run_seed import get_run_seed, is_retry, payload_cache
 from core.requests_utils.base_request import BaseRequest
 from utils.database_utils.mysql_handle import MysqlServer
 from core.assertion_utils.assert_control import AssertHandle
+from core.metrics_utils.tracing import tracer
+from core.metrics_utils.phase_timer import phase_timer
+from core.metrics_utils.metrics_exporter import record_request, record_response_size, count_assertion_failures
+from core.metrics_utils.latency_histogram import latency_recorder, response_timings
 from utils.files_utils.files_handle import get_files, load_yaml_file
 from core.report_utils.allure_handle import allure_step, allure_attach
 from core.data_utils.extract_data_handle import json_extractor, re_extract, response_extract
@@ -102,8 +107,8 @@ class RequestControl(BaseRequest):
         host = source.get("host", "")
         
         # 3. 拼接 Host 和 URL
-        # 如果url是以http开头的（完整URL），则直接使用，不拼接Host
-        if url.lower().startswith("http"):
+        # 如果url是以http/grpc开头的（完整URL），则直接使用，不拼接Host
+        if url.lower().startswith(("http", "grpc")):
             full_url = url
         else:
             # 智能处理 Host 和 Path 之间的斜杠
@@ -192,17 +197,18 @@ class RequestControl(BaseRequest):
         return headers
 
     @staticmethod
-    def files_handle(files: str, source: dict = None):
+    def files_handle(files, source: dict = None):
         """
         处理上传文件参数。
         
         Args:
-            files (str/dict): 文件路径或文件配置。
-                              格式示例：{"file": "demo_test_demo.py"} 或 "file_path"
+            files (str/list/dict): 文件路径或文件配置，相对路径基于 FILES_DIR。
+                              格式示例："demo_test_demo.py"、["a.png", "b.png"]、
+                              {"file": "demo_test_demo.py", "images": ["a.png", "b.png"]}
             source (dict): 数据源。
 
         Returns:
-            str: 文件的绝对路径。
+            str/list/dict: 与传入格式一致，文件路径转换为绝对路径。
         """
         if not files:
             return None
@@ -211,11 +217,11 @@ class RequestControl(BaseRequest):
         files = data_handle(obj=files, source=source)
         
         # 2. 路径拼接：将相对路径转换为基于 FILES_DIR 的绝对路径
-        # 注意：这里假设 files 是文件名字符串，如果是字典需要进一步处理，
-        # 但看代码逻辑似乎预期 files 是个路径字符串？
-        # 原代码：return os.path.join(FILES_DIR, files) 
-        # 如果 files 是字典 {"file": "name"}, os.path.join 会报错。
-        # 需根据实际用法确认，这里暂时保持原逻辑并添加注释提醒。
+        if isinstance(files, dict):
+            return {field: [os.path.join(FILES_DIR, path) for path in paths] if isinstance(paths, (list, tuple))
+                    else os.path.join(FILES_DIR, paths) for field, paths in files.items()}
+        if isinstance(files, (list, tuple)):
+            return [os.path.join(FILES_DIR, path) for path in files]
         return os.path.join(FILES_DIR, files)
 
     @staticmethod
@@ -289,7 +295,9 @@ class RequestControl(BaseRequest):
                 "validate": data_handle(obj=request_data.get("validate"), source=source_data),
                 "assert_sql": request_data.get("assert_sql"),
                 "extract": data_handle(obj=request_data.get("extract"), source=source_data),
-                "case_dependence": request_data.get("case_dependence")
+                "case_dependence": request_data.get("case_dependence"),
+                "proto": request_data.get("proto"),
+                "cacheable": request_data.get("cacheable")
             }
 
             # 3. 打印处理后的调试日志
@@ -339,6 +347,23 @@ class RequestControl(BaseRequest):
             logger.error(f"接口数据处理异常：{e}")
             raise RuntimeError(f"接口数据处理异常：\n{e}")
 
+    def render_request(self, request_data: dict, source_data: dict = None) -> dict:
+        """
+        处理请求数据：开启 RUN_SEED["replay"] 时，失败重跑、显式指定 -seed 重新运行时使用缓存中渲染好的请求数据，发送完全相同的请求
+        """
+        run_seed = get_run_seed()
+        cache_key = payload_cache.cache_key(run_seed, request_data, source_data) \
+            if RUN_SEED["replay"] and run_seed is not None and request_data.get("id") else None
+        if cache_key:
+            cached = payload_cache.get(cache_key, retry=is_retry())
+            if cached is not None:
+                logger.debug(f"使用缓存的请求数据（seed={run_seed}）：{request_data.get('id')}")
+                return cached
+        new_request_data = self.before_request(request_data=request_data, source_data=source_data)
+        if cache_key:
+            payload_cache.set(cache_key, new_request_data)
+        return new_request_data
+
     @classmethod
     def api_step_record(cls, **kwargs) -> None:
         """
@@ -361,6 +386,8 @@ class RequestControl(BaseRequest):
         response_result = kwargs.get("response_result")
         response_time_seconds = kwargs.get("response_time_seconds")
         response_time_millisecond = kwargs.get("response_time_millisecond")
+        response_timings = kwargs.get("response_timings")
+        response_size = kwargs.get("response_size")
 
         # 1. 构造日志字符串
         _res = "\n" + "=" * 80 \
@@ -377,6 +404,8 @@ class RequestControl(BaseRequest):
                  f"响应码: {status_code}\n" \
                  f"响应数据: {response_result}\n" \
                  f"响应耗时: {response_time_seconds} s || {response_time_millisecond} ms\n" \
+                 f"耗时明细(ms): {response_timings}\n" \
+                 f"响应大小(字节): {response_size}\n" \
                + "=" * 80
         logger.debug(_res)
 
@@ -395,6 +424,8 @@ class RequestControl(BaseRequest):
         allure_step(f"响应结果: {response_result}", response_result)
         allure_step(f"响应耗时: {response_time_seconds} s || {response_time_millisecond} ms",
                     f"{response_time_seconds} s || {response_time_millisecond} ms")
+        allure_step(f"耗时明细(ms): {response_timings}", response_timings)
+        allure_step(f"响应大小(字节): {response_size}", response_size)
 
     def after_request(self, response: Response, api_data, db_info=None):
         """
@@ -505,6 +536,7 @@ class RequestControl(BaseRequest):
         return all_results
 
     # -----接口请求流程：获取接口数据 -> 处理接口请求数据 -> 请求接口 -> 接口断言 -> 接口数据提取 --------------
+    @tracer.traced("api_request_flow", "request")
     def api_request_flow(self, request_data: dict = None, global_var: dict = None, api_file_path: str = None,
                          key: str = None, db_info: dict = None):
         """
@@ -546,53 +578,74 @@ class RequestControl(BaseRequest):
             logger.error("请求数据异常：必须提供 request_data 或 (api_file_path, key)")
             raise ValueError("请求数据异常")
 
+        # 每个阶段都会统计耗时，用于区分框架自身耗时与接口响应耗时
+        case_id = api_info.get("id")
+        tracer.current_span().set_attributes(case_id=case_id, title=api_info.get("title"))
+
         # 2. 请求前处理（变量替换、签名等）
-        new_api_data = self.before_request(request_data=api_info, source_data=global_var)
+        with phase_timer.phase(case_id, "before_request"):
+            new_api_data = self.render_request(request_data=api_info, source_data=global_var)
 
         # 3. 发送 HTTP 请求
         # self.send_request 继承自 BaseRequest
-        response = self.send_request(new_api_data)
+        with phase_timer.phase(case_id, "send_request"):
+            response = self.send_request(new_api_data)
 
         # 4. 请求后等待
-        logger.trace(f"开始等待")
         if new_api_data.get("wait_seconds"):
-            time.sleep(new_api_data["wait_seconds"])
-        logger.trace(f"结束等待")
+            logger.trace(f"开始等待")
+            with phase_timer.phase(case_id, "wait_seconds"):
+                time.sleep(new_api_data["wait_seconds"])
+            logger.trace(f"结束等待")
 
         # 5. 封装响应信息
-        new_api_data["status_code"] = response.status_code
-        new_api_data["response_time_seconds"] = round(response.elapsed.total_seconds(), 2)
-        new_api_data["response_time_millisecond"] = round(response.elapsed.total_seconds() * 1000, 2)
-
-        try:
-            # 智能解析响应内容
-            content_type = response.headers.get('content-type', '').lower()
-            if 'application/json' in content_type or response.text.strip().startswith(('{', '[')):
-                new_api_data["response_result"] = response.json()
-            else:
+        with phase_timer.phase(case_id, "parse_response"):
+            new_api_data["status_code"] = response.status_code
+            new_api_data["response_time_seconds"] = round(response.elapsed.total_seconds(), 2)
+            new_api_data["response_time_millisecond"] = round(response.elapsed.total_seconds() * 1000, 2)
+            new_api_data["response_timings"] = response_timings(response)
+            # 按接口ID记录请求耗时，用于统计耗时分布
+            latency_recorder.record(new_api_data.get("id"), new_api_data["response_timings"])
+            record_request(case_id, response.status_code, response.elapsed.total_seconds())
+            # 响应体网络传输的字节数及解压后的字节数
+            sizes = getattr(response, "sizes", None)
+            if sizes:
+                new_api_data["response_size"] = sizes
+                record_response_size(case_id, sizes["wire"], sizes["decoded"])
+
+            try:
+                # 智能解析响应内容
+                content_type = response.headers.get('content-type', '').lower()
+                if 'application/json' in content_type or response.text.strip().startswith(('{', '[')):
+                    new_api_data["response_result"] = response.json()
+                else:
+                    new_api_data["response_result"] = response.text
+            except json.JSONDecodeError as e:
+                logger.debug(f"JSON解析失败，使用文本格式: {e}")
                 new_api_data["response_result"] = response.text
-        except json.JSONDecodeError as e:
-            logger.debug(f"JSON解析失败，使用文本格式: {e}")
-            new_api_data["response_result"] = response.text
-        except Exception as e:
-            logger.error(f"处理响应数据时发生意外错误: {e}")
-            new_api_data["response_result"] = f"Error: {str(e)}"
+            except Exception as e:
+                logger.error(f"处理响应数据时发生意外错误: {e}")
+                new_api_data["response_result"] = f"Error: {str(e)}"
 
         # 6. 记录测试步骤
-        self.api_step_record(**new_api_data)
+        with phase_timer.phase(case_id, "step_record"):
+            self.api_step_record(**new_api_data)
         
         # 7. 执行响应断言 (validate)
         if new_api_data.get("validate"):
-             AssertHandle(assert_data=new_api_data["validate"], response=response).assert_handle()
+            with phase_timer.phase(case_id, "assert_response"), count_assertion_failures(case_id, "response"):
+                AssertHandle(assert_data=new_api_data["validate"], response=response).assert_handle()
         
         # 8. 执行数据库断言 (assert_sql)
         if new_api_data.get("assert_sql"):
             logger.debug("执行数据库断言...")
-            AssertHandle(assert_data=new_api_data["assert_sql"], db_info=db_info).assert_handle()
+            with phase_timer.phase(case_id, "assert_sql"), count_assertion_failures(case_id, "sql"):
+                AssertHandle(assert_data=new_api_data["assert_sql"], db_info=db_info).assert_handle()
 
         # 9. 执行参数提取 (extract)
         if new_api_data.get("extract"):
-            extract_results = self.after_request(response=response, api_data=new_api_data, db_info=db_info)
+            with phase_timer.phase(case_id, "after_request"):
+                extract_results = self.after_request(response=response, api_data=new_api_data, db_info=db_info)
             if extract_results:
                 save_api_data.update(extract_results)
 
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : response_cache.py
+# @Desc: 接口响应缓存模块：缓存幂等的 GET/HEAD 请求的响应，遵循 Cache-Control、ETag/Last-Modified，过期后发送条件请求重新验证
+
+import json
+import time
+import datetime
+import threading
+import requests
+from loguru import logger
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+from requests.structures import CaseInsensitiveDict
+from config.settings import RESPONSE_CACHE
+from core.metrics_utils.metrics_exporter import record_cache
+
+# 只缓存这些请求方法、状态码的响应
+CACHEABLE_METHODS = ("GET", "HEAD")
+CACHEABLE_STATUS = (200, 203)
+# 这些请求方法的请求之后，清除同一地址缓存的响应
+UNSAFE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# 不缓存的请求类型：上传文件、导出文件、gRPC
+SKIP_REQUEST_TYPES = ("file", "export", "grpc")
+# 用例中已设置这些请求头时，由用例自己处理缓存，不使用响应缓存
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+
+def _is_true(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "yes", "1")
+    return bool(value)
+
+
+def parse_cache_control(value: Optional[str]) -> dict:
+    """
+    解析 Cache-Control：{"max-age": "60", "no-cache": None, ...}
+    """
+    directives = {}
+    for item in (value or "").split(","):
+        name, _, arg = item.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers, default_ttl: float = 0.0) -> float:
+    """
+    响应的有效期（秒）：Cache-Control 的 no-cache 为 0，其次是 max-age、Expires，都没有时使用 default_ttl；
+    减去响应头 Age 中已经在代理服务器中缓存的时间
+    """
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return 0.0
+    if (directives.get("max-age") or "").isdigit():
+        lifetime = float(directives["max-age"])
+    elif headers.get("Expires") is not None:
+        # Expires 格式错误（例如 0）视为已过期
+        expires = _http_date(headers["Expires"])
+        lifetime = max(expires - (_http_date(headers.get("Date")) or time.time()), 0.0) if expires else 0.0
+    else:
+        lifetime = float(default_ttl)
+    age = headers.get("Age", "")
+    return max(lifetime - (float(age) if age.isdigit() else 0.0), 0.0)
+
+
+class CacheEntry:
+    """
+    缓存的响应：响应体、响应头等，以及有效期、验证器（ETag/Last-Modified）、Vary 请求头的值
+    """
+
+    def __init__(self, response: requests.Response, vary: dict, target: str = "", default_ttl: float = 0.0):
+        """
+        :param target: 请求地址（不含查询参数），用于按地址清除缓存
+        :param default_ttl: 响应头中没有有效期时的有效期（秒）
+        """
+        self.status_code = response.status_code
+        self.reason = response.reason
+        self.url = response.url
+        self.headers = CaseInsensitiveDict(response.headers)
+        self.encoding = response.encoding
+        self.content = response.content or b""
+        self.cookies = response.cookies.copy()
+        self.sizes = getattr(response, "sizes", None)
+        self.vary = vary
+        self.target = target
+        self.default_ttl = default_ttl
+        self.refresh(response.headers)
+
+    def refresh(self, headers):
+        """
+        更新有效期，304 响应中的响应头覆盖缓存的响应头
+        """
+        for name in ("Cache-Control", "Expires", "Date", "ETag", "Last-Modified", "Age"):
+            if headers.get(name) is not None:
+                self.headers[name] = headers[name]
+        self.expires = time.monotonic() + freshness_lifetime(self.headers, self.default_ttl)
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+    @property
+    def validators(self) -> dict:
+        headers = {}
+        if self.headers.get("ETag"):
+            headers["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def to_response(self, state: str, elapsed: datetime.timedelta = None, timings: dict = None) -> requests.Response:
+        """
+        每次命中都构造新的响应对象，用例修改响应对象不影响缓存
+        """
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.reason = self.reason
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = self.encoding
+        response._content = self.content
+        response.cookies = self.cookies.copy()
+        response.elapsed = elapsed or datetime.timedelta(0)
+        response.timings = timings or {"total": 0.0}
+        if self.sizes:
+            response.sizes = self.sizes
+        response.cache = state
+        return response
+
+
+class ResponseCache:
+    """
+    接口响应缓存（LRU）：key 为渲染后的请求方法、地址及参数、cookies，以及 settings.RESPONSE_CACHE["vary_headers"] 中的请求头；
+    响应头 Vary 中的请求头与缓存时不同时视为未命中。缓存的响应体总大小超过 max_bytes 时淘汰最久未使用的响应；
+    同一地址的 POST/PUT/PATCH/DELETE 请求之后清除该地址缓存的响应
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE["max_bytes"]):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        # 请求地址（不含查询参数）对应的缓存 key
+        self._targets: Dict[str, set] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cacheable(req_data: dict) -> bool:
+        """
+        policy 为 marked 时只缓存 cacheable 为 true 的用例；为 all 时缓存所有 GET/HEAD 请求，cacheable 为 false 的用例除外
+        """
+        policy = RESPONSE_CACHE["policy"]
+        if policy == "off" or (req_data.get("method") or "").upper() not in CACHEABLE_METHODS \
+                or (req_data.get("request_type") or "").lower() in SKIP_REQUEST_TYPES:
+            return False
+        marked = req_data.get("cacheable")
+        if policy == "all":
+            return marked is None or _is_true(marked)
+        return _is_true(marked)
+
+    @staticmethod
+    def cache_key(req_data: dict) -> Optional[str]:
+        headers = {str(k).lower(): v for k, v in (req_data.get("headers") or {}).items()}
+        try:
+            return json.dumps([(req_data.get("method") or "").upper(), req_data.get("url"), req_data.get("payload"),
+                               req_data.get("cookies"),
+                               [headers.get(name.lower()) for name in RESPONSE_CACHE["vary_headers"]]],
+                              ensure_ascii=False, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def target(url: Optional[str]) -> str:
+        """
+        请求地址去掉查询参数、锚点
+        """
+        return urlsplit(url or "")._replace(query="", fragment="").geturl()
+
+    @staticmethod
+    def _vary(response: requests.Response, headers: dict) -> Optional[dict]:
+        """
+        响应头 Vary 中的请求头及本次请求的值；Vary 为 * 时不缓存，返回 None
+        """
+        names = [name.strip().lower() for name in response.headers.get("Vary", "").split(",") if name.strip()]
+        if "*" in names:
+            return None
+        return {name: headers.get(name) for name in names}
+
+    def _get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _pop(self, key: str):
+        """
+        删除缓存，调用方需要持有锁
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.content)
+            keys = self._targets.get(entry.target)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._targets[entry.target]
+
+    def _set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = entry
+            self._targets.setdefault(entry.target, set()).add(key)
+            self._bytes += len(entry.content)
+            while self._bytes > self.max_bytes and self._entries:
+                self._pop(next(iter(self._entries)))
+
+    def _discard(self, key: str):
+        with self._lock:
+            self._pop(key)
+
+    def _store(self, key: str, response: requests.Response, headers: dict, target: str, default_ttl: float):
+        directives = parse_cache_control(response.headers.get("Cache-Control"))
+        vary = self._vary(response, headers)
+        if response.status_code not in CACHEABLE_STATUS or "no-store" in directives or vary is None \
+                or len(response.content or b"") > RESPONSE_CACHE["max_entry_bytes"]:
+            self._discard(key)
+            return
+        entry = CacheEntry(response, vary, target=target, default_ttl=default_ttl)
+        if not entry.fresh and not entry.validators:
+            # 已过期且不能发送条件请求验证，缓存没有意义
+            self._discard(key)
+            return
+        self._set(key, entry)
+
+    def invalidate(self, req_data: dict) -> int:
+        """
+        POST/PUT/PATCH/DELETE 请求之后清除同一地址（不含查询参数）缓存的响应，服务端的数据可能已经被修改
+        :return: 清除的响应个数
+        """
+        if (req_data.get("method") or "").upper() not in UNSAFE_METHODS:
+            return 0
+        target = self.target(req_data.get("url"))
+        with self._lock:
+            keys = list(self._targets.get(target, ()))
+            for key in keys:
+                self._pop(key)
+        if keys:
+            logger.debug(f"{req_data.get('method')} {req_data.get('url')} 请求后清除该地址缓存的响应：{len(keys)} 个")
+        return len(keys)
+
+    def fetch(self, req_data: dict, send: Callable[[dict], requests.Response]) -> requests.Response:
+        """
+        命中未过期的缓存时直接返回；缓存过期且有 ETag/Last-Modified 时发送条件请求，304 时返回缓存的响应；否则发送请求并缓存响应。
+        响应头中没有有效期时，只有用例中显式设置了 cacheable 的请求使用 settings.RESPONSE_CACHE["default_ttl"]，其他请求每次都重新验证
+        :param send: 发送请求的函数，参数为请求数据
+        """
+        headers = {str(k).lower(): v for k, v in (req_data.get("headers") or {}).items()}
+        request_directives = parse_cache_control(headers.get("cache-control"))
+        key = self.cache_key(req_data)
+        if key is None or "no-store" in request_directives or any(name in headers for name in CONDITIONAL_HEADERS):
+            return send(req_data)
+
+        entry = self._get(key)
+        if entry is not None and any(headers.get(name) != value for name, value in entry.vary.items()):
+            entry = None
+        if entry is not None and entry.fresh and "no-cache" not in request_directives:
+            record_cache("response", True)
+            logger.debug(f"使用缓存的响应：{req_data.get('method')} {req_data.get('url')}")
+            return entry.to_response("hit")
+
+        validators = entry.validators if entry is not None else {}
+        if validators:
+            req_data = dict(req_data, headers={**(req_data.get("headers") or {}), **validators})
+        response = send(req_data)
+        if entry is not None and validators and response.status_code == 304:
+            entry.refresh(response.headers)
+            record_cache("response", True)
+            logger.debug(f"缓存的响应验证有效（304）：{req_data.get('method')} {req_data.get('url')}")
+            return entry.to_response("revalidated", elapsed=response.elapsed, timings=getattr(response, "timings", None))
+        record_cache("response", False)
+        default_ttl = RESPONSE_CACHE["default_ttl"] if _is_true(req_data.get("cacheable")) else 0.0
+        self._store(key, response, headers, self.target(req_data.get("url")), default_ttl)
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._targets.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# 当前进程的接口响应缓存，每次运行开始时清空
+response_cache = ResponseCache()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : timed_connection.py
+# @Desc: 带耗时统计的连接池，记录建立连接（DNS+TCP）和 TLS 握手的耗时，以及分块传输的响应体字节数
+
+import time
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# 当前线程最近一次请求的连接耗时，单位：秒；复用已有连接（keep-alive）时为空
+_timings = threading.local()
+
+
+def reset_connection_timings():
+    """
+    发送请求前清空当前线程的连接耗时
+    """
+    _timings.values = {}
+
+
+def get_connection_timings() -> dict:
+    """
+    获取当前线程最近一次请求的连接耗时：connect（DNS解析+TCP连接）、tls（TLS握手）
+    """
+    return dict(getattr(_timings, "values", None) or {})
+
+
+def _record(name: str, seconds: float):
+    values = getattr(_timings, "values", None)
+    if values is None:
+        values = _timings.values = {}
+    values[name] = values.get(name, 0.0) + seconds
+
+
+class CountedHTTPResponse(HTTPResponse):
+    """
+    分块传输（Transfer-Encoding: chunked）时，urllib3 不统计读取的字节数，tell() 始终为 0；
+    这里累加每个分块的字节数，tell() 返回网络传输的（压缩后的）响应体字节数
+    """
+
+    def _handle_chunk(self, amt):
+        chunk = super()._handle_chunk(amt)
+        self._fp_bytes_read += len(chunk)
+        return chunk
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """
+    记录 DNS 解析 + TCP 连接耗时
+    """
+
+    def getresponse(self):
+        response = super().getresponse()
+        response.__class__ = CountedHTTPResponse
+        return response
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            _record("connect", time.perf_counter() - start)
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """
+    记录 DNS 解析 + TCP 连接耗时，以及 TLS 握手耗时
+    """
+
+    def getresponse(self):
+        response = super().getresponse()
+        response.__class__ = CountedHTTPResponse
+        return response
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            _record("connect", time.perf_counter() - start)
+
+    def connect(self):
+        before = get_connection_timings().get("connect", 0.0)
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            connect = get_connection_timings().get("connect", 0.0) - before
+            _record("tls", max(time.perf_counter() - start - connect, 0.0))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    使用带耗时统计的连接池，走代理时使用 urllib3 默认连接池，不统计连接耗时
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
@@ -7,118 +7,235 @@ import sys
 import time
 import click
 import shutil
-import pytest
-import subprocess
 from pathlib import Path
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 from datetime import datetime
-from utils.tools.schedule_task import start_schedule
 from utils.logger_utils.loguru_log import capture_logs
 from utils.files_utils.files_handle import load_yaml_file
-from core.report_utils.send_result_handle import send_result
-from core.report_utils.platform_handle import PlatformHandle
-from core.report_utils.allure_handle import generate_allure_report
-from core.case_generate_utils.case_fun_generate import generate_cases
-from config.settings import LOG_LEVEL, GLOBAL_VARS, REPORT, RERUN, RERUN_DELAY, MAX_FAIL, LOG_LEVEL_STD
+from config.settings import LOG_LEVEL, GLOBAL_VARS, REPORT, RERUN, RERUN_DELAY, MAX_FAIL, LOG_LEVEL_STD, LOAD_TEST, \
+    RUN_SEED, CASSETTE
 from config.settings import BASE_DIR, REPORT_DIR, LOG_DIR, ENV_DIR, ALLURE_RESULTS_DIR, ALLURE_HTML_DIR, AUTO_CASE_DIR, \
     ALLURE_CONFIG_DIR
 
+def load_env(env):
+    """
+    根据指定的环境参数，将运行环境所需相关配置数据保存到GLOBAL_VARS
+    """
+    env_path = os.path.join(ENV_DIR, f"{env}.yml")
+    if not os.path.exists(env_path):
+         env_path = os.path.join(ENV_DIR, f"{env}.yaml")
+
+    if not os.path.exists(env_path):
+        raise FileNotFoundError(f"Environment configuration file not found for: {env}")
+
+    __env = load_yaml_file(env_path)
+    GLOBAL_VARS.update(__env)
+
+
+def run_load_test(env, case_ids, concurrency, rps, duration, host=None):
+    """
+    压测模式：复用接口池中的用例，按指定并发数或RPS持续发送请求，输出每个接口的吞吐量、错误率、响应耗时百分位
+    :param host: 覆盖环境配置中的接口地址，例如本地模拟接口服务的地址
+    """
+    from core.load_utils.load_runner import LoadRunner
+
+    capture_logs(level=LOAD_TEST["log_level"], level_std=LOAD_TEST["log_level"],
+                 filename=os.path.join(LOG_DIR, "load_test.log"))
+    load_env(env)
+    if host:
+        GLOBAL_VARS["host"] = host
+    LoadRunner(case_ids=[case_id.strip() for case_id in case_ids.split(",") if case_id.strip()],
+               source=GLOBAL_VARS,
+               concurrency=concurrency or LOAD_TEST["concurrency"],
+               rps=rps,
+               duration=duration or LOAD_TEST["duration"],
+               db_info=GLOBAL_VARS.get("db_info")).run()
+
+
+def run_tests(env, m=None, report="yes", regenerate=True, seed=None, host=None, cassette=None):
+    """
+    执行一次完整的测试：加载环境配置 -> 生成用例 -> pytest执行用例 -> 发送测试结果，同时生成报告
+    :param env: 运行环境
+    :param m: 需要运行的用例标记
+    :param report: 是否生成allure html report
+    :param regenerate: 是否重新生成测试用例，常驻进程模式下用例数据未变化时不需要重新生成
+    :param seed: 运行随机种子，不传则使用 settings.RUN_SEED 或随机生成
+    :param host: 覆盖环境配置中的接口地址，例如本地模拟接口服务的地址
+    :param cassette: 请求录制回放模式：record、replay、auto，不传则使用 settings.CASSETTE["mode"]
+    :return: (pytest退出码, allure html报告路径，未生成报告时为None)
+    """
+    # pytest、用例生成、报告、通知等模块导入耗时较长，只在真正执行测试时导入
+    import pytest
+    from core.report_utils.send_result_handle import send_result
+    from core.report_utils.allure_handle import generate_allure_report, AllureResultsWatcher
+    from core.report_utils.result_collector import ResultCollector
+    from core.case_generate_utils.case_fun_generate import generate_cases
+    from core.data_utils.run_seed import new_seed
+
+    logger.info(f"""\n\n ============接口自动化测试开始{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}=============""")
+    # ------------------------ 处理一下获取到的参数----------------------------
+    # # 根据指定的环境参数，将运行环境所需相关配置数据保存到GLOBAL_VARS
+    load_env(env)
+    # ------------------------ 自动生成测试用例 ------------------------
+    if regenerate:
+        # 删除原有的测试用例，以便生成新的测试用例
+        if os.path.exists(AUTO_CASE_DIR):
+            shutil.rmtree(AUTO_CASE_DIR)
+
+        # 根据data里面的yaml/excel文件，自动生成测试用例
+        generate_cases()
+
+    # ------------------------ 设置pytest相关参数 ------------------------
+    # 运行种子记录在报告中，使用相同的种子运行可以复现本次运行生成的数据
+    if seed is None and (cassette or CASSETTE["mode"]) in ("replay", "auto"):
+        # 回放录制的响应时使用录制时的运行种子，生成与录制时相同的请求数据
+        from core.requests_utils.cassette import recorded_seed, cassette_path
+        seed = recorded_seed(cassette_path(env))
+    # 显式指定种子重新运行时，使用之前相同种子的运行缓存的请求数据（settings.RUN_SEED["replay"]）
+    seed_rerun = seed is not None
+    if seed is None:
+        seed = RUN_SEED["seed"] if RUN_SEED["seed"] is not None else new_seed()
+    arg_list = [f"--maxfail={MAX_FAIL}", f"--reruns={RERUN}",
+                f"--reruns-delay={RERUN_DELAY}", f'--alluredir={ALLURE_RESULTS_DIR}',
+                '--clean-alluredir', f'--env={env}', f'--seed={seed}']
+    if seed_rerun:
+        arg_list.append("--seed-rerun")
+    if m:
+        arg_list.append(f"-m {m}")
+    if host:
+        arg_list.append(f"--host={host}")
+    if cassette:
+        arg_list.append(f"--cassette={cassette}")
+
+    # ------------------------ pytest执行测试用例 ------------------------
+    # 生成报告时，运行过程中已生成的附件不需要再压缩
+    watcher = AllureResultsWatcher(ALLURE_RESULTS_DIR).start() if report == "yes" else None
+    # 运行过程中直接汇总测试结果，发送通知不需要等待报告生成
+    collector = ResultCollector()
+    try:
+        exit_code = pytest.main(args=arg_list, plugins=[collector])
+    finally:
+        if watcher is not None:
+            watcher.stop()
+    results = collector.summary()
+    # ------------------------ 生成测试报告 ------------------------
+    if report != "yes":
+        # 与之前一致：不生成报告时不发送通知（-mock、-cassette replay 等离线运行的结果不应推送）
+        return exit_code, None
+    # 仅生成最新的报告，不保留历史记录
+    _ALLURE_HTML_DIR = ALLURE_HTML_DIR
+
+    # 如果目录存在，先删除，确保只保留最新的
+    if os.path.exists(_ALLURE_HTML_DIR):
+        shutil.rmtree(_ALLURE_HTML_DIR)
+
+    # 在后台生成报告，同时在后台并发发送测试结果：不需要附件的通知（钉钉）立即发送，邮件、企业微信等待报告压缩包生成后发送，
+    # 运行结束不等待通知发送完成
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="allure-report")
+    report_future = executor.submit(generate_allure_report, allure_results=ALLURE_RESULTS_DIR,
+                                    allure_report=_ALLURE_HTML_DIR,
+                                    windows_title=REPORT["项目名称"],
+                                    report_name=REPORT["报告标题"],
+                                    env_info=collector.environment,
+                                    allure_config_path=ALLURE_CONFIG_DIR,
+                                    attachment_path=os.path.join(REPORT_DIR, f'allure_report.zip'))
+    executor.shutdown(wait=False)
+    send_result(report_info=REPORT, results=results, attachment_path=lambda: report_future.result()[1])
+    report_path, attachment_path = report_future.result()
+    # -----------------拼接测试报告地址，用于流水线运行，不需要的可忽略--------------------
+    sub_path = Path(_ALLURE_HTML_DIR).relative_to(Path(os.path.dirname(BASE_DIR)))
+    new_sub_path = os.path.normpath(sub_path).replace('\\', '/')
+    # 从系统环境变量NGINX获取其值作为nginx地址，拼接allure html报告地址并输出
+    if os.environ.get("NGINX"):
+        logger.debug(f"系统环境变量NGINX={os.environ.get('NGINX'):}")
+        url = os.environ.get("NGINX")[0:len(os.environ.get("NGINX")) - 1] if os.environ.get("NGINX").endswith(
+            "/") else os.environ.get("NGINX")
+        print(f'测试报告地址：{url}/{new_sub_path}')
+    return exit_code, report_path
+
+
 # 主函数
 @click.command()
 @click.option("-report", default="yes", help="是否生成allure html report，支持如下类型：yes, no")
 @click.option("-env", default="test", help="输入运行环境：test 或 live")
 @click.option("-m", default=None, help="选择需要运行的用例：python.ini配置的名称")
 @click.option("-cron", default=False, is_flag=True, help="是否开启定时任务")
-def run(env, m, report, cron):
+@click.option("-load", default=None, help="压测模式：需要压测的用例ID，多个用逗号分隔，例如：login_01,get_user_01")
+@click.option("-concurrency", default=None, type=int, help="压测模式：并发数")
+@click.option("-rps", default=None, type=float, help="压测模式：目标每秒请求数，不传则不限制")
+@click.option("-duration", default=None, type=float, help="压测模式：压测时长，单位：秒")
+@click.option("-daemon", default=False, is_flag=True, help="常驻进程模式：启动常驻进程，接收 -submit 提交的运行请求")
+@click.option("-submit", default=False, is_flag=True, help="向常驻进程提交运行请求，使用 -env、-m、-report 参数")
+@click.option("-seed", default=None, type=int, help="运行随机种子：使用某次运行的种子，可以复现该次运行生成的数据")
+@click.option("-profile-startup", "profile_startup", default=False, is_flag=True,
+              help="统计启动阶段各模块的导入耗时，结果保存到 outputs/report/startup_profile.json")
+@click.option("-mock", default=False, is_flag=True,
+              help="离线运行：启动根据 interfaces 用例生成的本地模拟接口服务，接口地址指向该服务")
+@click.option("-cassette", default=None, type=click.Choice(["off", "record", "replay", "auto"]),
+              help="请求录制回放：record 录制响应，replay 回放录制的响应、不发送网络请求，auto 回放并录制缺少的响应")
+def run(env, m, report, cron, load, concurrency, rps, duration, daemon, submit, seed, profile_startup, mock,
+        cassette):
+    host = None
+    # 定时任务（非常驻进程模式）每次运行启动新进程，由新进程各自启动模拟接口服务
+    if mock and not submit and (daemon or not cron):
+        from utils.tools.mock_server import MockServer
+        host = MockServer().start().url
+
+    if load:
+        run_load_test(env=env, case_ids=load, concurrency=concurrency, rps=rps, duration=duration, host=host)
+        return
+
+    if profile_startup:
+        from utils.tools.startup_profile import profile_startup as _profile_startup
+        _profile_startup()
+        return
+
+    if submit:
+        from core.daemon_utils.warm_daemon import send_run_request
+        result = send_run_request(env=env, m=m, report=report, seed=seed)
+        print(result.get("summary") or result)
+        sys.exit(result.get("exit_code", 1))
+
+    warm_daemon = None
+    if daemon:
+        capture_logs(level=LOG_LEVEL, level_std=LOG_LEVEL_STD, filename=os.path.join(LOG_DIR, "api.log"))
+        from core.daemon_utils.warm_daemon import WarmDaemon
+        warm_daemon = WarmDaemon(runner=partial(run_tests, host=host, cassette=cassette)).start()
+
     if cron:
         # 如果开启定时任务，构造参数列表并传递给 start_schedule
         command_args = ["-env", env, "-report", report]
         if m:
             command_args.extend(["-m", m])
-        start_schedule(command_args)
+        if mock:
+            command_args.append("-mock")
+        if cassette:
+            command_args.extend(["-cassette", cassette])
+        # 常驻进程模式下，定时任务直接在常驻进程中执行，不再每次启动新进程
+        task = (lambda: warm_daemon.submit(env=env, m=m, report=report).result()["exit_code"]) if warm_daemon else None
+        from utils.tools.schedule_task import start_schedule
+        start_schedule(command_args, task=task)
         return
 
+    if warm_daemon:
+        # 保持运行，等待 -submit 提交的运行请求
+        while True:
+            time.sleep(3600)
+
     try:
         # ------------------------ 捕获日志----------------------------
         capture_logs(level=LOG_LEVEL, level_std=LOG_LEVEL_STD, filename=os.path.join(LOG_DIR, "api.log"))
-        logger.info(f"""\n\n ============接口自动化测试开始{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}=============""")
-        # ------------------------ 处理一下获取到的参数----------------------------
-        # # 根据指定的环境参数，将运行环境所需相关配置数据保存到GLOBAL_VARS
-        env_path = os.path.join(ENV_DIR, f"{env}.yml")
-        if not os.path.exists(env_path):
-             env_path = os.path.join(ENV_DIR, f"{env}.yaml")
-             
-        if not os.path.exists(env_path):
-            raise FileNotFoundError(f"Environment configuration file not found for: {env}")
-            
-        __env = load_yaml_file(env_path)
-        GLOBAL_VARS.update(__env)
-        # ------------------------ 自动生成测试用例 ------------------------
-        # 删除原有的测试用例，以便生成新的测试用例
-        if os.path.exists(AUTO_CASE_DIR):
-            shutil.rmtree(AUTO_CASE_DIR)
-
-        # 根据data里面的yaml/excel文件，自动生成测试用例
-        generate_cases()
-
-        # ------------------------ 设置pytest相关参数 ------------------------
-        arg_list = [f"--maxfail={MAX_FAIL}", f"--reruns={RERUN}",
-                    f"--reruns-delay={RERUN_DELAY}", f'--alluredir={ALLURE_RESULTS_DIR}',
-                    '--clean-alluredir', f'--env={env}']
-        if m:
-            arg_list.append(f"-m {m}")
-
-        # ------------------------ pytest执行测试用例 ------------------------
-        pytest.main(args=arg_list)
-        # ------------------------ 生成测试报告 ------------------------
-        if report == "yes":
-            # 仅生成最新的报告，不保留历史记录
-            _ALLURE_HTML_DIR = ALLURE_HTML_DIR
-            
-            # 如果目录存在，先删除，确保只保留最新的
-            if os.path.exists(_ALLURE_HTML_DIR):
-                shutil.rmtree(_ALLURE_HTML_DIR)
-
-            # print("ALLURE HTML DIR: {}".format(_ALLURE_HTML_DIR))
-            report_path, attachment_path = generate_allure_report(allure_results=ALLURE_RESULTS_DIR,
-                                                                  allure_report=_ALLURE_HTML_DIR,
-                                                                  windows_title=REPORT["项目名称"],
-                                                                  report_name=REPORT["报告标题"],
-                                                                  env_info={
-                                                                      "运行环境": GLOBAL_VARS.get("host", None)},
-                                                                  allure_config_path=ALLURE_CONFIG_DIR,
-                                                                  attachment_path=os.path.join(REPORT_DIR,
-                                                                                               f'allure_report.zip'))
-            # -----------------拼接测试报告地址，用于流水线运行，不需要的可忽略--------------------
-            sub_path = Path(_ALLURE_HTML_DIR).relative_to(Path(os.path.dirname(BASE_DIR)))
-            new_sub_path = os.path.normpath(sub_path).replace('\\', '/')
-            # 从系统环境变量NGINX获取其值作为nginx地址，拼接allure html报告地址并输出
-            if os.environ.get("NGINX"):
-                logger.debug(f"系统环境变量NGINX={os.environ.get('NGINX'):}")
-                url = os.environ.get("NGINX")[0:len(os.environ.get("NGINX")) - 1] if os.environ.get("NGINX").endswith(
-                    "/") else os.environ.get("NGINX")
-                print(f'测试报告地址：{url}/{new_sub_path}')
-            # ------------------------ 发送测试结果 ------------------------
-
-            send_result(report_info=REPORT, report_path=report_path, attachment_path=attachment_path)
-
-            # ------------------------ 自动打开并关闭报告 ------------------------
+        exit_code, report_path = run_tests(env=env, m=m, report=report, seed=seed, host=host, cassette=cassette)
+        if report_path:
+            # ------------------------ 在后台打开报告，不阻塞程序退出 ------------------------
             logger.info("正在打开Allure报告...")
             try:
-                allure_cmd = PlatformHandle().allure
-                # allure open command
-                cmd = [allure_cmd, "open", report_path]
-                # Start the process without waiting
-                proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                # Wait for 20 seconds
-                time.sleep(20)
-                # Terminate the process
-                proc.terminate()
-                # Wait for process to terminate to avoid zombie process
-                proc.wait()
-                logger.info("Allure报告已关闭")
+                from core.report_utils.allure_handle import open_allure_report
+                open_allure_report(report_path)
             except Exception as e:
-                logger.error(f"打开或关闭Allure报告时发生错误: {e}")
+                logger.error(f"打开Allure报告时发生错误: {e}")
     except Exception as e:
         raise e
 
@@ -136,6 +253,17 @@ if __name__ == "__main__":
   > python3 run.py -env live 在live环境运行测试用例
   > python3 run.py -env=test 在test环境运行测试用例
   > python3 run.py -report=no 在test环境下允许测试用例，不生成allure测试报告
+  > python3 run.py -load login_01,get_user_01 -concurrency 20 -duration 60 压测模式：20并发压测指定用例60秒
+  > python3 run.py -load login_01 -rps 100 -duration 30 压测模式：按每秒100个请求压测指定用例30秒
+  > python3 run.py -daemon 启动常驻进程，之后可通过 -submit 提交运行请求
+  > python3 run.py -submit -env test -m smoke -report no 向常驻进程提交运行请求，不需要重新导入依赖库、生成用例
+  > python3 run.py -daemon -cron 定时任务在常驻进程中执行
+  > python3 run.py -seed 1234 使用指定的随机种子运行，复现该种子对应运行生成的数据
+  > python3 run.py -profile-startup 统计启动阶段各模块的导入耗时
+  > python3 run.py -mock -report no 离线运行：接口请求发送到根据 interfaces 用例生成的本地模拟接口服务
+  > python3 run.py -mock -load login_01 -concurrency 20 -duration 30 压测本地模拟接口服务
+  > python3 run.py -cassette record 运行用例并录制每个请求的响应
+  > python3 run.py -cassette replay -report no 回放录制的响应，不发送网络请求，用于反复调试断言、提取
 
 pytest相关参数：以下也可通过pytest.ini配置
      --reruns: 失败重跑次数
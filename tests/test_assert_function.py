@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_assert_function.py
+# @Desc: 集合断言单元测试
+
+import pytest
+from core.assertion_utils import assert_function as af
+
+COLLECTION_ASSERTS = [
+    (af.all_equals, 1),
+    (af.any_equals, 1),
+    (af.none_equals, 1),
+    (af.sorted_by, "asc"),
+    (af.unique_by, True),
+    (af.count_where, {"value": 1, "count": 0}),
+    (af.range_between, [0, 1]),
+]
+
+
+@pytest.mark.parametrize("func, expect_value", COLLECTION_ASSERTS)
+@pytest.mark.parametrize("actual_value", [None, []])
+def test_empty_column_fails(func, expect_value, actual_value):
+    with pytest.raises(AssertionError, match="actual_value 为空"):
+        func(expect_value, actual_value)
+
+
+def test_all_any_none_equals():
+    af.all_equals(1, [1, 1, 1])
+    af.any_equals(2, [1, 2, 3])
+    af.none_equals(4, [1, 2, 3])
+    af.all_equals("a", "a")
+    with pytest.raises(AssertionError):
+        af.all_equals(1, [1, 2])
+    with pytest.raises(AssertionError):
+        af.none_equals("b", ["a", "b"])
+
+
+@pytest.mark.parametrize("order, column", [("asc", [1, 2, 2, 3]), ("desc", [3, 2, 2, 1]), ("ASC", ["a", "b"])])
+def test_sorted_by(order, column):
+    af.sorted_by(order, column)
+
+
+def test_sorted_by_rejects_unsorted_and_invalid_order():
+    with pytest.raises(AssertionError):
+        af.sorted_by("asc", [1, 3, 2])
+    with pytest.raises(AssertionError, match="asc/desc"):
+        af.sorted_by("true", [1, 2])
+
+
+def test_sorted_by_unsigned_array_does_not_wrap_around():
+    np = pytest.importorskip("numpy")
+    array = np.array([3, 1], dtype=np.uint8)
+    # 相减会回绕成 254，比较相邻元素则能正确判断为无序
+    assert not bool((array[1:] >= array[:-1]).all())
+    with pytest.raises(AssertionError):
+        af.sorted_by("asc", [3, 1])
+
+
+def test_unique_by_and_count_where():
+    af.unique_by(True, [1, 2, 3])
+    af.unique_by(False, [{"a": 1}, {"a": 1}])
+    af.count_where({"value": 1, "count": 2}, [1, 0, 1])
+    with pytest.raises(AssertionError, match="满足条件的元素个数：1"):
+        af.count_where({"value": "x", "count": 2}, ["x", "y"])
+
+
+def test_range_between():
+    af.range_between([0, 10], [0, 5.5, 10])
+    with pytest.raises(AssertionError):
+        af.range_between([0, 10], [0, 11])
+    with pytest.raises(AssertionError):
+        af.range_between([0, 10], ["5"])
+
+
+def test_numeric_path_matches_python_path(monkeypatch):
+    column = [5, 3, 3, 1]
+    for numpy_module in (af._get_numpy(), None):
+        monkeypatch.setattr(af, "_get_numpy", lambda: numpy_module)
+        af.sorted_by("desc", column)
+        af.count_where({"value": 3, "count": 2}, column)
+        af.unique_by(False, column)
+        af.range_between([1, 5], column)
+
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_cassette.py
+# @Desc: 请求录制回放单元测试：请求指纹、录制回放、脱敏
+
+import datetime
+import pytest
+import requests
+from config.settings import CASSETTE
+from core.requests_utils.cassette import (Cassette, CassetteMiss, REDACTED, decode_record, encode_record,
+                                          fingerprint, normalize_url)
+
+
+def _response(body: bytes = b'{"ret": 0}', status_code: int = 200) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.url = "http://h/api"
+    response.headers.update({"Content-Type": "application/json", "Authorization": "secret"})
+    response.elapsed = datetime.timedelta(milliseconds=5)
+    return response
+
+
+def test_normalize_url():
+    assert normalize_url("HTTP://Host:80/a?b=2&a=1#x") == "http://host/a?a=1&b=2"
+    assert normalize_url("http://h/a?t=1&a=1", ignore_fields=frozenset({"t"})) == "http://h/a?a=1"
+    assert normalize_url("http://h/a", params={"b": [1, 2]}, match_host=False) == "/a?b=1&b=2"
+
+
+def test_fingerprint_ignores_query_order_and_volatile_fields(monkeypatch):
+    monkeypatch.setitem(CASSETTE, "ignore_fields", ["timestamp"])
+    base = {"method": "post", "url": "http://h/a?x=1&y=2", "request_type": "json",
+            "payload": {"name": "n", "timestamp": 1}}
+    same = dict(base, method="POST", url="http://h/a?y=2&x=1", payload={"timestamp": 2, "name": "n"})
+    assert fingerprint(base) == fingerprint(same)
+    assert fingerprint(base) != fingerprint(dict(base, payload={"name": "m"}))
+    assert fingerprint(base) != fingerprint(dict(base, method="PUT"))
+
+
+def test_fingerprint_headers_and_host(monkeypatch):
+    req = {"method": "GET", "url": "http://a/x", "headers": {"Content-Type": "a", "Authorization": "t1"}}
+    # 默认不匹配请求头，token 变化时仍然命中
+    assert fingerprint(req) == fingerprint(dict(req, headers={"Authorization": "t2", "Content-Type": "a"}))
+    monkeypatch.setitem(CASSETTE, "match_headers", ["Content-Type"])
+    assert fingerprint(req) != fingerprint(dict(req, headers={"Content-Type": "b"}))
+    monkeypatch.setitem(CASSETTE, "match_host", False)
+    assert fingerprint(req) == fingerprint(dict(req, url="https://b/x"))
+
+
+def test_record_redacts_credentials():
+    req = {"method": "POST", "url": "http://h/login", "headers": {"authorization": "Bearer t"},
+           "cookies": {"sid": "s"}, "payload": {"user": {"Password": "p", "name": "n"}}}
+    meta, body = decode_record(*encode_record(req, _response()))
+    assert meta["request"]["headers"] == {"authorization": REDACTED}
+    assert meta["request"]["cookies"] == {"sid": REDACTED}
+    assert meta["request"]["payload"] == {"user": {"Password": REDACTED, "name": "n"}}
+    assert dict(meta["headers"])["Authorization"] == REDACTED
+    assert body == b'{"ret": 0}'
+    assert req["headers"]["authorization"] == "Bearer t"
+
+
+def test_record_and_replay(tmp_path):
+    req = {"method": "GET", "url": "http://h/list", "request_type": "params", "payload": {"page": 1}}
+    cassette = Cassette().configure(mode="record", path=str(tmp_path))
+    cassette.record(req, _response(b"first" * 200))
+    cassette.record(req, _response(b"second"))
+    cassette.close()
+
+    cassette.configure(mode="replay", path=str(tmp_path))
+    assert cassette.play(req).content == b"first" * 200
+    assert cassette.play(req).content == b"second"
+    # 超出录制次数时返回最后一次的响应
+    assert cassette.play(req).content == b"second"
+    with pytest.raises(CassetteMiss):
+        cassette.play(dict(req, payload={"page": 2}))
+    cassette.close()
+
+    cassette.configure(mode="auto", path=str(tmp_path))
+    assert cassette.play(dict(req, payload={"page": 2})) is None
+    cassette.close()
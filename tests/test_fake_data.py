@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_fake_data.py
+# @Desc: FakerData 数据池单元测试
+
+import time
+import threading
+import pytest
+from utils.data_utils import fake_data
+from utils.data_utils.fake_data import FakerPool
+
+
+def _take(pool: FakerPool, count: int, name: str = "generate_name") -> list:
+    return [pool.get(name) for _ in range(count)]
+
+
+def _wait_refill(pool: FakerPool, key: tuple, size: int):
+    deadline = time.time() + 10
+    while len(pool.pools.get(key, ())) < size and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_seeded_pool_is_deterministic():
+    assert _take(FakerPool(size=20, watermark=5, seed=1), 50) == _take(FakerPool(size=20, watermark=5, seed=1), 50)
+    assert _take(FakerPool(size=20, watermark=5, seed=1), 50) != _take(FakerPool(size=20, watermark=5, seed=2), 50)
+
+
+@pytest.mark.parametrize("size, watermark", [(10, 0), (10, 10), (10, 20), (0, 0)])
+def test_invalid_watermark(size, watermark):
+    with pytest.raises(ValueError):
+        FakerPool(size=size, watermark=watermark)
+
+
+def test_pools_share_one_generator():
+    pool = FakerPool(size=5, watermark=1)
+    pool.get("generate_name")
+    generator = pool._generator
+    pool.get("generate_email")
+    pool.get("generate_name", ("zh",))
+    assert generator is not None and pool._generator is generator
+
+
+def test_unique_across_keys_and_threads():
+    pool = FakerPool(size=20, watermark=5, unique=["generate_phone"])
+    values = []
+
+    def worker(args):
+        for _ in range(100):
+            values.append(pool.get("generate_phone", args))
+
+    threads = [threading.Thread(target=worker, args=(args,)) for args in [(), ("en",), (), ("en",)]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(values) == len(set(values)) == 400
+
+
+def test_case_seed_is_deterministic():
+    pool = FakerPool(size=20, watermark=5)
+    _take(pool, 3)
+    pool.seed_case(42)
+    first = _take(pool, 30) + [pool.get("generate_email")]
+    # 其他用例取值、后台补充时机不影响当前用例
+    pool.seed_case(7)
+    _take(pool, 5)
+    pool.seed_case(42)
+    assert _take(pool, 30) + [pool.get("generate_email")] == first
+    pool.seed_case(None)
+
+
+def test_seeded_case_served_from_pool(monkeypatch):
+    pool = FakerPool(size=20, watermark=5)
+    pool.seed_case(42)
+    results = []
+    monkeypatch.setattr(fake_data, "record_cache", lambda cache, hit: results.append(hit))
+    pool.get("generate_name")
+    _wait_refill(pool, ("case:42", "generate_name", (), ()), 20)
+    _take(pool, 15)
+    assert results == [False] + [True] * 15
+    # 用例结束后丢弃该用例的数据池
+    pool.seed_case(None)
+    assert not [key for key in pool.pools if key[0] == "case:42"]
+
+
+def test_reset_clears_unique_values():
+    pool = FakerPool(size=5, watermark=1, unique=["generate_name"], seed=3)
+    first = _take(pool, 3)
+    pool.reset(seed=3)
+    assert _take(pool, 3) == first
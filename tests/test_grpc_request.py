@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_grpc_request.py
+# @Desc: gRPC 请求模块单元测试：基于进程内的 gRPC 服务测试 unary、server-streaming 调用及错误状态码
+
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from core.requests_utils.grpc_request import GrpcClient
+
+grpc = pytest.importorskip("grpc")
+pytest.importorskip("grpc_tools")
+
+PROTO = """
+syntax = "proto3";
+package demo;
+
+message HelloRequest {
+  string name = 1;
+  int32 count = 2;
+}
+
+message HelloReply {
+  string message = 1;
+  int32 index = 2;
+}
+
+service Greeter {
+  rpc SayHello (HelloRequest) returns (HelloReply);
+  rpc ListHello (HelloRequest) returns (stream HelloReply);
+}
+"""
+
+
+@pytest.fixture
+def grpc_server(tmp_path):
+    proto_path = tmp_path / "greeter.proto"
+    proto_path.write_text(PROTO, encoding="utf-8")
+    client = GrpcClient()
+    _, request_class, reply_class = client.loader.method(str(proto_path), "demo.Greeter", "SayHello")
+
+    def say_hello(request, context):
+        if request.name == "missing":
+            context.abort(grpc.StatusCode.NOT_FOUND, "用户不存在")
+        context.set_trailing_metadata((("x-user", request.name),))
+        return reply_class(message=f"hello {request.name}")
+
+    def list_hello(request, context):
+        for index in range(request.count):
+            yield reply_class(message=f"hello {request.name}", index=index)
+
+    handler = grpc.method_handlers_generic_handler("demo.Greeter", {
+        "SayHello": grpc.unary_unary_rpc_method_handler(
+            say_hello, request_deserializer=request_class.FromString, response_serializer=reply_class.SerializeToString),
+        "ListHello": grpc.unary_stream_rpc_method_handler(
+            list_hello, request_deserializer=request_class.FromString, response_serializer=reply_class.SerializeToString),
+    })
+    server = grpc.server(ThreadPoolExecutor(max_workers=2))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    yield client, f"grpc://127.0.0.1:{port}/demo.Greeter", str(proto_path)
+    client.close()
+    server.stop(None)
+
+
+def test_unary_call(grpc_server):
+    client, url, proto = grpc_server
+    response = client.call(f"{url}/SayHello", proto, {"name": "admin"}, headers={"Authorization": "Bearer t"})
+    assert (response.status_code, response.ok) == (0, True)
+    assert response.json() == {"message": "hello admin", "index": 0}
+    assert response.headers["x-user"] == "admin"
+    # 同一个方法的调用对象只创建一次
+    client.call(f"{url}/SayHello", proto, {"name": "guest"})
+    assert len(client._stubs) == 1 and len(client._channels) == 1
+
+
+def test_server_streaming_call(grpc_server):
+    client, url, proto = grpc_server
+    response = client.call(f"{url}/ListHello", proto, {"name": "admin", "count": 3})
+    assert response.status_code == 0
+    assert [item["index"] for item in response.json()] == [0, 1, 2]
+
+
+def test_error_status(grpc_server):
+    client, url, proto = grpc_server
+    response = client.call(f"{url}/SayHello", proto, {"name": "missing"})
+    assert (response.status_code, response.reason, response.ok) == (5, "NOT_FOUND", False)
+    assert response.json() == {"code": "NOT_FOUND", "details": "用户不存在"}
+
+
+def test_unknown_method(grpc_server):
+    client, url, proto = grpc_server
+    with pytest.raises(ValueError, match="demo.Greeter/Missing.*greeter.proto"):
+        client.call(f"{url}/Missing", proto, {})
+    with pytest.raises(ValueError, match="demo.Missing/SayHello"):
+        client.call(url.replace("Greeter", "Missing") + "/SayHello", proto, {})
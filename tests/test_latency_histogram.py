@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_latency_histogram.py
+# @Desc: 耗时直方图单元测试
+
+import random
+from core.metrics_utils.latency_histogram import LatencyHistogram
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(value)
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(100) == 100
+    assert histogram.summary()["count"] == 100
+
+
+def test_percentile_relative_error():
+    rng = random.Random(1)
+    values = sorted(rng.randint(1000, 5_000_000) for _ in range(10000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    for pct in (50, 90, 99):
+        exact = values[int(pct / 100 * len(values)) - 1]
+        assert abs(histogram.percentile(pct) - exact) / exact < 0.01
+
+
+def test_merge_and_round_trip():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(100, count=3)
+    second.record(200_000)
+    merged = LatencyHistogram.from_dict(first.to_dict()).merge(second)
+    assert (merged.count, merged.min, merged.max) == (4, 100, 200_000)
+    assert merged.total == 300 + 200_000
+
+
+def test_empty_histogram():
+    assert LatencyHistogram().percentile(99) == 0
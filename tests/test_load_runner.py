@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_load_runner.py
+# @Desc: 压测模块单元测试：基于本地模拟接口服务统计请求数、错误数
+
+import json
+import pytest
+from config.settings import MOCK_SERVER
+from core.metrics_utils.tracing import tracer
+from core.load_utils.load_runner import LoadRunner
+from core.requests_utils.grpc_request import GrpcResponse
+from core.requests_utils.request_control import RequestControl
+from utils.tools.mock_server import MockServer
+
+CASES = [
+    {"id": "ok_01", "title": "成功", "url": "${host}/api/ok", "method": "GET", "request_type": "json",
+     "validate": {"status_code": 200}},
+    {"id": "fail_01", "title": "失败", "url": "${host}/api/fail", "method": "GET", "request_type": "json",
+     "validate": {"status_code": 500}},
+    {"id": "render_01", "title": "渲染失败", "url": "${host}/api/ok", "method": "GET", "request_type": "json"},
+]
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "load.yaml").write_text(
+        "case_common:\n  allure_epic: demo\ncase_info:\n" + "".join(f"- {json.dumps(case)}\n" for case in CASES),
+        encoding="utf-8")
+    config = dict(MOCK_SERVER, latency={"distribution": "none"}, error_rate=0.0, routes={}, seed=1)
+    server = MockServer(port=0, interface_dir=str(tmp_path), config=config).start()
+    yield server
+    server.stop()
+
+
+def _run(server, case_ids, monkeypatch, **kwargs) -> dict:
+    runner = LoadRunner(case_ids=case_ids, source={"host": server.url}, api_file_path=server.directory, **kwargs)
+    monkeypatch.setattr(runner, "save_report", lambda report: None)
+    return runner.run()
+
+
+def test_counts_http_errors(server, monkeypatch):
+    monkeypatch.setattr(tracer, "enabled", True)
+    report = _run(server, ["ok_01", "fail_01"], monkeypatch, concurrency=2, duration=0.5)
+    ok, fail = report["cases"]["ok_01"], report["cases"]["fail_01"]
+    assert ok["requests"] > 0 and ok["errors"] == 0
+    assert fail["requests"] > 0 and fail["errors"] == fail["requests"]
+    assert fail["error_types"] == {"HTTP 500": fail["requests"]}
+    assert report["summary"]["requests"] == ok["requests"] + fail["requests"]
+    # 压测结束后恢复调用链记录
+    assert tracer.enabled is True
+
+
+def test_render_error_backs_off_without_latency(server, monkeypatch):
+    before_request = RequestControl.before_request
+
+    def fake_before_request(self, request_data, source_data=None):
+        if request_data["id"] == "render_01":
+            raise KeyError("token")
+        return before_request(self, request_data=request_data, source_data=source_data)
+
+    monkeypatch.setattr(RequestControl, "before_request", fake_before_request)
+    monkeypatch.setattr(LoadRunner, "RENDER_BACKOFF", 0.2)
+    report = _run(server, ["render_01"], monkeypatch, concurrency=1, duration=0.5)
+    item = report["cases"]["render_01"]
+    # 0.2s、0.4s 两次退避后压测结束
+    assert item["requests"] == item["errors"] == 2
+    assert item["error_types"] == {"render KeyError": 2}
+    assert item["max_ms"] == 0
+
+
+@pytest.mark.parametrize("request_type, status_code, error", [
+    ("grpc", 0, None),
+    ("GRPC", 5, "gRPC 5"),
+    ("grpc", 14, "gRPC 14"),
+    ("json", 404, "HTTP 404"),
+    ("json", 200, None),
+])
+def test_response_error(request_type, status_code, error):
+    if request_type.lower() == "grpc":
+        response = GrpcResponse(url="grpc://localhost/a.B/C", status_code=status_code, content={}, metadata={},
+                                seconds=0.01)
+    else:
+        response = type("Response", (), {"status_code": status_code})()
+    assert LoadRunner.response_error({"request_type": request_type}, response) == error
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_mock_server.py
+# @Desc: 本地模拟接口服务单元测试：根据用例生成路由、路由匹配
+
+import json
+import pytest
+import requests
+from config.settings import MOCK_SERVER
+from utils.tools.http_server import parse_args
+from utils.tools.mock_server import MockRoutes, MockServer, parse_jsonpath, url_path
+
+CASE = {
+    "id": "login_01",
+    "method": "post",
+    "url": "${host}/api/login?from=web",
+    "validate": {
+        "status_code": 201,
+        "assert_ret": {"type_jsonpath": "$.ret", "expect_value": 0, "assert_type": "=="},
+        "assert_name": {"type_jsonpath": "$.data.user.name", "expect_value": "admin", "assert_type": "=="},
+    },
+    "extract": {"response": {"type_jsonpath": {"token": "$.data.token"}}},
+}
+
+
+@pytest.fixture
+def config():
+    return dict(MOCK_SERVER, latency={"distribution": "none"}, error_rate=0.0, routes={}, seed=1)
+
+
+def test_url_path_and_jsonpath():
+    assert url_path("${host}/api/x?a=1") == "/api/x"
+    assert url_path("https://h:8080/api/x") == "/api/x"
+    assert url_path("api/x") == "/api/x"
+    assert parse_jsonpath("$.data.list[0].id") == ["data", "list", 0, "id"]
+    assert parse_jsonpath("$..id") is None
+
+
+def test_routes_from_case(config):
+    routes = MockRoutes(config)
+    routes.add_case(CASE)
+    route = routes.match("POST", "/api/login")
+    assert route.status == 201
+    assert json.loads(route.content) == {"ret": 0, "data": {"user": {"name": "admin"}, "token": "mock_token"}}
+    assert route.case_ids == ["login_01"]
+    assert routes.match("GET", "/api/login") is None
+
+
+def test_pattern_and_head_routes(config):
+    routes = MockRoutes(config)
+    routes.add_case({"id": "user_01", "method": "GET", "url": "${host}/api/user/${user_id}"})
+    assert routes.match("GET", "/api/user/42").path == "/api/user/${user_id}"
+    assert routes.match("HEAD", "/api/user/42") is not None
+    assert routes.match("GET", "/api/user/42/detail") is None
+
+
+def test_first_case_wins(config):
+    routes = MockRoutes(config)
+    routes.add_case(CASE)
+    routes.add_case(dict(CASE, id="login_02", validate={
+        "status_code": 400, "assert_ret": {"type_jsonpath": "$.ret", "expect_value": 1, "assert_type": "=="}}))
+    route = routes.match("POST", "/api/login")
+    assert (route.status, json.loads(route.content)["ret"]) == (201, 0)
+    assert route.case_ids == ["login_01", "login_02"]
+
+
+def test_error_injection(config):
+    routes = MockRoutes(dict(config, error_rate=1.0, error_status=503))
+    routes.add_case(CASE)
+    delay, error = routes.decide(routes.match("POST", "/api/login"))
+    assert error and delay == 0
+
+
+def test_server_serves_routes(tmp_path, config):
+    (tmp_path / "login.yaml").write_text(
+        "case_common:\n  allureEpic: demo\ncase_info:\n- " + json.dumps(CASE, ensure_ascii=False) + "\n",
+        encoding="utf-8")
+    server = MockServer(port=0, interface_dir=str(tmp_path), config=config).start()
+    try:
+        response = requests.post(f"{server.url}/api/login", json={"user": "admin"}, timeout=5)
+        assert (response.status_code, response.json()["data"]["token"]) == (201, "mock_token")
+        assert requests.get(f"{server.url}/api/missing", timeout=5).status_code == 404
+        routes = requests.get(f"{server.url}/__mock__/routes", timeout=5).json()
+        assert routes[0]["hits"] == 1
+    finally:
+        server.stop()
+
+
+def test_parse_args():
+    assert parse_args(["http_server.py", "-mock", "-port", "18000", "-dir", "interfaces"]) == {
+        "port": 18000, "directory": "interfaces"}
+    assert parse_args(["http_server.py"]) == {}
+
+
+def test_routes_from_excel_cases(tmp_path, config):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    common = workbook.active
+    common.title = "case_common"
+    common.append(["allure_epic", "case_markers"])
+    common.append(["demo", "smoke"])
+    cases = workbook.create_sheet("login")
+    cases.append(["id", "title", "url", "method", "extract"])
+    cases.append(["login_excel_01", "登录", "/api/user/login", "post",
+                  "{'username': '$.data.user.username', 'openid': '$.data.user.openid'}"])
+    workbook.save(tmp_path / "test_login.xlsx")
+    routes = MockRoutes.from_cases(str(tmp_path), config)
+    route = routes.match("POST", "/api/user/login")
+    assert route.case_ids == ["login_excel_01"]
+    assert json.loads(route.content) == {"data": {"user": {"username": "mock_username", "openid": "mock_openid"}}}
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_notify.py
+# @Desc: 通知发送单元测试：基于本地的 HTTP（钉钉、企业微信）、SMTP 替身服务测试并发发送、超时、重试
+
+import json
+import time
+import threading
+import socketserver
+import pytest
+from functools import partial
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.report_utils import send_result_handle
+from core.report_utils.send_result_handle import send_result, send_wechat, send_dingding
+from utils.notify_utils import notify_dispatcher
+from utils.notify_utils.notify_dispatcher import retry_call, NotifyDispatcher
+
+RESULTS = {"start_time": "2026-01-01 00:00:00", "run_time": 1, "tester": "tester", "department": "qa", "env": "test",
+           "total": 1, "passed": 1, "failed": 0, "broken": 0, "skipped": 0, "rerun": 0, "pass_rate": 100}
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """
+    钉钉、企业微信机器人替身：记录收到的请求，按路径延迟响应，上传文件可以配置失败次数
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        path = urlsplit(self.path).path
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(server.delays.get(path, 0))
+        if path.endswith("upload_media"):
+            server.requests.append((path, None))
+            failed = server.upload_failures > 0
+            server.upload_failures -= 1
+            result = {"errcode": 1, "errmsg": "busy"} if failed else {"errcode": 0, "media_id": "media_1"}
+        else:
+            server.requests.append((path, json.loads(body)["msgtype"]))
+            result = {"errcode": 0}
+        content = json.dumps(result).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except OSError:
+            # 客户端已超时断开
+            pass
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    SMTP 服务替身：不认证，收到邮件内容后延迟 server.delay 秒再响应
+    """
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost")
+        data, lines = False, []
+        for raw in self.rfile:
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if data:
+                if line == ".":
+                    time.sleep(self.server.delay)
+                    self.server.messages.append("\n".join(lines))
+                    data, lines = False, []
+                    self.reply("250 OK")
+                else:
+                    lines.append(line)
+            elif line[:4].upper() in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif line[:4].upper() == "DATA":
+                data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif line[:4].upper() == "QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("250 OK")
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def webhook_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _WebhookHandler)
+    server.daemon_threads = True
+    server.delays, server.requests, server.upload_failures = {}, [], 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield _serve(server)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.delay, server.messages = 0, []
+    yield _serve(server)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fast_retry(monkeypatch):
+    """
+    重试不等待，记录每次重试前的等待时间
+    """
+    delays = []
+    monkeypatch.setattr(notify_dispatcher, "time", SimpleNamespace(sleep=delays.append))
+    return delays
+
+
+def test_retry_call_backoff(fast_retry):
+    attempts = []
+
+    def func():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("refused")
+        return len(attempts) == 3
+
+    assert retry_call(func, name="测试", retries=2, backoff=0.5) is True
+    assert fast_retry == [0.5, 1.0]
+    assert retry_call(lambda: False, name="测试", retries=3, backoff=1) is False
+    assert fast_retry[2:] == [1, 2, 4]
+
+
+def test_wechat_upload_failure_does_not_resend_text(webhook_server, fast_retry, tmp_path):
+    attachment = tmp_path / "report.zip"
+    attachment.write_bytes(b"report" * 10)
+    webhook_server.upload_failures = 1
+    assert send_wechat(f"{webhook_server.url}/cgi-bin/webhook/send?key=k1", "content", str(attachment), timeout=5)
+    assert [msgtype for _, msgtype in webhook_server.requests] == ["markdown", None, None, "file"]
+    assert len(fast_retry) == 1
+
+
+def test_channel_timeout(webhook_server, monkeypatch):
+    monkeypatch.setattr(send_result_handle, "retry_call", partial(retry_call, retries=0))
+    webhook_server.delays["/ding"] = 1
+    start = time.perf_counter()
+    assert send_dingding(f"{webhook_server.url}/ding?access_token=t", None, "title", "content", timeout=0.3) is False
+    assert time.perf_counter() - start < 0.9
+
+
+def test_send_result_concurrent_and_non_blocking(webhook_server, smtp_server, monkeypatch, tmp_path):
+    attachment = tmp_path / "report.zip"
+    attachment.write_bytes(b"report" * 10)
+    monkeypatch.setattr(send_result_handle, "SEND_RESULT_TYPE", 4)
+    monkeypatch.setattr(send_result_handle, "notify_dispatcher", NotifyDispatcher(exit_wait=0))
+    monkeypatch.setattr(send_result_handle, "retry_call", partial(retry_call, retries=0))
+    monkeypatch.setitem(send_result_handle.NOTIFY, "timeout", {"email": 5, "ding_talk": 0.5, "wechat": 5})
+    monkeypatch.setitem(send_result_handle.ding_talk, "webhook_url", f"{webhook_server.url}/ding?access_token=t")
+    monkeypatch.setitem(send_result_handle.ding_talk, "secret", None)
+    monkeypatch.setitem(send_result_handle.wechat, "webhook_url", f"{webhook_server.url}/cgi-bin/webhook/send?key=k1")
+    monkeypatch.setitem(send_result_handle.email, "host", "127.0.0.1")
+    monkeypatch.setitem(send_result_handle.email, "port", smtp_server.server_address[1])
+    monkeypatch.setitem(send_result_handle.email, "smtp_ssl", False)
+    monkeypatch.setitem(send_result_handle.email, "user", "sender@example.com")
+    monkeypatch.setitem(send_result_handle.email, "password", None)
+    monkeypatch.setitem(send_result_handle.email, "to", ["receiver@example.com"])
+    # 钉钉超过超时时间未响应，SMTP 服务、企业微信各需要 1 秒
+    webhook_server.delays.update({"/ding": 2, "/cgi-bin/webhook/send": 0.5, "/cgi-bin/webhook/upload_media": 0.5})
+    smtp_server.delay = 1
+
+    def build_attachment():
+        time.sleep(0.3)
+        return str(attachment)
+
+    start = time.perf_counter()
+    futures = send_result({}, attachment_path=build_attachment, results=RESULTS)
+    # 不等待附件生成、通知发送
+    assert time.perf_counter() - start < 0.3
+    results = [future.result(timeout=10) for future in futures]
+    elapsed = time.perf_counter() - start
+    # 邮件、钉钉、企业微信
+    assert results == [True, False, True]
+    assert len(smtp_server.messages) == 1
+    # 各渠道并发发送：总耗时接近最慢的渠道（企业微信 0.3 + 0.5 * 3 秒），而不是各渠道耗时之和
+    assert elapsed < 2.8
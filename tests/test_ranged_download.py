@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_ranged_download.py
+# @Desc: 分段下载、断点续传单元测试
+
+import os
+import hashlib
+import pytest
+from core.requests_utils.ranged_download import RangedDownloader
+
+DATA = os.urandom(10000)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: bytes, fail_after: int = None):
+        self.status_code = status_code
+        self.body = body
+        self.fail_after = fail_after
+
+    def iter_content(self, chunk_size: int):
+        for offset in range(0, len(self.body), chunk_size):
+            if self.fail_after is not None and offset >= self.fail_after:
+                raise IOError("连接中断")
+            yield self.body[offset:offset + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class FakeServer:
+    """
+    按 Range 请求头返回数据，fail_after 不为空时每个响应只返回前 fail_after 字节后中断
+    """
+
+    def __init__(self, fail_after: int = None):
+        self.fail_after = fail_after
+        self.ranges = []
+
+    def request(self, method, url, headers, stream, **kwargs):
+        start, end = (int(value) for value in headers["Range"][len("bytes="):].split("-"))
+        self.ranges.append((start, end))
+        return FakeResponse(206, DATA[start:end + 1], self.fail_after)
+
+
+def _downloader(server: FakeServer, file_path: str, **kwargs) -> RangedDownloader:
+    options = dict(size=len(DATA), validator='"v1"', chunk_size=500, parallel=4, min_part_size=2000, retries=0)
+    options.update(kwargs)
+    return RangedDownloader(request=server.request, url="http://h/file", file_path=file_path, **options)
+
+
+def test_parallel_download(tmp_path):
+    file_path = str(tmp_path / "file.bin")
+    closed = []
+    result = _downloader(FakeServer(), file_path, close_session=lambda: closed.append(1)).download()
+    with open(file_path, "rb") as f:
+        assert f.read() == DATA
+    assert result["parts"] == 4 and result["resumed_bytes"] == 0
+    assert result["sha256"] == hashlib.sha256(DATA).hexdigest()
+    assert len(closed) == 4
+    assert not os.path.exists(f"{file_path}.part.json")
+
+
+def test_resume_after_failure(tmp_path):
+    file_path = str(tmp_path / "file.bin")
+    with pytest.raises(IOError):
+        _downloader(FakeServer(fail_after=1000), file_path, parallel=1).download()
+    assert os.path.exists(f"{file_path}.part.json")
+
+    server = FakeServer()
+    result = _downloader(server, file_path, parallel=1).download()
+    with open(file_path, "rb") as f:
+        assert f.read() == DATA
+    assert result["resumed_bytes"] == 1000
+    assert server.ranges == [(1000, len(DATA) - 1)]
+    assert result["sha256"] == hashlib.sha256(DATA).hexdigest()
+
+
+def test_changed_file_restarts(tmp_path):
+    file_path = str(tmp_path / "file.bin")
+    with pytest.raises(IOError):
+        _downloader(FakeServer(fail_after=1000), file_path, parallel=1).download()
+    server = FakeServer()
+    result = _downloader(server, file_path, parallel=1, validator='"v2"').download()
+    assert result["resumed_bytes"] == 0
+    assert server.ranges[0][0] == 0
+
+
+def test_retry_continues_from_written_offset(tmp_path):
+    file_path = str(tmp_path / "file.bin")
+    server = FakeServer(fail_after=4000)
+    original = server.request
+
+    def flaky(**kwargs):
+        response = original(**kwargs)
+        # 第一次请求中断后，之后的请求正常返回
+        server.fail_after = None
+        return response
+
+    server.request = flaky
+    result = _downloader(server, file_path, parallel=1, retries=1).download()
+    with open(file_path, "rb") as f:
+        assert f.read() == DATA
+    assert server.ranges == [(0, len(DATA) - 1), (4000, len(DATA) - 1)]
+    assert result["resumed_bytes"] == 0
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_response_cache.py
+# @Desc: 接口响应缓存单元测试：有效期、条件请求重新验证、清除
+
+import pytest
+import requests
+from config.settings import RESPONSE_CACHE
+from core.requests_utils.response_cache import ResponseCache, freshness_lifetime
+
+
+def _response(status_code: int = 200, body: bytes = b"data", **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.url = "http://h/items"
+    response.headers.update({k.replace("_", "-"): v for k, v in headers.items()})
+    return response
+
+
+class FakeServer:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def send(self, req_data: dict) -> requests.Response:
+        self.requests.append(req_data)
+        return self.responses.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def cache_policy(monkeypatch):
+    monkeypatch.setitem(RESPONSE_CACHE, "policy", "marked")
+    monkeypatch.setitem(RESPONSE_CACHE, "default_ttl", 60)
+
+
+GET = {"method": "GET", "url": "http://h/items?page=1", "cacheable": True, "headers": {"Authorization": "t1"}}
+
+
+def test_freshness_lifetime():
+    assert freshness_lifetime({"Cache-Control": "max-age=30", "Age": "10"}) == 20
+    assert freshness_lifetime({"Cache-Control": "no-cache, max-age=30"}) == 0
+    assert freshness_lifetime({"Expires": "0"}) == 0
+    assert freshness_lifetime({}) == 0
+    assert freshness_lifetime({}, default_ttl=60) == 60
+
+
+def test_cacheable_policy(monkeypatch):
+    assert ResponseCache.cacheable(GET)
+    assert not ResponseCache.cacheable(dict(GET, cacheable=None))
+    assert not ResponseCache.cacheable(dict(GET, method="POST"))
+    monkeypatch.setitem(RESPONSE_CACHE, "policy", "all")
+    assert ResponseCache.cacheable(dict(GET, cacheable=None))
+    assert not ResponseCache.cacheable(dict(GET, cacheable="false"))
+
+
+def test_fresh_hit_and_token_isolation():
+    cache = ResponseCache()
+    server = FakeServer(_response(), _response(body=b"other user"))
+    assert cache.fetch(GET, server.send).content == b"data"
+    hit = cache.fetch(GET, server.send)
+    assert (hit.content, hit.cache) == (b"data", "hit")
+    other = dict(GET, headers={"Authorization": "t2"})
+    assert cache.fetch(other, server.send).content == b"other user"
+    assert len(server.requests) == 2
+
+
+def test_revalidation_with_etag():
+    cache = ResponseCache()
+    server = FakeServer(_response(Cache_Control="max-age=0", ETag='"v1"'),
+                        _response(status_code=304, body=b"", Cache_Control="max-age=0"))
+    cache.fetch(GET, server.send)
+    response = cache.fetch(GET, server.send)
+    assert (response.status_code, response.content, response.cache) == (200, b"data", "revalidated")
+    assert server.requests[1]["headers"]["If-None-Match"] == '"v1"'
+
+
+def test_unmarked_requests_do_not_use_default_ttl(monkeypatch):
+    monkeypatch.setitem(RESPONSE_CACHE, "policy", "all")
+    cache = ResponseCache()
+    unmarked = dict(GET, cacheable=None)
+    server = FakeServer(_response(), _response())
+    cache.fetch(unmarked, server.send)
+    cache.fetch(unmarked, server.send)
+    assert len(server.requests) == 2 and len(cache) == 0
+
+
+def test_no_store_and_vary():
+    cache = ResponseCache()
+    server = FakeServer(_response(Cache_Control="no-store"), _response(Vary="*"))
+    cache.fetch(GET, server.send)
+    cache.fetch(GET, server.send)
+    assert len(cache) == 0
+
+
+def test_unsafe_method_invalidates_same_url():
+    cache = ResponseCache()
+    other = dict(GET, url="http://h/other")
+    server = FakeServer(_response(), _response())
+    cache.fetch(GET, server.send)
+    cache.fetch(other, server.send)
+    assert cache.invalidate({"method": "GET", "url": "http://h/items"}) == 0
+    assert cache.invalidate({"method": "POST", "url": "http://h/items"}) == 1
+    assert len(cache) == 1
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_bytes=10)
+    server = FakeServer(_response(body=b"123456"), _response(body=b"abcdef"))
+    cache.fetch(GET, server.send)
+    cache.fetch(dict(GET, url="http://h/other"), server.send)
+    assert len(cache) == 1
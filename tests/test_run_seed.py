@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_run_seed.py
+# @Desc: 运行种子、请求数据缓存单元测试
+
+import os
+import json
+from core.data_utils.run_seed import PayloadCache, REDACTED, derive_seed, redact
+
+
+def test_derive_seed_is_stable():
+    assert derive_seed(1, "login_01") == derive_seed(1, "login_01")
+    assert derive_seed(1, "login_01") != derive_seed(2, "login_01")
+
+
+def test_redact_nested_fields():
+    data = {"headers": {"authorization": "Bearer x"}, "payload": [{"Password": "p", "name": "n"}], "token": ""}
+    assert redact(data) == {"headers": {"authorization": REDACTED}, "payload": [{"Password": REDACTED, "name": "n"}],
+                            "token": ""}
+
+
+def test_cache_key_depends_on_referenced_variables():
+    data = {"id": "case_01", "url": "${host}/api", "payload": {"token": "$token"}}
+    key = PayloadCache.cache_key(1, data, {"host": "a", "token": "t1", "other": 1})
+    assert key == PayloadCache.cache_key(1, data, {"host": "a", "token": "t1", "other": 2})
+    assert key != PayloadCache.cache_key(1, data, {"host": "a", "token": "t2"})
+    assert key.startswith("1/case_01-")
+
+
+def test_memory_only_used_on_retry(tmp_path):
+    cache = PayloadCache(cache_dir=str(tmp_path))
+    key = "1/case_01-abc"
+    cache.set(key, {"payload": {"name": "n"}})
+    assert cache.get(key) is None
+    assert cache.get(key, retry=True) == {"payload": {"name": "n"}}
+
+
+def test_disk_reused_only_for_seed_rerun(tmp_path):
+    key = "1/case_01-abc"
+    PayloadCache(cache_dir=str(tmp_path)).set(key, {"payload": {"name": "n"}})
+
+    rerun = PayloadCache(cache_dir=str(tmp_path))
+    assert rerun.get(key) is None
+    rerun.configure(reuse_disk=True)
+    assert rerun.get(key) == {"payload": {"name": "n"}}
+    # 同一次运行中再次执行相同的用例时重新渲染
+    assert rerun.get(key) is None
+
+
+def test_disk_entries_are_redacted_and_not_replayed(tmp_path):
+    key = "1/case_01-abc"
+    cache = PayloadCache(cache_dir=str(tmp_path))
+    cache.set(key, {"payload": {"password": "secret"}})
+    with open(cache._path(key), "r", encoding="utf-8") as f:
+        assert json.load(f) == {"payload": {"password": REDACTED}}
+    assert cache.get(key, retry=True) == {"payload": {"password": "secret"}}
+
+    rerun = PayloadCache(cache_dir=str(tmp_path))
+    rerun.configure(reuse_disk=True)
+    assert rerun.get(key) is None
+
+
+def test_prune_keeps_recent_seeds(tmp_path):
+    cache = PayloadCache(cache_dir=str(tmp_path), keep=2)
+    for seed in range(4):
+        cache.set(f"{seed}/case-x", {})
+        os.utime(tmp_path / str(seed), (seed, seed))
+    cache.prune(current_seed=3)
+    assert sorted(os.listdir(tmp_path)) == ["2", "3"]
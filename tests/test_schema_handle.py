@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_schema_handle.py
+# @Desc: 接口文档响应 schema 处理、JSON Schema 断言单元测试
+
+import pytest
+from core.assertion_utils import assert_function as af
+from utils.yaml_case_maker.schema_handle import RefResolver, get_response_schema, get_validate
+
+DOCUMENT = {
+    "components": {
+        "schemas": {
+            "User": {"type": "object", "properties": {"name": {"type": "string", "nullable": True}}},
+            "Node": {"type": "object", "properties": {"children": {"type": "array",
+                                                                   "items": {"$ref": "#/components/schemas/Node"}}}},
+        }
+    }
+}
+
+
+def test_resolve_ref_and_nullable():
+    schema = RefResolver(DOCUMENT).resolve({"$ref": "#/components/schemas/User"})
+    assert schema["properties"]["name"]["type"] == ["string", "null"]
+
+
+def test_resolve_recursive_ref():
+    schema = RefResolver(DOCUMENT).resolve({"$ref": "#/components/schemas/Node"})
+    # 循环引用处按不限制类型处理
+    assert schema["properties"]["children"]["items"] == {}
+
+
+def test_validate_uses_documented_status_code():
+    operation = {"responses": {"201": {"content": {"application/json": {
+        "schema": {"$ref": "#/components/schemas/User"}}}}}}
+    validate = get_validate(operation, RefResolver(DOCUMENT))
+    assert validate["status_code"] == 201
+    assert validate["assert_schema"]["expect_value"]["type"] == "object"
+
+
+def test_validate_without_schema():
+    resolver = RefResolver(DOCUMENT)
+    assert get_validate({"responses": {204: {"description": "no content"}}}, resolver) == {"status_code": 204}
+    assert get_validate({"responses": {"default": {"description": "ok"}}}, resolver) == {"status_code": 200}
+    assert get_validate({}, resolver) == {"status_code": 200}
+
+
+def test_response_schema_swagger2():
+    operation = {"responses": {"200": {"schema": {"type": "array"}}}}
+    assert get_response_schema(operation, RefResolver({})) == (200, {"type": "array"})
+
+
+def test_json_schema_assertion():
+    schema = {"type": "object", "required": ["id"], "properties": {"id": {"type": "integer"}}}
+    af.json_schema(schema, {"id": 1})
+    with pytest.raises(AssertionError, match="结构不一致"):
+        af.json_schema(schema, {"id": "1"}, message="结构不一致")
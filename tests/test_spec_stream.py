@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_spec_stream.py
+# @Desc: 接口文档导入的用例文件增量写入单元测试
+
+import json
+import pytest
+from ruamel.yaml import YAML
+from utils.yaml_case_maker.spec_stream import CaseFileWriter, dump_cases
+
+
+def _case(case_id: str, title: str = "v1") -> dict:
+    return {"case_common": {"allureEpic": "demo"}, "case_info": [{"id": case_id, "title": title}]}
+
+
+def _import(root, file_path, title: str = "v1", incremental: bool = True) -> dict:
+    writer = CaseFileWriter(str(root), incremental=incremental)
+    writer.add(str(file_path), "GET /a", _case("a", title))
+    writer.add(str(file_path), "POST /b", _case("b"))
+    return writer.flush(dump_cases)
+
+
+def _load(file_path) -> dict:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return YAML(typ="safe").load(f)
+
+
+def _manifest(root) -> dict:
+    with open(root / CaseFileWriter.MANIFEST_NAME, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_new_file_written_then_skipped(tmp_path):
+    file_path = tmp_path / "api" / "a.yaml"
+    assert _import(tmp_path, file_path) == {"written": 1, "merged": 0, "skipped": 0}
+    assert _import(tmp_path, file_path) == {"written": 0, "merged": 0, "skipped": 1}
+    assert _import(tmp_path, file_path, "v2")["written"] == 1
+    data = _load(file_path)
+    assert [case["id"] for case in data["case_info"]] == ["a", "b"]
+    assert _manifest(tmp_path)["mixed"] == []
+
+
+def test_handwritten_file_is_merged_not_overwritten(tmp_path):
+    file_path = tmp_path / "api" / "a.yaml"
+    file_path.parent.mkdir()
+    file_path.write_text("case_common:\n  allureEpic: demo\ncase_info:\n- id: hand_01\n  title: 手动编写\n",
+                         encoding="utf-8")
+    assert _import(tmp_path, file_path)["merged"] == 1
+    assert _manifest(tmp_path)["mixed"] == ["api/a.yaml"]
+    assert _import(tmp_path, file_path)["skipped"] == 1
+
+    # 接口有变化时只替换该接口的内容，手动编写的用例保留
+    assert _import(tmp_path, file_path, "v2")["merged"] == 1
+    assert _import(tmp_path, file_path, "v3", incremental=False)["merged"] == 1
+    text = file_path.read_text(encoding="utf-8")
+    assert text.count("# >>> imported: GET /a") == 1
+    data = _load(file_path)
+    assert [(case["id"], case["title"]) for case in data["case_info"]] == [
+        ("hand_01", "手动编写"), ("a", "v3"), ("b", "v1")]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("x: 1", "x: 1\n# >>> imported: k\nnew\n# <<< imported: k\n"),
+    ("x: 1\n# >>> imported: k\nold\n# <<< imported: k\ny: 2\n", "x: 1\n# >>> imported: k\nnew\n# <<< imported: k\ny: 2\n"),
+])
+def test_merge_by_key(text, expected):
+    assert CaseFileWriter.merge(text, {"k": "new\n"}) == expected
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : test_warm_daemon.py
+# @Desc: 常驻进程单元测试：令牌认证、用例指纹、运行状态重置、执行线程中多次运行 pytest
+
+import sys
+import types
+import threading
+import pytest
+from config.settings import GLOBAL_VARS
+from core.daemon_utils import warm_daemon
+from core.daemon_utils.warm_daemon import WarmDaemon, send_run_request
+
+
+@pytest.fixture
+def daemon_env(tmp_path, monkeypatch):
+    """
+    用例生成、用例目录、测试结果都指向临时目录，不影响项目中的用例
+    """
+    state = {"fingerprint": "v1", "generated": 0}
+
+    def generate_cases():
+        state["generated"] += 1
+        (tmp_path / "auto").mkdir(exist_ok=True)
+
+    monkeypatch.setattr(warm_daemon, "case_fingerprint", lambda: state["fingerprint"])
+    monkeypatch.setattr(warm_daemon, "generate_cases", generate_cases)
+    monkeypatch.setattr(warm_daemon, "AUTO_CASE_DIR", str(tmp_path / "auto"))
+    monkeypatch.setattr(warm_daemon, "CASE_DIR", str(tmp_path))
+    monkeypatch.setattr(warm_daemon, "REPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(warm_daemon, "CUSTOM_MARKERS", [])
+    global_vars = dict(GLOBAL_VARS)
+    yield state
+    GLOBAL_VARS.clear()
+    GLOBAL_VARS.update(global_vars)
+
+
+@pytest.fixture
+def start_daemon(tmp_path):
+    daemons = []
+
+    def start(runner):
+        daemon = WarmDaemon(runner, host="127.0.0.1", port=0, token_file=str(tmp_path / "daemon.token")).start()
+        daemons.append(daemon)
+        return daemon
+
+    yield start
+    for daemon in daemons:
+        daemon.stop()
+
+
+def _stub_runner(calls: list):
+    def runner(env, m, report, regenerate, seed):
+        calls.append({"env": env, "m": m, "seed": seed, "thread": threading.current_thread().name})
+        return 0, None
+    return runner
+
+
+def test_prepare_cases_skips_unchanged_fingerprint(daemon_env):
+    daemon = WarmDaemon(_stub_runner([]))
+    assert daemon.prepare_cases() is True
+    assert daemon.prepare_cases() is False
+    daemon_env["fingerprint"] = "v2"
+    assert daemon.prepare_cases() is True
+    assert daemon_env["generated"] == 2
+
+
+def test_reset_run_state(daemon_env, tmp_path):
+    GLOBAL_VARS["token"] = "from last run"
+    module = types.ModuleType("test_stale_case")
+    module.__file__ = str(tmp_path / "test_stale_case.py")
+    sys.modules["test_stale_case"] = module
+    WarmDaemon.reset_run_state()
+    assert "token" not in GLOBAL_VARS
+    assert "test_stale_case" not in sys.modules
+
+
+def test_socket_round_trip(daemon_env, start_daemon, tmp_path):
+    calls = []
+    daemon = start_daemon(_stub_runner(calls))
+    (tmp_path / "test_result.txt").write_text("summary", encoding="utf-8")
+    result = send_run_request(env="live", m="smoke", seed=7, port=daemon.port, token_file=daemon.token_file)
+    assert (result["exit_code"], result["regenerated"], result["summary"]) == (0, False, "summary")
+    assert calls == [{"env": "live", "m": "smoke", "seed": 7, "thread": "warm-daemon-runner"}]
+
+
+def test_rejects_wrong_token(daemon_env, start_daemon, tmp_path):
+    calls = []
+    daemon = start_daemon(_stub_runner(calls))
+    (tmp_path / "wrong.token").write_text("0" * 64, encoding="utf-8")
+    result = send_run_request(port=daemon.port, token_file=str(tmp_path / "wrong.token"))
+    assert "认证失败" in result["error"]
+    assert calls == []
+    daemon.stop()
+    # 停止后删除令牌文件
+    assert not (tmp_path / "daemon.token").exists()
+
+
+def test_runs_pytest_repeatedly_on_worker_thread(daemon_env, start_daemon, tmp_path):
+    case_file = tmp_path / "test_daemon_case.py"
+    threads = []
+
+    def runner(env, m, report, regenerate, seed):
+        threads.append(threading.current_thread().name)
+        return pytest.main(["-q", "-p", "no:cacheprovider", str(case_file)]), None
+
+    daemon = start_daemon(runner)
+    case_file.write_text("def test_case():\n    assert True\n", encoding="utf-8")
+    assert daemon.submit().result(timeout=60)["exit_code"] == 0
+    # 用例文件变化后，下一次运行重新导入用例模块
+    case_file.write_text("def test_case():\n    assert False\n", encoding="utf-8")
+    assert daemon.submit().result(timeout=60)["exit_code"] == 1
+    assert daemon.status()["runs"] == 2
+    assert threads == ["warm-daemon-runner"] * 2
@@ -2,20 +2,64 @@
 # @Author  : 会飞的🐟
 # @File    : fake_data.py
 # @Desc: 测试数据生成模块
+import os
 import re
 import random
 import string
-from faker import Faker
+import functools
+import threading
+from loguru import logger
+from collections import deque
+from functools import cached_property
+from typing import Dict, Iterable, Optional
 from datetime import datetime, date, timedelta
+from core.metrics_utils.metrics_exporter import record_cache
+
+
+def pooled(func):
+    """
+    装饰器：FakerData 启用数据池时，从数据池中取值，而不是每次都调用 Faker 生成
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        pool = self._pool
+        if pool is None:
+            return func(self, *args, **kwargs)
+        return pool.get(func.__name__, args, kwargs)
+
+    return wrapper
+
 
 class FakerData:
     """
     测试数据生成类
     """
 
-    def __init__(self):
-        self.fk_zh = Faker(locale='zh_CN')
-        self.faker = Faker()
+    def __init__(self, pool: "FakerPool" = None, rng: random.Random = None):
+        """
+        :param pool: 数据池，传入后 @pooled 标记的方法从数据池中取值
+        :param rng: Faker 实例使用的随机数生成器，设置种子时不需要创建 Faker 实例
+        """
+        self._pool = pool
+        self.rng = rng or random.Random()
+
+    @cached_property
+    def fk_zh(self):
+        """
+        中文 Faker 实例，第一次使用时才导入 faker 并创建实例（zh_CN 的 provider 加载较慢）
+        """
+        from faker import Faker
+        fk_zh = Faker(locale='zh_CN')
+        fk_zh.random = self.rng
+        return fk_zh
+
+    @cached_property
+    def faker(self):
+        from faker import Faker
+        faker = Faker()
+        faker.random = self.rng
+        return faker
 
     @classmethod
     def generate_random_int(cls, *args) -> int:
@@ -34,12 +78,14 @@ class FakerData:
         # 生成并返回随机整数
         return random.randint(min_val, max_val)
 
+    @pooled
     def generate_catch_phrase(self):
         """
         :return: 生成妙句(口号) （输出结果都是英文）
         """
         return self.faker.catch_phrase()
 
+    @pooled
     def generate_phone(self, lan="en") -> int:
         """
         :return: 随机生成手机号码
@@ -50,6 +96,7 @@ class FakerData:
             phone = self.faker.phone_number()
         return phone
 
+    @pooled
     def generate_id_number(self, lan="en") -> int:
         """
 
@@ -61,6 +108,7 @@ class FakerData:
             id_number = self.faker.ssn()
         return id_number
 
+    @pooled
     def generate_female_name(self, lan="en") -> str:
         """
 
@@ -72,6 +120,7 @@ class FakerData:
             female_name = self.faker.name_female()
         return female_name
 
+    @pooled
     def generate_male_name(self, lan="en") -> str:
         """
 
@@ -83,6 +132,7 @@ class FakerData:
             male_name = self.faker.name_male()
         return male_name
 
+    @pooled
     def generate_name(self, lan="en") -> str:
         """
         生成人名
@@ -94,6 +144,7 @@ class FakerData:
             name = self.faker.name()
         return name
 
+    @pooled
     def generate_company_name(self, lan: str = "en", fix: str = None) -> str:
         """
         生成公司名
@@ -118,6 +169,7 @@ class FakerData:
 
         return name
 
+    @pooled
     def generate_paragraph(self, lan: str = "en", nb: int = 3) -> str:
         """
         生成段落
@@ -131,6 +183,7 @@ class FakerData:
 
         return text
 
+    @pooled
     def generate_words(self, lan: str = "en", nb: int = 1) -> str:
 
         """
@@ -154,6 +207,7 @@ class FakerData:
 
         return text
 
+    @pooled
     def generate_email(self, lan="en") -> str:
         """
 
@@ -183,6 +237,7 @@ class FakerData:
             ):
                 return identifier
 
+    @pooled
     def generate_city(self, lan="en", full: bool = True) -> str:
         """
         :return: 随机生成城市名
@@ -199,6 +254,7 @@ class FakerData:
 
         return city
 
+    @pooled
     def generate_province(self, lan="en") -> str:
         """
         :return: 随机生成城市名
@@ -210,6 +266,7 @@ class FakerData:
 
         return faker.province()
 
+    @pooled
     def generate_address(self, lan="en") -> str:
         """
 
@@ -282,6 +339,199 @@ class FakerData:
         iso_format_time = future_time.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
         return iso_format_time
 
+class FakerPool:
+    """
+    FakerData 的数据池：按 (随机数序列, 方法名, 参数) 分别预先生成一批数据，取值时直接从池中获取，
+    池中数据少于 watermark 时，由后台线程补充到 size 个。
+    1. 所有数据池共用一个 FakerData（每种语言一个 Faker 实例），生成数据时持有同一个锁；
+       设置 seed 后，每个数据池使用独立的随机数序列（由 seed、xdist worker、数据池确定），
+       生成前恢复该序列的随机数状态，每个池生成的数据序列固定，不受后台补充时机、每次补充个数的影响
+    2. unique 中的方法，同一次运行中生成的数据不重复
+    3. 设置了用例种子（seed_case）的线程，从该用例自己的数据池取值，数据池的随机数序列由 (用例种子, 数据池) 确定，
+       同一个用例每次运行生成相同的数据，与用例的执行顺序、执行进程无关；用例结束（设置下一个用例种子）时丢弃这些数据池
+    """
+    # 后台线程每次持有锁时生成的数据个数，避免取值时等待太久
+    CHUNK = 20
+    # 生成不重复数据时，每个数据最多尝试的次数
+    MAX_UNIQUE_ATTEMPTS = 100
+
+    def __init__(self, size: int = 100, watermark: int = 20, unique: Iterable[str] = (), seed=None):
+        """
+        :param size: 每个数据池的大小
+        :param watermark: 数据池低于该数量时，后台线程开始补充，需要满足 0 < watermark < size
+        :param unique: 需要保证不重复的方法名
+        :param seed: 随机种子，传入后每个数据池生成的数据序列固定
+        """
+        if not 0 < watermark < size:
+            raise ValueError(f"FakerData 数据池配置错误：需要满足 0 < watermark < size，当前 watermark={watermark}，size={size}")
+        self.size = size
+        self.watermark = watermark
+        self.unique = set(unique)
+        self.seed = seed
+        # key 为 (随机数序列, 方法名, 参数, 关键字参数)，未设置 seed 且不在用例中时随机数序列为 None
+        self.pools: Dict[tuple, deque] = {}
+        self._generator: Optional[FakerData] = None
+        # 生成数据、记录不重复的数据、保存随机数状态时持有的锁
+        self._generate_lock = threading.Lock()
+        # 每个数据池随机数序列当前的随机数状态
+        self._states: Dict[tuple, tuple] = {}
+        self._issued: Dict[str, set] = {}
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._refill_keys = deque()
+        self._refill_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 当前线程正在执行的用例的种子
+        self._case = threading.local()
+
+    def reset(self, seed=None):
+        """
+        清空数据池及已生成的数据，重新设置随机种子
+        """
+        with self._lock, self._generate_lock:
+            self.seed = seed
+            self.pools.clear()
+            self._states.clear()
+            self._issued.clear()
+            self._locks.clear()
+            self._refill_keys.clear()
+
+    def seed_case(self, seed=None):
+        """
+        设置当前线程正在执行的用例的种子，None 表示取消；同时丢弃上一个用例的数据池
+        """
+        previous = getattr(self._case, "stream", None)
+        self._case.stream = None if seed is None else f"case:{seed}"
+        if previous is not None:
+            self._discard(previous)
+
+    def _discard(self, stream: str):
+        """
+        丢弃一个随机数序列的所有数据池，后台线程发现锁已被移除后不再补充
+        """
+        with self._lock, self._generate_lock:
+            for key in [key for key in self._locks if key[0] == stream]:
+                del self._locks[key]
+                self.pools.pop(key, None)
+                self._states.pop(key, None)
+
+    def _stream(self) -> Optional[str]:
+        """
+        当前线程取值使用的随机数序列：用例种子优先，其次为 seed + xdist worker
+        """
+        stream = getattr(self._case, "stream", None)
+        if stream is None and self.seed is not None:
+            stream = f"{self.seed}:{os.environ.get('PYTEST_XDIST_WORKER', 'main')}"
+        return stream
+
+    def _key_lock(self, key: tuple) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+                self.pools[key] = deque()
+            return lock
+
+    def _get_generator(self) -> "FakerData":
+        """
+        所有数据池共用的 FakerData 实例（不启用数据池），调用方需要持有 self._generate_lock
+        """
+        if self._generator is None:
+            self._generator = FakerData()
+        return self._generator
+
+    def _produce(self, key: tuple, count: int) -> list:
+        """
+        生成数据，数据池有随机数序列时，从该序列上次的随机数状态继续生成
+        """
+        stream, name, args, kwargs = key
+        values = []
+        with self._generate_lock:
+            generator = self._get_generator()
+            method = getattr(generator, name)
+            issued = self._issued.setdefault(name, set()) if name in self.unique else None
+            if stream is not None:
+                state = self._states.get(key)
+                if state is None:
+                    generator.rng.seed(f"{stream}:{key[1:]}")
+                else:
+                    generator.rng.setstate(state)
+            for _ in range(count):
+                for _ in range(self.MAX_UNIQUE_ATTEMPTS):
+                    value = method(*args, **dict(kwargs))
+                    if issued is None or value not in issued:
+                        break
+                else:
+                    raise ValueError(f"{name} 尝试 {self.MAX_UNIQUE_ATTEMPTS} 次仍无法生成不重复的数据")
+                if issued is not None:
+                    issued.add(value)
+                values.append(value)
+            # 数据池已经被丢弃时不再保存随机数状态
+            if stream is not None and key in self._locks:
+                self._states[key] = generator.rng.getstate()
+        return values
+
+    def get(self, name: str, args: tuple = (), kwargs: dict = None):
+        """
+        从数据池中取一个值，数据池为空时直接生成
+        """
+        key = (self._stream(), name, args, tuple(sorted((kwargs or {}).items())))
+        try:
+            lock = self._key_lock(key)
+        except TypeError:
+            # 参数不可哈希，不使用数据池
+            with self._generate_lock:
+                return getattr(self._get_generator(), name)(*args, **(kwargs or {}))
+        pool = self.pools[key]
+        try:
+            # 数据池中有数据时直接取值，不等待后台线程补充
+            value, hit = pool.popleft(), True
+        except IndexError:
+            # 后台线程正在补充时等待补充完成，保证数据按生成顺序取出
+            with lock:
+                hit = bool(pool)
+                value = pool.popleft() if hit else self._produce(key, 1)[0]
+        need_refill = len(pool) < self.watermark
+        record_cache("faker_pool", hit)
+        if need_refill:
+            self._request_refill(key)
+        return value
+
+    def _request_refill(self, key: tuple):
+        with self._lock:
+            if key not in self._refill_keys:
+                self._refill_keys.append(key)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._refill_loop, name="faker-pool-refill", daemon=True)
+                self._thread.start()
+        self._refill_event.set()
+
+    def _refill_loop(self):
+        """
+        后台线程：补充数据池
+        """
+        while True:
+            self._refill_event.wait()
+            with self._lock:
+                key = self._refill_keys.popleft() if self._refill_keys else None
+                lock = self._locks.get(key)
+                if key is None:
+                    self._refill_event.clear()
+                    continue
+            if lock is None:
+                continue
+            try:
+                while True:
+                    with lock:
+                        pool = self.pools.get(key)
+                        # 数据池已经被 reset 清空，不再补充
+                        if pool is None or self._locks.get(key) is not lock or len(pool) >= self.size:
+                            break
+                        pool.extend(self._produce(key, min(self.CHUNK, self.size - len(pool))))
+            except Exception as e:
+                logger.warning(f"补充测试数据池失败：{key[1]}，{e}")
+
+
 if __name__ == '__main__':
     faker = FakerData()
     res = faker.generate_iso_8601_time()
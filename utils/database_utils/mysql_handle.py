@@ -4,11 +4,11 @@
 # @Desc: 
 
 import json
-import pymysql
 from typing import Union
 from loguru import logger
 from datetime import datetime
-from sshtunnel import SSHTunnelForwarder
+from core.metrics_utils.tracing import tracer
+from core.metrics_utils.metrics_exporter import DB_CONNECTIONS
 
 class MysqlServer:
     """
@@ -29,9 +29,12 @@ class MysqlServer:
                      f"ssh: {ssh}\n" \
                      f"kwargs: {kwargs}\n" \
                      "=====================================================")
+        # pymysql、sshtunnel 只在连接数据库时导入，不使用数据库的运行不需要加载
+        import pymysql
         self.server = None
         try:
             if ssh:
+                from sshtunnel import SSHTunnelForwarder
                 self.server = SSHTunnelForwarder(
                     ssh_address_or_host=(kwargs.get("ssh_host"), int(kwargs.get("ssh_port"))),  # ssh 目标服务器 ip 和 port
                     ssh_username=kwargs.get("ssh_user"),  # ssh 目标服务器用户名
@@ -53,6 +56,7 @@ class MysqlServer:
                                         )
             # 创建一个游标对象
             self.cursor = self.conn.cursor()
+            DB_CONNECTIONS.inc()
         except Exception as e:
             logger.error(f"数据库连接失败：{e}")
 
@@ -65,18 +69,21 @@ class MysqlServer:
             self.cursor.close()
             # 关闭数据库链接
             self.conn.close()
+            DB_CONNECTIONS.dec()
             # 如果开启了SSH隧道，则关闭
             if self.server:
                 self.server.close()
         except AttributeError as error:
             logger.error("数据库连接失败，失败原因 %s", error)
 
+    @tracer.traced("mysql.query_all", "database")
     def query_all(self, sql):
         """
         查询所有符合sql条件的数据
         :param sql: 执行的sql
         :return: 查询结果
         """
+        tracer.current_span().set_attributes(sql=sql)
         try:
             self.conn.commit()
             self.cursor.execute(sql)
@@ -91,12 +98,14 @@ class MysqlServer:
             logger.error(f"{sql} --> 报错: {e}")
             raise e
 
+    @tracer.traced("mysql.query_one", "database")
     def query_one(self, sql):
         """
         查询符合sql条件的数据的第一条数据
         :param sql: 执行的sql
         :return: 返回查询结果的第一条数据
         """
+        tracer.current_span().set_attributes(sql=sql)
         try:
             self.conn.commit()
             self.cursor.execute(sql)
@@ -111,11 +120,13 @@ class MysqlServer:
             logger.error(f"{sql} --> 报错: {e}")
             raise e
 
+    @tracer.traced("mysql.insert", "database")
     def insert(self, sql):
         """
         插入数据
         :param sql: 执行的sql
         """
+        tracer.current_span().set_attributes(sql=sql)
         try:
             self.cursor.execute(sql)
             # 提交  只要数据库更新就要commit
@@ -129,11 +140,13 @@ class MysqlServer:
             logger.error(f"{sql} --> 报错: {e}")
             raise e
 
+    @tracer.traced("mysql.update", "database")
     def update(self, sql):
         """
         更新数据
         :param sql: 执行的sql
         """
+        tracer.current_span().set_attributes(sql=sql)
         try:
             self.cursor.execute(sql)
             # 提交 只要数据库更新就要commit
@@ -3,10 +3,10 @@
 # @File    : excel_handle.py
 # @Desc: 操作excel文件的类
 
-import openpyxl
-
-
 class ExcelHandle:
+    """
+    openpyxl 导入耗时较长，只在真正读写 excel 文件时才导入
+    """
 
     def __init__(self, filename):
         """
@@ -19,6 +19,7 @@ class ExcelHandle:
         """
         创建excel文件，需要指定excel文件的绝对路径，如D:\test\test.xlsx
         """
+        import openpyxl
         # 创建文件对象
         wb = openpyxl.Workbook()
         # 创建excel文件
@@ -49,6 +50,7 @@ class ExcelHandle:
         :param sheet: 表单名称
         :return: 返回读取的excel数据，是一个列表
         """
+        import openpyxl
         # 创建一个工作簿工作对象(excel文件已存在的情况)
         workbook = openpyxl.open(self.filename)
         # 跟上面那句一个意思 workbook = openpyxl.load_workbook(self.file)
@@ -78,6 +80,7 @@ class ExcelHandle:
         :param data: 要写入的数据
         :return: None
         """
+        import openpyxl
         workbook = openpyxl.open(self.filename)
         # 获取excel当中所有的sheet，返回的是一个列表
         sheets = workbook.sheetnames
@@ -6,12 +6,12 @@ import os
 import csv
 import yaml
 import json
-import zipfile
 import shutil
 import base64
 import re
 from loguru import logger
 from typing import Dict, Text, List
+from utils.files_utils.zip_handle import deflate_cache, parallel_zip
 
 
 
@@ -177,7 +177,7 @@ def get_newest_file(dir_path):
 
 def zip_file(in_path: str, out_path: str):
     """
-    压缩指定文件夹
+    压缩指定文件夹，多个文件并行压缩，并复用内容相同的文件的压缩结果
     :param in_path: 目标文件夹路径
     :param out_path: 压缩文件保存路径+xxxx.zip
     :return: 无
@@ -185,17 +185,7 @@ def zip_file(in_path: str, out_path: str):
     # 如果传入的路径是一个目录才进行压缩操作
     if os.path.isdir(in_path):
         logger.trace(f"目标路径:{in_path} 是一个目录，开始进行压缩......")
-        # 写入
-        zip = zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED)
-        for path, dirnames, filenames in os.walk(in_path):
-            # 去掉目标跟路径，只对目标文件夹下边的文件及文件夹进行压缩
-            fpath = path.replace(in_path, '')
-            for filename in filenames:
-                zip.write(
-                    os.path.join(
-                        path, filename), os.path.join(
-                        fpath, filename))
-        zip.close()
+        parallel_zip(in_path=in_path, out_path=out_path, cache=deflate_cache)
         logger.debug(f"目标路径:{in_path} 压缩完成！, 压缩文件路径：{out_path}")
     else:
         logger.error(f"目标路径:{in_path} 不是一个目录，请检查！")
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : zip_handle.py
+# @Desc: 多线程压缩模块，多个文件并行压缩后按顺序写入压缩包，并按文件内容缓存压缩结果
+
+import os
+import time
+import zlib
+import struct
+import hashlib
+import zipfile
+import threading
+from collections import deque
+from loguru import logger
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import REPORT_BUILD, REPORT_ZIP_CACHE_DIR
+
+# 压缩结果：(CRC32, 原始大小, deflate 压缩后的数据)
+Entry = Tuple[int, int, bytes]
+_DISK_HEADER = struct.Struct(">IQ")
+
+
+def deflate(data: bytes, level: int = REPORT_BUILD["zip_level"]) -> Entry:
+    """
+    压缩数据，zlib 压缩时会释放 GIL，可以在多个线程中并行执行
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return zlib.crc32(data), len(data), compressor.compress(data) + compressor.flush()
+
+
+class DeflateCache:
+    """
+    按文件内容的 sha1 缓存压缩结果：
+    1. 内存缓存：运行过程中预先压缩的附件，生成报告后内容相同的文件直接使用，本次压缩结束后清空
+    2. 磁盘缓存：较大的文件（报告的 app.js 等静态资源）每次运行内容相同，压缩结果保存到磁盘，下次运行直接使用
+    """
+
+    def __init__(self, cache_dir: str = REPORT_ZIP_CACHE_DIR, level: int = REPORT_BUILD["zip_level"],
+                 max_memory: int = REPORT_BUILD["precompress_max_bytes"],
+                 disk_min_size: int = REPORT_BUILD["disk_cache_min_size"]):
+        self.cache_dir = cache_dir
+        self.level = level
+        self.max_memory = max_memory
+        self.disk_min_size = disk_min_size
+        self._memory = {}
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def _disk_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}-{self.level}.deflate")
+
+    def _get(self, digest: str, size: int) -> Optional[Entry]:
+        with self._lock:
+            entry = self._memory.get(digest)
+        if entry is not None or size < self.disk_min_size:
+            return entry
+        path = self._disk_path(digest)
+        try:
+            with open(path, "rb") as f:
+                crc, file_size = _DISK_HEADER.unpack(f.read(_DISK_HEADER.size))
+                data = f.read()
+            # 更新使用时间，清理缓存时保留最近使用的文件
+            os.utime(path)
+            return crc, file_size, data
+        except (OSError, struct.error):
+            return None
+
+    def _save_disk(self, digest: str, entry: Entry):
+        path = self._disk_path(digest)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_DISK_HEADER.pack(entry[0], entry[1]))
+            f.write(entry[2])
+        os.replace(tmp_path, path)
+
+    def compress_file(self, path: str, remember: bool = False) -> Entry:
+        """
+        压缩文件，优先使用缓存
+        :param remember: 是否将压缩结果保存到内存缓存中（预先压缩时使用）
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        entry = self._get(digest, len(data))
+        if entry is not None:
+            return entry
+        entry = deflate(data, self.level)
+        if len(data) >= self.disk_min_size:
+            self._save_disk(digest, entry)
+        elif remember:
+            with self._lock:
+                if self._memory_bytes + len(entry[2]) <= self.max_memory:
+                    self._memory[digest] = entry
+                    self._memory_bytes += len(entry[2])
+        return entry
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def prune(self, days: int = REPORT_BUILD["disk_cache_days"]):
+        """
+        删除超过 days 天未使用的磁盘缓存
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        expire = time.time() - days * 86400
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if os.path.getmtime(path) < expire:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def _write_entry(zf: zipfile.ZipFile, path: str, arcname: str, entry: Entry):
+    """
+    将已压缩的数据直接写入压缩包，不再由 zipfile 重新压缩
+    """
+    crc, size, data = entry
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC, zinfo.file_size, zinfo.compress_size = crc, size, len(data)
+    zip64 = size > zipfile.ZIP64_LIMIT or len(data) > zipfile.ZIP64_LIMIT
+    zinfo.header_offset = zf.fp.tell()
+    zf.fp.write(zinfo.FileHeader(zip64))
+    zf.fp.write(data)
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf.start_dir = zf.fp.tell()
+    zf._didModify = True
+
+
+def parallel_zip(in_path: str, out_path: str, workers: Optional[int] = REPORT_BUILD["zip_workers"],
+                 cache: Optional[DeflateCache] = None) -> int:
+    """
+    多线程压缩文件夹：每个文件在线程池中压缩，再按目录遍历顺序写入压缩包
+    :param in_path: 目标文件夹路径
+    :param out_path: 压缩文件保存路径+xxxx.zip
+    :param workers: 压缩线程数，None 表示 CPU 核数
+    :param cache: 压缩结果缓存
+    :return: 压缩的文件数
+    """
+    cache = cache or DeflateCache()
+    workers = workers or os.cpu_count() or 1
+    files = [(os.path.join(path, filename), os.path.relpath(os.path.join(path, filename), in_path))
+             for path, _, filenames in os.walk(in_path) for filename in filenames]
+    with zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as zf, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zip") as executor:
+        # 最多同时保留 workers * 4 个已压缩但未写入的文件，避免大量压缩结果占用内存
+        pending = deque()
+        for path, arcname in files:
+            pending.append((path, arcname, executor.submit(cache.compress_file, path)))
+            if len(pending) >= workers * 4:
+                path_, arcname_, future = pending.popleft()
+                _write_entry(zf, path_, arcname_, future.result())
+        while pending:
+            path_, arcname_, future = pending.popleft()
+            _write_entry(zf, path_, arcname_, future.result())
+    logger.debug(f"压缩完成：{len(files)} 个文件，{workers} 个线程，压缩文件路径：{out_path}")
+    return len(files)
+
+
+# 当前进程共用的压缩结果缓存
+deflate_cache = DeflateCache()
@@ -18,10 +18,11 @@ class DingTalkBot:
     钉钉机器人
     """
 
-    def __init__(self, webhook_url, secret=None):
+    def __init__(self, webhook_url, secret=None, timeout=None):
         """
         :param secret: 安全设置的加签秘钥
         :param webhook_url: 机器人没有加签的WebHook_url
+        :param timeout: 请求超时时间，单位：秒
         """
         # 适配钉钉机器人的加签模式和关键字模式/白名单IP模式
         if secret:
@@ -31,6 +32,7 @@ class DingTalkBot:
         else:
             self.webhook_url = webhook_url
 
+        self.timeout = timeout
         self.headers = {
             "Content-Type": "application/json",
             "Charset": "UTF-8"
@@ -65,7 +67,8 @@ class DingTalkBot:
             url=self.webhook_url,
             json=payload,
             headers=self.headers,
-            method="POST"
+            method="POST",
+            timeout=self.timeout
         )
         if response.json().get("errcode") == 0:
             logger.debug("\n======================================================\n" \
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : notify_dispatcher.py
+# @Desc: 通知后台发送模块，多个渠道在后台线程中并发发送，失败后按退避时间重试，不阻塞运行结束
+
+import time
+import atexit
+import threading
+from loguru import logger
+from typing import Callable, List
+from concurrent.futures import Future, wait
+from config.settings import NOTIFY
+
+
+def retry_call(func: Callable[[], bool], name: str, retries: int = NOTIFY["retries"],
+               backoff: float = NOTIFY["backoff"]) -> bool:
+    """
+    调用发送函数，返回 False 或抛出异常时按退避时间重试
+    :param func: 发送函数，发送成功返回 True
+    :param name: 发送内容的名称，用于日志
+    :return: 是否发送成功
+    """
+    for attempt in range(retries + 1):
+        try:
+            if func():
+                return True
+            error = "发送结果为失败"
+        except Exception as e:
+            error = e
+        if attempt < retries:
+            delay = backoff * 2 ** attempt
+            logger.warning(f"{name}失败，{delay} 秒后第 {attempt + 1} 次重试：{error}")
+            time.sleep(delay)
+        else:
+            logger.error(f"{name}失败，已重试 {retries} 次：{error}")
+    return False
+
+
+class NotifyDispatcher:
+    """
+    通知后台发送：
+    1. 每个渠道在独立的后台线程中发送，多个渠道并发，慢的渠道（例如 SMTP 服务）不影响其他渠道
+    2. submit 立即返回 Future，运行结束不等待通知发送完成，常驻进程模式下通知在进程中继续发送
+    3. 程序退出前最多等待 exit_wait 秒，超时后放弃未发送完成的通知
+    """
+
+    def __init__(self, exit_wait: float = NOTIFY["exit_wait"]):
+        self.exit_wait = exit_wait
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        atexit.register(self._wait_at_exit)
+
+    def submit(self, name: str, func: Callable, *args, **kwargs) -> Future:
+        """
+        在后台线程中调用发送函数
+        :param name: 渠道名称，用于日志
+        """
+        future = Future()
+
+        def target():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                logger.error(f"发送{name}异常，错误信息：{e}")
+                future.set_exception(e)
+
+        with self._lock:
+            self._futures = [f for f in self._futures if not f.done()]
+            self._futures.append(future)
+        # 守护线程：程序退出时不会无限等待，由 _wait_at_exit 控制最长等待时间
+        threading.Thread(target=target, name=f"notify-{name}", daemon=True).start()
+        return future
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        等待已提交的通知发送完成
+        :return: 是否全部发送完成
+        """
+        with self._lock:
+            futures = list(self._futures)
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def _wait_at_exit(self):
+        with self._lock:
+            pending = [f for f in self._futures if not f.done()]
+        if not pending:
+            return
+        logger.info(f"等待 {len(pending)} 个通知发送完成，最多等待 {self.exit_wait} 秒")
+        if not self.wait(self.exit_wait):
+            logger.warning(f"通知超过 {self.exit_wait} 秒未发送完成，程序退出，不再等待")
+
+
+# 当前进程共用的通知发送器
+notify_dispatcher = NotifyDispatcher()
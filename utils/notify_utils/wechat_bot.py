@@ -9,6 +9,8 @@ import base64
 import hashlib
 from loguru import logger
 from requests import request
+from urllib.parse import urlsplit
+from requests_toolbelt import MultipartEncoder
 
 
 class WechatBot:
@@ -18,11 +20,13 @@ class WechatBot:
     机器人的text/markdown类型消息支持在content中使用<@userid>扩展语法来@群成员
     """
 
-    def __init__(self, webhook_url):
+    def __init__(self, webhook_url, timeout=None):
         """
         :param webhook_url: 机器人的WebHook_url
+        :param timeout: 请求超时时间，单位：秒
         """
         self.webhook_url = webhook_url
+        self.timeout = timeout
         self.headers = {
             "Content-Type": "application/json",
             "Charset": "UTF-8"
@@ -42,7 +46,8 @@ class WechatBot:
             url=self.webhook_url,
             json=payload,
             headers=self.headers,
-            method="POST"
+            method="POST",
+            timeout=self.timeout
         )
         if response.json().get("errcode") == 0:
             logger.debug("\n======================================================\n" \
@@ -145,13 +150,14 @@ class WechatBot:
         token_regex = r"key=([\w-]+)"
         match = re.search(token_regex, self.webhook_url)
         token = match.group(1)
-        url = f"https://qyapi.weixin.qq.com/cgi-bin/webhook/upload_media?key={token}&type=file"
-        headers = {
-            "Content-Type": "multipart/form-data;"
-        }
+        # 上传地址与 webhook 使用同一个服务地址，可以使用本地模拟的服务调试
+        parsed = urlsplit(self.webhook_url)
+        url = f"{parsed.scheme}://{parsed.netloc}/cgi-bin/webhook/upload_media?key={token}&type=file"
         with open(file_path, "rb") as f:
-            files = {"media": (os.path.basename(file_path), f.read())}
-        response = request(url=url, method="POST", files=files, headers=headers)
+            # 流式上传：边读取文件边发送，不需要把整个文件读取到内存中
+            encoder = MultipartEncoder(fields={"media": (os.path.basename(file_path), f, "application/octet-stream")})
+            response = request(url=url, method="POST", data=encoder, headers={"Content-Type": encoder.content_type},
+                               timeout=self.timeout)
         if response.json().get("errcode") == 0:
             media_id = response.json().get("media_id")
             print(f"上传文件成功，media_id= {media_id}")
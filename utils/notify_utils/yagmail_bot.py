@@ -4,17 +4,20 @@
 # @Desc: 邮箱通知模块
 
 import os
-import yagmail
 from loguru import logger
 
 class YagEmailServe:
-    def __init__(self, host, user, password):
+    def __init__(self, host, user, password, port=None, smtp_ssl=True, timeout=None):
         """
         user(发件人邮箱), password(邮箱授权码), host(发件人使用的邮箱服务 例如：smtp.163.com)
+        port(SMTP端口，不传时SSL使用465，否则使用587), smtp_ssl(是否使用SSL连接), timeout(连接、发送超时时间，单位：秒)
         """
         self.host = host
         self.user = user
         self.password = password
+        self.port = port
+        self.smtp_ssl = smtp_ssl
+        self.timeout = timeout
 
     def send_email(self, info: dict):
         """
@@ -26,7 +29,7 @@ class YagEmailServe:
             "to": "",
             "files": ""
         }
-        :return:
+        :return: 是否发送成功
         """
         try:
             logger.info("\n======================================================\n" \
@@ -36,10 +39,18 @@ class YagEmailServe:
                          f"host: {self.host}\n" \
                          f"邮件内容: {info}\n" \
                          "=====================================================")
+            # yagmail 只在发送邮件时导入，未配置邮件通知的运行不需要加载
+            import yagmail
+            # 未配置密码时不登录，例如本地调试用的 SMTP 服务
             yag = yagmail.SMTP(
                 user=self.user,
                 password=self.password,
-                host=self.host)
+                host=self.host,
+                port=self.port,
+                smtp_ssl=self.smtp_ssl,
+                smtp_starttls=None if self.smtp_ssl or self.password else False,
+                smtp_skip_login=not self.password,
+                timeout=self.timeout)
             # 如果存在附件，则与邮件内容一起发送附件，否则仅发送邮件内容
             if info.get("attachments") and os.path.exists(info['attachments']):
                 yag.send(
@@ -60,5 +71,7 @@ class YagEmailServe:
                         "-------------End：发送邮件--------------------\n"
                         "发送邮件成功\n" \
                         "=====================================================")
+            return True
         except Exception as e:
             logger.error(f"发送邮件失败，错误信息: {e}")
+            return False
@@ -38,7 +38,6 @@ AES补全模式常见有以下几种：
 
 """
 import base64
-from Crypto.Cipher import AES
 
 
 class Encrypt:
@@ -63,6 +62,7 @@ class Encrypt:
 
     def aes_encrypt(self, content):
         """ AES加密 """
+        from Crypto.Cipher import AES
         cipher = AES.new(self.key, AES.MODE_CBC, self.iv)
         # 处理明文
         content_padding = self.pkcs7padding(content)
@@ -74,6 +74,7 @@ class Encrypt:
 
     def aes_decrypt(self, content):
         """AES解密 """
+        from Crypto.Cipher import AES
         cipher = AES.new(self.key, AES.MODE_CBC, self.iv)
         content = base64.b64decode(content)
         text = cipher.decrypt(content).decode('utf-8')
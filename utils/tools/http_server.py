@@ -4,34 +4,61 @@
 # @Desc: HTTP服务器模块
 import os
 import sys
+import threading
 import http.server
 import socketserver
 from functools import partial
 
 
+class _QuietHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    不输出访问日志的请求处理类
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+
 class HttpServer:
-    def __init__(self, bind: str = "127.0.0.1", port: int = 8000, directory=os.getcwd()):
+    def __init__(self, bind: str = "127.0.0.1", port: int = 8000, directory=os.getcwd(), quiet: bool = False):
         """
         :param bind: 指定地址，如本地主机
-        :param port: 自定义端口号, 服务器默认监听端口是 8000
+        :param port: 自定义端口号, 服务器默认监听端口是 8000，0 表示使用随机空闲端口
         :param directory: 指定工作目录, 服务器默认工作目录为当前目录
+        :param quiet: 是否关闭访问日志
         """
         self.bind = bind
         self.port = port
         self.directory = directory
-        args = sys.argv
-        for i in range(1, len(args)):
-            if args[i] == "-port" and i + 1 < len(args):
-                self.port = int(args[i + 1])
-            if args[i] == "-dir" and i + 1 < len(args):
-                self.directory = args[i + 1]
-            if args[i] == "-bind" and i + 1 < len(args):
-                self.bind = args[i + 1]
+        self.quiet = quiet
+        self.httpd = None
+
+    def _server(self):
+        handler = _QuietHTTPRequestHandler if self.quiet else http.server.SimpleHTTPRequestHandler
+        return socketserver.TCPServer((self.bind, self.port), partial(handler, directory=self.directory))
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.bind}:{self.port}"
+
+    def start(self):
+        """
+        在后台线程中启动服务，不阻塞当前线程，例如基准测试、调试时作为本地接口服务使用
+        """
+        self.httpd = self._server()
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, name="http-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
 
     def run(self):
         try:
-            with socketserver.TCPServer((self.bind, self.port), partial(http.server.SimpleHTTPRequestHandler,
-                                                                        directory=self.directory)) as httpd:
+            with self._server() as httpd:
                 print(
                     f"工作目录：{self.directory}\n"
                     f"Serving HTTP on {self.bind} port {self.port} \n"
@@ -43,6 +70,31 @@ class HttpServer:
             sys.exit(0)
 
 
+def parse_args(args: list) -> dict:
+    """
+    解析命令行参数：-port 端口、-dir 工作目录、-bind 地址
+    """
+    kwargs = {}
+    for i in range(1, len(args) - 1):
+        if args[i] == "-port":
+            kwargs["port"] = int(args[i + 1])
+        if args[i] == "-dir":
+            kwargs["directory"] = args[i + 1]
+        if args[i] == "-bind":
+            kwargs["bind"] = args[i + 1]
+    return kwargs
+
+
 if __name__ == '__main__':
-    server = HttpServer()
+    kwargs = parse_args(sys.argv)
+    if "-mock" in sys.argv:
+        # 模拟接口服务：python utils/tools/http_server.py -mock -port 18000 -dir interfaces
+        # 直接运行脚本时，将项目根目录加入导入路径
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        from utils.tools.mock_server import MockServer
+        if "directory" in kwargs:
+            kwargs["interface_dir"] = kwargs.pop("directory")
+        server = MockServer(**kwargs)
+    else:
+        server = HttpServer(**kwargs)
     server.run()
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : mock_server.py
+# @Desc: 本地模拟接口服务模块，根据 interfaces 目录中的 YAML、Excel 用例生成路由，用于离线运行、压测、基准测试
+
+import os
+import re
+import ast
+import json
+import math
+import time
+import random
+import socket
+import threading
+from loguru import logger
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from config.settings import INTERFACE_DIR, MOCK_SERVER
+from utils.tools.http_server import HttpServer
+from utils.files_utils.files_handle import load_yaml_file, get_files
+
+# 简单的 JSONPath：$.data.list[0].name、$['data']['name']，不支持 ..、*、过滤表达式
+JSONPATH_TOKEN_PATTERN = re.compile(r"\.([^.\[\]]+)|\[(\d+)\]|\[['\"]([^'\"]+)['\"]\]")
+# 响应值等于预期值的断言类型
+EQUALS_ASSERT_TYPES = ("==", "str_eq", "contains")
+LATENCY_DISTRIBUTIONS = ("none", "fixed", "uniform", "normal", "lognormal")
+
+
+def parse_jsonpath(expr: str) -> Optional[List]:
+    """
+    解析简单的 JSONPath，返回字段名、下标组成的列表，不支持的表达式返回 None
+    """
+    if not isinstance(expr, str) or not expr.startswith("$"):
+        return None
+    tokens, position = [], 1
+    while position < len(expr):
+        match = JSONPATH_TOKEN_PATTERN.match(expr, position)
+        if not match or "*" in match.group(0) or expr.startswith("..", position):
+            return None
+        name, index, quoted = match.groups()
+        tokens.append(int(index) if index is not None else name if name is not None else quoted)
+        position = match.end()
+    return tokens
+
+
+def set_path(root: dict, tokens: List, value, overwrite: bool = True) -> bool:
+    """
+    按 parse_jsonpath 的结果设置值，中间的字典、列表不存在时自动创建；路径与已有数据的类型冲突时不设置
+    :return: 是否设置成功
+    """
+    if not tokens:
+        return False
+    node = root
+    for token, next_token in zip(tokens, tokens[1:] + [None]):
+        if isinstance(token, int):
+            if not isinstance(node, list):
+                return False
+            node.extend([None] * (token + 1 - len(node)))
+        elif not isinstance(node, dict):
+            return False
+        if next_token is None:
+            exists = node[token] is not None if isinstance(token, int) else token in node
+            if overwrite or not exists:
+                node[token] = value
+            return True
+        child = node[token] if isinstance(token, int) else node.get(token)
+        if child is None:
+            child = [] if isinstance(next_token, int) else {}
+            node[token] = child
+        node = child
+    return False
+
+
+def sample_latency(spec: dict, rng: random.Random) -> float:
+    """
+    按延迟分布生成一次响应延迟，单位：秒
+    """
+    distribution = spec.get("distribution", "none")
+    mean, stdev = float(spec.get("mean", 0)), float(spec.get("stdev", 0))
+    if distribution == "none":
+        return 0.0
+    if distribution == "fixed":
+        value = mean
+    elif distribution == "uniform":
+        value = rng.uniform(float(spec.get("min", 0)), float(spec.get("max", mean)))
+    elif distribution == "normal":
+        value = rng.gauss(mean, stdev)
+    elif distribution == "lognormal":
+        # 根据期望值、标准差计算对数正态分布的参数
+        sigma2 = math.log(1 + (stdev / mean) ** 2) if mean > 0 else 0.0
+        value = rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2)) if mean > 0 else 0.0
+    else:
+        raise ValueError(f"不支持的延迟分布：{distribution}，可选值：{LATENCY_DISTRIBUTIONS}")
+    value = min(max(value, float(spec.get("min", 0))), float(spec.get("max", value)))
+    return value / 1000
+
+
+class MockRoute:
+    """
+    一个路由：固定的响应内容，以及该路由的延迟分布、错误注入比例
+    """
+
+    def __init__(self, method: str, path: str, status: int = 200, body=None, headers: dict = None,
+                 latency: dict = None, error_rate: float = 0.0, error_status: int = 500):
+        self.method = method
+        self.path = path
+        self.status = status
+        self.body = body if body is not None else {}
+        self.headers = dict(headers or {})
+        self.latency = latency or {}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.case_ids: List[str] = []
+        self.hits = 0
+        self.pattern = re.compile("^" + "/".join("[^/]+" if "$" in part else re.escape(part)
+                                                  for part in path.split("/")) + "$") if "$" in path else None
+        self.encode()
+
+    def encode(self):
+        """
+        预先序列化响应内容，处理请求时直接发送
+        """
+        if isinstance(self.body, (bytes, str)):
+            self.content = self.body.encode("utf-8") if isinstance(self.body, str) else self.body
+            self.headers.setdefault("Content-Type", "text/plain; charset=utf-8")
+        else:
+            self.content = json.dumps(self.body, ensure_ascii=False).encode("utf-8")
+            self.headers.setdefault("Content-Type", "application/json; charset=utf-8")
+
+    def update(self, override: dict):
+        """
+        使用 MOCK_SERVER["routes"] 中的配置覆盖路由
+        """
+        self.status = override.get("status", self.status)
+        if "body" in override:
+            # 响应内容的类型可能变化，重新确定 Content-Type
+            self.body = override["body"]
+            self.headers.pop("Content-Type", None)
+        self.headers.update(override.get("headers") or {})
+        self.latency = dict(self.latency, **(override.get("latency") or {}))
+        self.error_rate = override.get("error_rate", self.error_rate)
+        self.error_status = override.get("error_status", self.error_status)
+        self.encode()
+
+    def to_dict(self) -> dict:
+        return {"method": self.method, "path": self.path, "status": self.status, "case_ids": self.case_ids,
+                "latency": self.latency, "error_rate": self.error_rate, "hits": self.hits}
+
+
+def _literal(value):
+    """
+    Excel 用例中的断言、提取参数可能是 Python 字面量格式的字符串，例如：{'token': '$.data.token'}，无法解析时原样返回
+    """
+    if isinstance(value, str) and value.strip().startswith("{"):
+        try:
+            return ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            return value
+    return value
+
+
+def url_path(url: str) -> Optional[str]:
+    """
+    获取用例 url 的路径部分：去掉 ${host}、协议、域名及查询参数
+    """
+    if not isinstance(url, str) or not url:
+        return None
+    url = re.sub(r"^\$\{[^}]*\}", "", url.strip())
+    if url.lower().startswith(("http://", "https://")):
+        url = urlsplit(url).path
+    path = url.split("?")[0]
+    return path if path.startswith("/") else f"/{path}"
+
+
+class MockRoutes:
+    """
+    路由表：method + 路径 -> MockRoute，路径中包含 ${var} 的路由按正则匹配
+    """
+
+    def __init__(self, config: dict = MOCK_SERVER):
+        self.config = config
+        self.exact: Dict[Tuple[str, str], MockRoute] = {}
+        self.patterns: List[MockRoute] = []
+        self.rng = random.Random(config.get("seed"))
+        self.lock = threading.Lock()
+        distribution = config["latency"].get("distribution", "none")
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"不支持的延迟分布：{distribution}，可选值：{LATENCY_DISTRIBUTIONS}")
+
+    def add(self, method: str, path: str) -> MockRoute:
+        key = (method.upper(), path)
+        route = self.exact.get(key) or next((r for r in self.patterns if (r.method, r.path) == key), None)
+        if route is None:
+            route = MockRoute(method.upper(), path, latency=dict(self.config["latency"]),
+                              error_rate=self.config["error_rate"], error_status=self.config["error_status"])
+            if route.pattern is None:
+                self.exact[key] = route
+            else:
+                self.patterns.append(route)
+        return route
+
+    def add_case(self, case: dict):
+        """
+        根据用例生成路由：
+        1. 状态码断言作为响应状态码
+        2. 使用简单 JSONPath 的等值断言，将预期值写入响应内容
+        3. 参数提取使用的 JSONPath 写入占位值，保证提取不会失败
+        同一个路由对应多个用例时，以第一个用例为准，后面的用例只补充不存在的字段
+        """
+        method = str(case.get("method") or "").upper()
+        path = url_path(case.get("url"))
+        if not method or method == "GRPC" or not path:
+            return
+        route = self.add(method, path)
+        first = not route.case_ids
+        route.case_ids.append(str(case.get("id")))
+        asserts = _literal(case.get("assert_response") or case.get("validate")) or {}
+        if not isinstance(asserts, dict):
+            asserts = {}
+        for key, value in asserts.items():
+            if str(key).lower() == "status_code":
+                if first and isinstance(value, int):
+                    route.status = value
+            elif isinstance(value, dict) and value.get("assert_type") in EQUALS_ASSERT_TYPES:
+                tokens = parse_jsonpath(value.get("type_jsonpath"))
+                if tokens:
+                    set_path(route.body, tokens, value.get("expect_value"), overwrite=first)
+        extract = _literal(case.get("extract")) or {}
+        if isinstance(extract, dict) and "response" in extract:
+            extract = (extract.get("response") or {}).get("type_jsonpath") or {}
+        # Excel 用例的提取参数为 {变量名: JSONPath}
+        if isinstance(extract, dict):
+            for name, expr in extract.items():
+                tokens = parse_jsonpath(expr)
+                if tokens:
+                    set_path(route.body, tokens, f"mock_{name}", overwrite=False)
+        route.encode()
+
+    @classmethod
+    def from_cases(cls, interface_dir: str = INTERFACE_DIR, config: dict = MOCK_SERVER) -> "MockRoutes":
+        """
+        读取接口目录中的 YAML、Excel 用例生成路由，再使用 config["routes"] 覆盖、补充
+        """
+        routes = cls(config)
+        files = get_files(target=interface_dir, end=".yaml") + get_files(target=interface_dir, end=".yml")
+        excel_files = [file for file in get_files(target=interface_dir, end=".xlsx")
+                       if not os.path.basename(file).startswith("~$")]
+        for file in files + excel_files:
+            try:
+                if file.endswith(".xlsx"):
+                    # 与生成用例时使用相同的方式读取 Excel 用例，只在存在 Excel 用例时导入
+                    from core.case_generate_utils.case_fun_generate import load_excel_case_file
+                    data = load_excel_case_file(file)
+                else:
+                    data = load_yaml_file(file) or {}
+            except Exception as e:
+                logger.warning(f"读取用例文件失败，跳过：{file}，错误信息：{e}")
+                continue
+            for case in data.get("case_info") or data.get("teststeps") or []:
+                if isinstance(case, dict):
+                    routes.add_case(case)
+        for key, override in (config.get("routes") or {}).items():
+            method, _, path = key.partition(" ")
+            routes.add(method, path).update(override)
+        return routes
+
+    def match(self, method: str, path: str) -> Optional[MockRoute]:
+        route = self.exact.get((method, path))
+        if route is None:
+            route = next((r for r in self.patterns if r.method == method and r.pattern.match(path)), None)
+        if route is None and method == "HEAD":
+            # HEAD 请求使用 GET 路由，只返回响应头
+            return self.match("GET", path)
+        return route
+
+    def all(self) -> List[MockRoute]:
+        return list(self.exact.values()) + self.patterns
+
+    def decide(self, route: MockRoute) -> Tuple[float, bool]:
+        """
+        :return: (响应延迟，是否注入错误)
+        """
+        with self.lock:
+            delay = sample_latency(route.latency, self.rng)
+            error = route.error_rate > 0 and self.rng.random() < route.error_rate
+            route.hits += 1
+        return delay, error
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """
+    模拟接口请求处理：HTTP/1.1 长连接，响应内容在启动时已序列化
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "ApiAutotestMock/1.0"
+
+    def setup(self):
+        super().setup()
+        # 响应头、响应体分开写入，关闭 Nagle 算法，避免长连接下的延迟确认等待
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _drain_body(self):
+        """
+        读取并丢弃请求体，长连接下必须读完才能处理下一个请求
+        """
+        if "chunked" in (self.headers.get("Transfer-Encoding") or "").lower():
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                self.rfile.read(size + 2)
+                if size == 0:
+                    break
+        else:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+
+    def _send(self, status: int, content: bytes, headers: dict):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(content)
+
+    def _send_json(self, status: int, data):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"),
+                   {"Content-Type": "application/json; charset=utf-8"})
+
+    def handle_request(self):
+        self._drain_body()
+        routes: MockRoutes = self.server.routes
+        path = urlsplit(self.path).path
+        if path == "/__mock__/routes":
+            self._send_json(200, [route.to_dict() for route in routes.all()])
+            return
+        route = routes.match(self.command, path)
+        if route is None:
+            self._send_json(404, {"code": 404, "message": f"mock 路由不存在：{self.command} {path}"})
+            return
+        delay, error = routes.decide(route)
+        if delay:
+            time.sleep(delay)
+        if error:
+            self._send_json(route.error_status, {"code": route.error_status, "message": "mock error injected"})
+        else:
+            self._send(route.status, route.content, route.headers)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_HEAD = do_OPTIONS = handle_request
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    # 每个连接一个线程，连接数较多时，等待处理的连接队列加大
+    request_queue_size = 256
+
+    def __init__(self, server_address, routes: MockRoutes):
+        self.routes = routes
+        super().__init__(server_address, MockRequestHandler)
+
+
+class MockServer(HttpServer):
+    """
+    本地模拟接口服务：
+    1. 根据 interfaces 目录中的 YAML 用例生成路由（method + 路径 -> 固定响应），MOCK_SERVER["routes"] 可以覆盖、补充
+    2. 多线程处理请求，支持 HTTP/1.1 长连接
+    3. 支持配置响应延迟分布、按比例注入错误响应
+    4. GET /__mock__/routes 查看所有路由及命中次数
+    """
+
+    def __init__(self, bind: str = MOCK_SERVER["host"], port: int = MOCK_SERVER["port"],
+                 interface_dir: str = INTERFACE_DIR, config: dict = MOCK_SERVER):
+        super().__init__(bind=bind, port=port, directory=interface_dir, quiet=True)
+        self.routes = MockRoutes.from_cases(self.directory, config=config)
+
+    def _server(self):
+        return _MockHTTPServer((self.bind, self.port), self.routes)
+
+    def start(self):
+        super().start()
+        logger.info(f"模拟接口服务已启动：{self.url}，共 {len(self.routes.all())} 个路由")
+        return self
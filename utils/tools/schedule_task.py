@@ -1,40 +1,107 @@
 # -*- coding: utf-8 -*-
 # @Author  : 会飞的🐟
 # @File    : schedule_task.py
-# @Desc: 
+# @Desc:
 
 import sys
 import time
 import schedule
+import threading
 import subprocess
 from loguru import logger
+from typing import Callable
+from config.settings import METRICS_DIR, METRICS_EXPORTER
+from utils.files_utils.files_handle import get_files
+from core.metrics_utils.metrics_exporter import MetricsRegistry, MetricsServer
 
-def run_task(command_args):
+
+class ScheduleMetrics:
+    """
+    定时任务的运行指标：累计每次运行的指标，运行过程中合并当前运行的实时快照，通过本地 HTTP 服务输出
+    """
+
+    def __init__(self):
+        self.history = MetricsRegistry()
+        self.runs_total = self.history.counter("api_schedule_runs_total", "定时任务运行次数", ("result",))
+        self.run_duration = self.history.gauge("api_schedule_last_run_duration_seconds", "最近一次定时任务运行耗时（秒）")
+        self.last_run = self.history.gauge("api_schedule_last_run_timestamp_seconds", "最近一次定时任务结束时间")
+        self.running = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _current_run() -> MetricsRegistry:
+        return MetricsRegistry.load(get_files(target=METRICS_DIR, start="prom_", end=".json"))
+
+    def run_started(self):
+        with self._lock:
+            self.running = True
+
+    def run_finished(self, success: bool, duration: float):
+        """
+        运行结束后，将本次运行的指标累加到历史指标中
+        """
+        with self._lock:
+            self.history.merge(self._current_run().snapshot(), gauges=False)
+            self.runs_total.inc(result="success" if success else "failed")
+            self.run_duration.set(round(duration, 3))
+            self.last_run.set(round(time.time(), 3))
+            self.running = False
+
+    def collect(self) -> str:
+        with self._lock:
+            registry = self._current_run() if self.running else MetricsRegistry()
+            return registry.merge(self.history.snapshot()).render()
+
+
+def run_task(command_args, metrics: ScheduleMetrics = None, task: Callable[[], int] = None):
     """
     执行测试任务
+    :param command_args: 传递给 run.py 的参数列表
+    :param metrics: 定时任务运行指标
+    :param task: 在当前进程中执行测试的函数（常驻进程模式），返回 pytest 退出码；不传则启动新进程执行 run.py
     """
     logger.info(f"开始执行定时任务，执行命令: {' '.join(command_args)}")
+    success = False
+    start = time.perf_counter()
+    if metrics is not None:
+        metrics.run_started()
     try:
-        # 使用当前 Python 解释器执行 run.py
-        cmd = [sys.executable, "run.py"] + command_args
-        subprocess.run(cmd, check=True)
+        if task is not None:
+            exit_code = task()
+            if exit_code:
+                raise subprocess.CalledProcessError(exit_code, command_args)
+        else:
+            # 使用当前 Python 解释器执行 run.py；子进程不接收终端输入，按非交互运行处理，运行结束后不打开报告服务
+            cmd = [sys.executable, "run.py"] + command_args
+            subprocess.run(cmd, check=True, stdin=subprocess.DEVNULL)
+        success = True
         logger.info("定时任务执行完成")
     except subprocess.CalledProcessError as e:
         logger.error(f"定时任务执行失败: {e}")
     except Exception as e:
         logger.error(f"定时任务执行出现异常: {e}")
+    finally:
+        if metrics is not None:
+            metrics.run_finished(success, time.perf_counter() - start)
 
-def start_schedule(command_args, run_time="22:00"):
+def start_schedule(command_args, run_time="22:00", task: Callable[[], int] = None):
     """
     开启定时任务
     :param command_args: 传递给 run.py 的参数列表
     :param run_time: 每天运行的时间，格式 "HH:MM"
+    :param task: 在当前进程中执行测试的函数（常驻进程模式），不传则每次启动新进程执行 run.py
     """
     logger.info(f"已开启定时任务模式，将于每天 {run_time} 自动运行测试...")
-    
+
+    # 开启指标服务，输出历次运行的累计指标以及当前运行的实时指标
+    metrics = None
+    if METRICS_EXPORTER["enabled"]:
+        metrics = ScheduleMetrics()
+        MetricsServer(metrics.collect, host=METRICS_EXPORTER["host"], port=METRICS_EXPORTER["port"]).start()
+
     # 安排任务
-    schedule.every().day.at(run_time).do(run_task, command_args)
-    
+    schedule.every().day.at(run_time).do(run_task, command_args, metrics, task)
+
     # 保持运行
     while True:
         schedule.run_pending()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : startup_profile.py
+# @Desc: 启动耗时分析模块，使用 python -X importtime 统计启动阶段各模块的导入耗时
+
+import os
+import re
+import sys
+import json
+import subprocess
+from loguru import logger
+from typing import Iterable, List
+from config.settings import BASE_DIR, REPORT_DIR
+
+# 一次测试运行在执行第一个用例之前会导入的模块
+STARTUP_MODULES = (
+    "run",
+    "pytest",
+    "conftest",
+    "core.requests_utils.request_control",
+    "core.requests_utils.case_dependence",
+    "core.case_generate_utils.case_fun_generate",
+    "core.report_utils.allure_handle",
+    "core.report_utils.send_result_handle",
+)
+
+# -X importtime 的输出格式：import time: self [us] | cumulative | imported package
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( +)(\S+)\s*$")
+
+
+def parse_import_time(output: str) -> List[dict]:
+    """
+    解析 -X importtime 的输出，depth 为导入层级，0 表示被直接导入的模块
+    """
+    records = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append({"module": name, "self_ms": int(self_us) / 1000,
+                            "cumulative_ms": int(cumulative_us) / 1000, "depth": (len(indent) - 1) // 2})
+    return records
+
+
+def profile_startup(modules: Iterable[str] = STARTUP_MODULES, top: int = 30,
+                    report_path: str = os.path.join(REPORT_DIR, "startup_profile.json")) -> dict:
+    """
+    在新的解释器进程中导入启动阶段的模块，统计每个模块的导入耗时
+    :param modules: 需要导入的模块
+    :param top: 输出耗时最长的模块个数
+    :param report_path: 结果保存路径
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BASE_DIR,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8")
+    if result.returncode != 0:
+        logger.error(f"导入模块失败：{result.stderr[-2000:]}")
+    records = parse_import_time(result.stderr)
+
+    # 按顶层包汇总自身耗时，例如 faker、openpyxl、core
+    packages = {}
+    for record in records:
+        package = record["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + record["self_ms"]
+
+    report = {
+        "total_ms": round(sum(record["self_ms"] for record in records), 3),
+        "modules": sorted(records, key=lambda record: record["cumulative_ms"], reverse=True)[:top],
+        "packages": dict(sorted(((name, round(ms, 3)) for name, ms in packages.items()),
+                                key=lambda item: item[1], reverse=True)[:top]),
+    }
+
+    lines = [f"{'模块':<60}{'自身耗时(ms)':>14}{'累计耗时(ms)':>14}"]
+    lines.extend(f"{item['module']:<60}{item['self_ms']:>14.2f}{item['cumulative_ms']:>14.2f}"
+                 for item in report["modules"])
+    lines.append("")
+    lines.append(f"{'顶层包':<60}{'自身耗时(ms)':>14}")
+    lines.extend(f"{name:<60}{ms:>14.2f}" for name, ms in report["packages"].items())
+    logger.info(f"\n启动阶段导入耗时：{report['total_ms']:.2f} ms\n" + "\n".join(lines))
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"启动耗时分析结果已保存：{report_path}")
+    return report
@@ -5,39 +5,144 @@
 
 import sys
 import os
+import re
 import json
+import hashlib
 import tempfile
 import subprocess
 from ruamel import yaml
 from loguru import logger
-from google.protobuf.descriptor_pb2 import FileDescriptorSet
-from google.protobuf.descriptor import FieldDescriptor
+from typing import Dict, List, Optional
+from importlib import metadata
+from config.settings import FILES_DIR, PROTO_CACHE_DIR
+from core.metrics_utils.metrics_exporter import record_cache
+
+# .proto 中的导入语句：import "a/b.proto";、import public "c.proto";
+IMPORT_PATTERN = re.compile(r'^\s*import\s+(?:public\s+|weak\s+)?"([^"]+)"\s*;', re.M)
+
+
+def _protoc_version() -> str:
+    try:
+        return metadata.version("grpcio-tools")
+    except metadata.PackageNotFoundError:
+        return ""
 
 
 class GrpcForYaml:
     """
     将 protobuf (.proto) 文件转为 YAML 格式用例
+    编译结果（描述符集、消息索引）按 .proto 及其导入文件的内容哈希缓存在 PROTO_CACHE_DIR 中，
+    修改某个 .proto 后，只有导入了它的 .proto 需要重新编译
     """
 
-    def __init__(self, case_dir, proto_path):
+    def __init__(self, case_dir, proto_path, include_dirs: Optional[List[str]] = None,
+                 cache_dir: str = PROTO_CACHE_DIR):
         """
         :param case_dir: 用例需要保存的目录
         :param proto_path: 需要读取的 .proto 文件路径
+        :param include_dirs: 导入文件的查找目录（protoc -I），默认为 .proto 所在目录
+        :param cache_dir: 编译结果缓存目录
         """
         self.case_dir = case_dir
         self.proto_path = proto_path
+        self.include_dirs = [os.path.abspath(path) for path in include_dirs] if include_dirs \
+            else [os.path.dirname(os.path.abspath(proto_path))]
+        self.cache_dir = cache_dir
         self.messages = {}  # 存储消息定义
         self.services = []  # 存储服务定义
+        self._cache_key = None
 
-    def _compile_proto(self):
+    def _virtual_name(self, path: str) -> str:
+        """
+        文件在描述符中的名称：相对于所在导入目录的路径
+        """
+        for include_dir in self.include_dirs:
+            if path.startswith(include_dir + os.sep):
+                return os.path.relpath(path, include_dir).replace(os.sep, "/")
+        return os.path.basename(path)
+
+    def _closure(self) -> List[str]:
+        """
+        .proto 及其递归导入的本地文件，google/protobuf/*.proto 等随 grpc_tools 安装的文件不包含在内
+        """
+        files = set()
+        stack = [os.path.abspath(self.proto_path)]
+        while stack:
+            path = stack.pop()
+            if path in files:
+                continue
+            files.add(path)
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                imports = IMPORT_PATTERN.findall(f.read())
+            for name in imports:
+                for include_dir in self.include_dirs:
+                    imported = os.path.join(include_dir, name)
+                    if os.path.isfile(imported):
+                        stack.append(os.path.abspath(imported))
+                        break
+        return sorted(files)
+
+    def cache_key(self) -> str:
         """
-        使用 protoc 编译 proto 文件并生成描述符集
+        缓存key：protoc 版本，以及 .proto 及其导入文件的名称、内容的哈希
         """
-        if not os.path.exists(self.proto_path):
-            raise FileNotFoundError(f"Proto file not found: {self.proto_path}")
+        if self._cache_key is None:
+            if not os.path.exists(self.proto_path):
+                raise FileNotFoundError(f"Proto file not found: {self.proto_path}")
+            digest = hashlib.sha256(_protoc_version().encode("utf-8"))
+            digest.update(self._virtual_name(os.path.abspath(self.proto_path)).encode("utf-8"))
+            for path in self._closure():
+                with open(path, "rb") as f:
+                    content = f.read()
+                digest.update(f"\0{self._virtual_name(path)}\0{len(content)}\0".encode("utf-8"))
+                digest.update(content)
+            self._cache_key = digest.hexdigest()
+        return self._cache_key
 
-        proto_dir = os.path.dirname(os.path.abspath(self.proto_path))
-        proto_file = os.path.basename(self.proto_path)
+    def _cache_path(self, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{self.cache_key()}{suffix}")
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def compile_protos(cls, makers: List["GrpcForYaml"]):
+        """
+        编译缓存中没有的 .proto，导入目录相同的 .proto 只调用一次 protoc，
+        再按每个 .proto 的导入关系拆分成单独的描述符集保存到缓存中
+        """
+        pending = {}
+        for maker in makers:
+            if not os.path.exists(maker._cache_path(".desc")):
+                pending.setdefault(tuple(maker.include_dirs), {}).setdefault(maker.cache_key(), maker)
+        for include_dirs, group in pending.items():
+            group = list(group.values())
+            try:
+                descriptor_set = cls._run_protoc(include_dirs, [os.path.abspath(m.proto_path) for m in group])
+            except subprocess.CalledProcessError:
+                if len(group) == 1:
+                    raise
+                # 其中某个 .proto 编译失败，逐个编译，定位失败的文件
+                for maker in group:
+                    cls.compile_protos([maker])
+                continue
+            files = {file_desc.name: file_desc for file_desc in descriptor_set.file}
+            for maker in group:
+                maker._write_atomic(maker._cache_path(".desc"), cls._split_descriptor(
+                    files, maker._virtual_name(os.path.abspath(maker.proto_path))).SerializeToString())
+            logger.info(f"编译 proto 文件 {len(group)} 个：{', '.join(m.proto_path for m in group)}")
+
+    @staticmethod
+    def _run_protoc(include_dirs, proto_paths: List[str]):
+        """
+        调用一次 protoc 编译多个 .proto，生成包含所有导入文件的描述符集
+        """
+        from google.protobuf.descriptor_pb2 import FileDescriptorSet
 
         with tempfile.NamedTemporaryFile(suffix='.desc', delete=False) as tmp_desc:
             desc_path = tmp_desc.name
@@ -45,23 +150,19 @@ class GrpcForYaml:
         # 构建 protoc 命令
         # 注意：这里假设 grpc_tools 已安装
         # 使用绝对路径来避免相对路径问题
-        abs_proto_path = os.path.abspath(self.proto_path)
-        cmd = [
-            sys.executable, "-m", "grpc_tools.protoc",
-            f"-I{proto_dir}",
-            f"--descriptor_set_out={desc_path}",
-            "--include_imports",
-            abs_proto_path
-        ]
+        cmd = [sys.executable, "-m", "grpc_tools.protoc"]
+        cmd.extend(f"-I{include_dir}" for include_dir in include_dirs)
+        cmd.extend([f"--descriptor_set_out={desc_path}", "--include_imports"])
+        cmd.extend(proto_paths)
 
         try:
             subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            
+
             # 读取描述符集
             with open(desc_path, 'rb') as f:
                 descriptor_set = FileDescriptorSet()
                 descriptor_set.ParseFromString(f.read())
-            
+
             return descriptor_set
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to compile proto file: {e.stderr.decode()}")
@@ -70,6 +171,59 @@ class GrpcForYaml:
             if os.path.exists(desc_path):
                 os.remove(desc_path)
 
+    @staticmethod
+    def _split_descriptor(files: Dict, name: str):
+        """
+        从多个 .proto 的描述符集中取出 name 及其导入的文件，导入的文件排在前面
+        """
+        from google.protobuf.descriptor_pb2 import FileDescriptorSet
+
+        descriptor_set = FileDescriptorSet()
+        visited = set()
+
+        def visit(file_name):
+            if file_name in visited:
+                return
+            visited.add(file_name)
+            for dependency in files[file_name].dependency:
+                visit(dependency)
+            descriptor_set.file.append(files[file_name])
+
+        visit(name)
+        return descriptor_set
+
+    def _compile_proto(self):
+        """
+        使用 protoc 编译 proto 文件并生成描述符集，优先使用缓存
+        """
+        from google.protobuf.descriptor_pb2 import FileDescriptorSet
+
+        desc_path = self._cache_path(".desc")
+        hit = os.path.exists(desc_path)
+        record_cache("proto", hit)
+        if not hit:
+            self.compile_protos([self])
+        descriptor_set = FileDescriptorSet()
+        with open(desc_path, "rb") as f:
+            descriptor_set.ParseFromString(f.read())
+        return descriptor_set
+
+    def _load_index(self):
+        """
+        读取消息、服务索引，缓存中没有时解析描述符集并保存
+        """
+        index_path = self._cache_path(".json")
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.messages, self.services = index["messages"], index["services"]
+            return
+        except (OSError, ValueError, KeyError):
+            pass
+        self._parse_descriptor(self._compile_proto())
+        self._write_atomic(index_path, json.dumps({"messages": self.messages, "services": self.services},
+                                                  ensure_ascii=False).encode("utf-8"))
+
     def _parse_descriptor(self, descriptor_set):
         """
         解析描述符集，提取消息和服务信息
@@ -84,7 +238,13 @@ class GrpcForYaml:
                 self.services.append({
                     'name': service.name,
                     'package': file_desc.package,
-                    'methods': service.method
+                    'methods': [{
+                        'name': method.name,
+                        'input_type': method.input_type,
+                        'output_type': method.output_type,
+                        'client_streaming': method.client_streaming,
+                        'server_streaming': method.server_streaming
+                    } for method in service.method]
                 })
 
     def _parse_message_type(self, msg_type, package):
@@ -116,6 +276,7 @@ class GrpcForYaml:
         if message_type_name not in self.messages:
             return {}
             
+        from google.protobuf.descriptor import FieldDescriptor
         payload = {}
         for field_name, field_info in self.messages[message_type_name].items():
             # 这里简单处理基本类型，复杂类型递归生成
@@ -145,17 +306,22 @@ class GrpcForYaml:
         """
         生成 YAML 用例文件
         """
-        descriptor_set = self._compile_proto()
-        self._parse_descriptor(descriptor_set)
+        self._load_index()
+
+        # 用例中的 proto 路径：在 files 目录下时使用相对路径
+        proto_path = os.path.abspath(self.proto_path)
+        if proto_path.startswith(os.path.abspath(FILES_DIR) + os.sep):
+            proto_path = os.path.relpath(proto_path, FILES_DIR).replace(os.sep, "/")
 
         for service in self.services:
             service_name = service['name']
             package_name = service['package']
+            full_service_name = f"{package_name}.{service_name}" if package_name else service_name
             
             case_list = []
             for method in service['methods']:
-                method_name = method.name
-                input_type = method.input_type
+                method_name = method['name']
+                input_type = method['input_type']
                 
                 # 生成默认请求体
                 payload = self._generate_payload(input_type)
@@ -165,13 +331,15 @@ class GrpcForYaml:
                     "title": f"测试 {method_name}",
                     "run": True,
                     "severity": "normal",
-                    "url": f"grpc://{package_name}.{service_name}/{method_name}", # 模拟 GRPC URL
+                    # grpc_host 在环境配置中设置，例如：127.0.0.1:50051
+                    "url": f"grpc://${{grpc_host}}/{full_service_name}/{method_name}",
                     "method": "GRPC",
                     "headers": {
                         "Content-Type": "application/grpc"
                     },
                     "request_type": "grpc",
                     "payload": payload,
+                    "proto": proto_path,
                     "assert_response": {
                         "status_code": 0 # GRPC OK status
                     }
@@ -202,6 +370,16 @@ class GrpcForYaml:
             
             logger.info(f"Generated GRPC test case: {file_path}")
 
+    @classmethod
+    def batch_yaml_file_dump(cls, case_dir, proto_paths: List[str], include_dirs: Optional[List[str]] = None):
+        """
+        批量生成 YAML 用例文件，缓存中没有的 .proto 合并为一次 protoc 调用编译
+        """
+        makers = [cls(case_dir, proto_path, include_dirs=include_dirs) for proto_path in proto_paths]
+        cls.compile_protos(makers)
+        for maker in makers:
+            maker.yaml_file_dump()
+
 if __name__ == "__main__":
     # 测试代码
     pass
@@ -11,10 +11,11 @@
 """
 
 import os
-import json
-from typing import Dict
+from typing import Dict, List, TextIO
 from jsonpath import jsonpath
 from ruamel.yaml import YAML
+from utils.yaml_case_maker.schema_handle import RefResolver, get_validate
+from utils.yaml_case_maker.spec_stream import CaseFileWriter, iter_kvitems, load_sections
 
 """
 将apifox的接口导出并生成yaml格式接口
@@ -30,26 +31,25 @@ class OpenApiForYaml:
     将apifox接口文档转为YAML格式接口
     """
 
-    def __init__(self, api_dir: str, json_api_path: str):
+    def __init__(self, api_dir: str, json_api_path: str, incremental: bool = True):
         """
         :param api_dir: YAML接口需要保存的目录
         :param json_api_path: 需要读取的导出的apifox接口的路径，参考：GitLink.openapi.json
+        :param incremental: 是否增量导入：接口数据没有变化的文件不重新写入
         """
+        self.json_api_path = json_api_path
         self._data = self.get_api_json(json_api_path)
         self.api_dir = api_dir
+        self._resolver = RefResolver(self._data)
+        self._writer = CaseFileWriter(api_dir, incremental=incremental)
 
     def get_api_json(self, path):
         """
-        获取 apifox中的 json 数据
+        获取 apifox中除 paths 以外的 json 数据（info、tags、components 等），paths 在生成接口时逐个读取
         :param path: 需要读取的apifox文件的路径
         :return:
         """
-        try:
-            with open(path, "r", encoding='utf-8') as f:
-                row_data = json.load(f)
-                return row_data
-        except FileNotFoundError:
-            raise FileNotFoundError("文件路径不存在，请重新输入")
+        return load_sections(path, skip=("paths",))
 
     @classmethod
     def get_cookies(cls, value):
@@ -157,7 +157,7 @@ class OpenApiForYaml:
 
     def yaml_api(self, data: Dict, file_dir: str, api_id: str) -> None:
         """
-        写入 yaml 数据
+        添加 yaml 数据，write_yaml_handler 结束时每个文件统一写入一次
         :param file_dir: yaml接口保存的目录
         :param api_id: 接口id
         :param data: 接口数据
@@ -191,44 +191,17 @@ class OpenApiForYaml:
 
         _file_name = "test_" + "_".join(path_parts) + ".yaml"
 
-        # 创建一个YAML对象
-        yaml = YAML()
-        # Use append mode 'a' instead of 'w' to support multiple methods in same file
+        # 同一个文件中可能有多个接口（例如 GET 和 POST），与之前追加写入的格式保持一致，每个接口依次写入
         _file_path = os.path.join(file_dir, _file_name)
-        
-        # Check if file exists to handle potential structure (though OpenApiForYaml structure is flat dict, not case_common/case_info wrapper?)
-        # Looking at api_data in write_yaml_handler (Line 200), it's a flat dict: {id, title, url...}
-        # It does NOT have case_common / case_info structure like Swagger/Postman.
-        # So we can just append the document. 
-        # But if we append multiple documents to a YAML file, they are separated by '---' or just multiple objects?
-        # YAML dump usually dumps a single object. If we call dump multiple times, it writes multiple documents.
-        # But standard YAML parsers might only read the first one unless load_all is used.
-        # The user's project likely uses a loader that supports lists or expects a specific structure.
-        # SwaggerForYaml generates: case_common + case_info list.
-        # OpenApiForYaml generates: just the dict?
-        # Let's check how it's used. 
-        # If OpenApiForYaml is used for generating "Interface Definitions" (not test cases directly?), then appending might be wrong if it expects 1 file per API.
-        # But the user request is to unify format to `test_account_activity.yaml`.
-        # This implies it's treated as a Test Case file.
-        # However, the content generated by OpenApiForYaml (Line 200) looks different from SwaggerForYaml (Line 165).
-        # SwaggerForYaml: {case_common: {...}, case_info: [...]}
-        # OpenApiForYaml: {id:..., title:..., url:..., ...}
-        # If I merge them into one file, I might break parsing if the parser expects 1 object.
-        # BUT, the user explicitly asked to change the filename format.
-        # If I change filename to `test_account_activity.yaml`, and I have GET and POST, they will write to same file.
-        # If I use 'w', the last one wins.
-        # If I use 'a', both are there.
-        # I will use 'a' and hope the parser handles it (or the user intends to have multiple docs).
-        # Actually, standard YAML allows multiple documents separated by `---`.
-        # `ruamel.yaml` `dump` writes one document.
-        # If I write again, it appends.
-        # I should probably add `file.write('---\n')` if file exists? 
-        # Or just append.
-        
-        with open(_file_path, "a", encoding="utf-8") as file:
-            # If file exists and is not empty, maybe add separator?
-            # But SwaggerForYaml just writes `\n` (Line 158).
-            # I'll stick to simple append.
+        self._writer.add(_file_path, data["id"], data)
+
+    @staticmethod
+    def dump_apis(file: TextIO, items: List[Dict], append: bool) -> None:
+        """
+        依次写入同一个文件中的多个接口
+        """
+        yaml = YAML()
+        for data in items:
             yaml.dump(data, file)
             file.write('\n')
 
@@ -248,9 +221,8 @@ class OpenApiForYaml:
             else:
                 os.makedirs(os.path.join(self.api_dir, api_info_path, tag["name"]), exist_ok=True)
 
-        # 获取所有接口的相关数据，key=接口路径， value=接口各项参数
-        _api_data = self._data['paths']
-        for key, value in _api_data.items():
+        # 逐个读取所有接口的相关数据，key=接口路径， value=接口各项参数
+        for key, value in iter_kvitems(self.json_api_path, "paths"):
             # 获取每一个接口数据
             for k, v in value.items():
                 if v.get("tags"):
@@ -272,10 +244,10 @@ class OpenApiForYaml:
                     "path": self.get_path_param(v),
                     "payload": self.get_payload(v),
                     "files": None,
-
+                    "validate": get_validate(v, self._resolver),
                 }
-                print(api_data)
                 self.yaml_api(data=api_data, file_dir=api_path, api_id=api_id)
+        return self._writer.flush(self.dump_apis)
 
 
 if __name__ == '__main__':
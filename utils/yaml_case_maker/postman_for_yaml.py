@@ -7,7 +7,7 @@ import os
 import re
 import json
 from typing import Dict
-from ruamel.yaml import YAML
+from utils.yaml_case_maker.spec_stream import CaseFileWriter, dump_cases, iter_items, load_sections
 
 """
 相比较于pyyaml, Ruamel可以保持YAML文件的结构和顺序不变。
@@ -20,69 +20,69 @@ class PostmanForYaml:
     将postman接口文档转为YAML格式用例
     """
 
-    def __init__(self, case_dir, postman_path):
+    def __init__(self, case_dir, postman_path, incremental: bool = True):
         """
         :param case_dir: 用例需要保存的目录
         :param postman_path: 需要读取的swagger文件的路径
+        :param incremental: 是否增量导入：接口数据没有变化的用例文件不重新写入
         """
+        # 除 item 以外的数据（info 等），同时检查文件是否存在
+        self._info = load_sections(postman_path, skip=("item",))
         self._data = self.get_postman_json(postman_path)
         self.case_dir = case_dir
+        self._writer = CaseFileWriter(case_dir, incremental=incremental)
 
     def get_postman_json(self, postman_path):
         """
-        获取 postman 中的 json 数据
+        逐个读取 postman 中的顶层目录、接口，生成用例数据
         :param postman_path: 需要读取的swagger文件的路径
-        :return:
+        :return: 生成器，每次返回 {case_id: 用例数据}
         """
-        result = []
-        try:
-            with open(postman_path, "r", encoding='utf-8') as f:
-                row_data = json.load(f)
+        row_data = self._info
 
-                def _parse_api(content):
-                    nonlocal row_data
-                    nonlocal result
-                    if isinstance(content, list):
-                        for item in content:
-                            _parse_api(content=item)
-                    elif isinstance(content, dict):
-                        if 'item' in content.keys():
-                            _parse_api(content=content['item'])
-                        elif 'request' in content.keys():
-                            # 获取所有接口的相关数据
-                            yaml_data = {
-                                "case_common": {
-                                    "allure_epic": self.get_allure_epic(row_data),
-                                    "allure_feature": self.get_allure_feature(content),
-                                    "allure_story": self.get_allure_story(content)
-                                },
-                                "case_info": [
-                                    {
-                                        "id": f"case_{self.get_case_id(self.get_url(content)).lower()}_01",
-                                        "title": self.get_title(content),
-                                        "run": False,
-                                        "url": self.get_url(content),
-                                        "severity": None,
-                                        "method": self.get_method(content),
-                                        "headers": self.get_headers(content),
-                                        "cookies": None,
-                                        "request_type": self.get_request_type_payload(content).get("request_type"),
-                                        "payload": self.get_request_type_payload(content).get("payload"),
-                                        "files": self.get_request_type_payload(content).get("files"),
-                                        "extract": None,
-                                        "assert_response": {'eq': {'http_code': 200}},
-                                        "assert_sql": None
+        def _parse_api(content):
+            if isinstance(content, list):
+                for item in content:
+                    yield from _parse_api(content=item)
+            elif isinstance(content, dict):
+                if 'item' in content.keys():
+                    yield from _parse_api(content=content['item'])
+                elif 'request' in content.keys():
+                    # 获取所有接口的相关数据
+                    request_type_payload = self.get_request_type_payload(content)
+                    yaml_data = {
+                        "case_common": {
+                            "allure_epic": self.get_allure_epic(row_data),
+                            "allure_feature": self.get_allure_feature(content),
+                            "allure_story": self.get_allure_story(content)
+                        },
+                        "case_info": [
+                            {
+                                "id": f"case_{self.get_case_id(self.get_url(content)).lower()}_01",
+                                "title": self.get_title(content),
+                                "run": False,
+                                "url": self.get_url(content),
+                                "severity": None,
+                                "method": self.get_method(content),
+                                "headers": self.get_headers(content),
+                                "cookies": None,
+                                "request_type": request_type_payload.get("request_type"),
+                                "payload": request_type_payload.get("payload"),
+                                "files": request_type_payload.get("files"),
+                                "extract": None,
+                                "assert_response": {'eq': {'http_code': 200}},
+                                "assert_sql": None
 
-                                    }
-                                ]
                             }
-                            result.append({
-                                self.get_case_id(self.get_url(content)): yaml_data
-                            })
-            _parse_api(content=row_data)
-            return result
-        except FileNotFoundError:
-            raise FileNotFoundError("文件路径不存在，请重新输入")
+                        ]
+                    }
+                    yield {
+                        self.get_case_id(self.get_url(content)): yaml_data
+                    }
+
+        # 顶层的每个目录、接口单独读取、解析，不需要一次性加载整个文件
+        for top_item in iter_items(postman_path, "item.item"):
+            yield from _parse_api(content=top_item)
 
     def get_allure_epic(self, content):
         """
@@ -215,14 +215,11 @@ class PostmanForYaml:
 
     def yaml_cases(self, data: Dict, file_path: str) -> None:
         """
-        写入 yaml 数据
+        添加 yaml 数据，write_yaml_handler 结束时每个文件统一写入一次
         :param file_path:
         :param data: 测试用例数据
         :return:
         """
-        # 检查目录不存在则创建， 存在则不创建
-        os.makedirs(self.case_dir, exist_ok=True)
-
         # 处理文件名: /api/clue/v1/admin/account/activity/get -> test_account_activity.yaml
         # Postman file_path usually passed as 'k' from loop, which is case_id derived from URL in get_postman_json
         # But wait, get_postman_json returns a list of dicts: { case_id: yaml_data }
@@ -257,19 +254,15 @@ class PostmanForYaml:
         _file_name = "test_" + "_".join(path_parts) + ".yaml"
 
         _file_path = os.path.join(self.case_dir, _file_name)
-        if _file_name in os.listdir(self.case_dir):
-            data.pop("case_common")
-            data = data["case_info"]
-        with open(_file_path, "a", encoding="utf-8") as file:
-            yaml = YAML()
-            yaml.dump(data, file)
-            file.write('\n')
+        case = data["case_info"][0]
+        self._writer.add(_file_path, f"{case['method']} {case['url']}", data)
 
     def write_yaml_handler(self):
-        # 获取所有接口的相关数据
+        # 逐个获取所有接口的相关数据
         for case in self._data:
             for k, v in case.items():
                 self.yaml_cases(data=v, file_path=k)
+        return self._writer.flush(dump_cases)
 
 
 if __name__ == '__main__':
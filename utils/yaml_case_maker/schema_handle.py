@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : schema_handle.py
+# @Desc: 接口文档响应 schema 处理模块，用于生成 schema 断言
+
+import copy
+from typing import Dict, Optional, Tuple
+
+# 生成用例时，优先使用的成功响应状态码
+SUCCESS_CODES = ("200", "201", "202", "204", "default")
+# 接口文档中只有 default 响应或没有成功响应时断言的状态码
+DEFAULT_STATUS_CODE = 200
+
+
+class RefResolver:
+    """
+    解析接口文档中的 $ref 引用，将引用内容内联到 schema 中，生成可以独立使用的 JSON Schema。
+    同一个 $ref 只解析一次，解析结果会被缓存复用。
+    """
+
+    def __init__(self, document: Dict):
+        """
+        :param document: 完整的接口文档数据（OpenAPI/Swagger）
+        """
+        self.document = document
+        self._cache: Dict[str, Dict] = {}
+
+    def _lookup(self, ref: str) -> Dict:
+        """
+        根据 $ref 获取文档中被引用的内容，仅支持文档内引用，例如：#/components/schemas/User
+        """
+        if not ref.startswith("#/"):
+            raise ValueError(f"仅支持文档内的 $ref 引用，当前引用：{ref}")
+        node = self.document
+        for part in ref[2:].split("/"):
+            node = node[part.replace("~1", "/").replace("~0", "~")]
+        return node
+
+    def resolve(self, schema, _resolving: tuple = ()):
+        """
+        递归内联 schema 中的 $ref，并将 OpenAPI 的 nullable 转换为 JSON Schema 写法
+        循环引用（例如树形结构）无法内联，循环处按不限制类型处理
+        """
+        if isinstance(schema, list):
+            return [self.resolve(item, _resolving) for item in schema]
+        if not isinstance(schema, dict):
+            return schema
+
+        ref = schema.get("$ref")
+        if isinstance(ref, str):
+            if ref in _resolving:
+                return {}
+            if ref not in self._cache:
+                self._cache[ref] = self.resolve(self._lookup(ref), _resolving + (ref,))
+            return copy.deepcopy(self._cache[ref])
+
+        result = {key: self.resolve(value, _resolving) for key, value in schema.items()}
+        if result.pop("nullable", False) and "type" in result:
+            types = result["type"] if isinstance(result["type"], list) else [result["type"]]
+            result["type"] = types + ["null"] if "null" not in types else types
+        return result
+
+
+def get_response_schema(operation: Dict, resolver: RefResolver) -> Tuple[int, Optional[Dict]]:
+    """
+    获取接口成功响应的状态码及 schema，兼容 OpenAPI 3（content/application/json/schema）和 Swagger 2（schema）
+    :param operation: 接口文档中单个接口（path + method）的数据
+    :param resolver: $ref 解析器
+    :return: (状态码, 内联后的 JSON Schema)；优先返回有 schema 的响应，都没有 schema 时返回第一个成功响应的状态码，schema 为 None
+    """
+    responses = operation.get("responses") or {}
+    matched = None
+    for code in SUCCESS_CODES:
+        response = responses.get(code)
+        if response is None and code.isdigit():
+            # 部分文档中状态码是 int 类型的 key
+            response = responses.get(int(code))
+        if response is None:
+            continue
+        status_code = int(code) if code.isdigit() else DEFAULT_STATUS_CODE
+        if matched is None:
+            matched = status_code
+        if not response:
+            continue
+        response = resolver.resolve(response)
+        schema = response.get("schema")
+        if schema is None:
+            for content_type, media in (response.get("content") or {}).items():
+                if "json" in content_type and isinstance(media, dict) and media.get("schema"):
+                    schema = media["schema"]
+                    break
+        if schema:
+            return status_code, schema
+    return (DEFAULT_STATUS_CODE if matched is None else matched), None
+
+
+def get_validate(operation: Dict, resolver: RefResolver) -> Dict:
+    """
+    根据接口文档生成用例的 validate 断言：断言接口文档中成功响应的状态码，存在响应 schema 时增加 schema 断言
+    """
+    status_code, schema = get_response_schema(operation, resolver)
+    validate = {"status_code": status_code}
+    if schema:
+        validate["assert_schema"] = {"assert_type": "schema", "expect_value": schema,
+                                     "message": "响应数据结构与接口文档不一致"}
+    return validate
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# @Author  : 会飞的🐟
+# @File    : spec_stream.py
+# @Desc: 接口文档流式读取、用例文件批量增量写入模块，用于导入体积较大的 OpenAPI/Swagger/Postman 文档
+
+import io
+import os
+import json
+import ijson
+import hashlib
+from loguru import logger
+from ruamel.yaml import YAML
+from typing import Callable, Dict, Iterator, List, TextIO, Tuple
+
+
+def load_sections(path: str, skip: Tuple[str, ...] = ("paths",)) -> Dict:
+    """
+    读取接口文档中除 skip 以外的顶层字段，例如 info、tags、components、definitions，
+    skip 中的字段（接口列表）只解析不保存，由 iter_kvitems、iter_items 逐个读取
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        raise FileNotFoundError("文件路径不存在，请重新输入")
+    sections = {}
+    key, builder, depth = None, None, 0
+    with f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if depth == 0 and prefix == "":
+                if event == "map_key":
+                    key = value
+                    builder = None if key in skip else ijson.ObjectBuilder()
+                continue
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+            if builder is not None:
+                builder.event(event, value)
+                if depth == 0:
+                    sections[key] = builder.value
+                    builder = None
+    return sections
+
+
+def iter_kvitems(path: str, prefix: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    逐个读取对象中的键值对，例如 prefix="paths" 时每次返回一个接口路径及其所有 method 的定义
+    """
+    with open(path, "rb") as f:
+        yield from ijson.kvitems(f, prefix, use_float=True)
+
+
+def iter_items(path: str, prefix: str) -> Iterator:
+    """
+    逐个读取数组中的元素，例如 Postman 文档中 prefix="item.item" 时每次返回一个顶层目录或接口
+    """
+    with open(path, "rb") as f:
+        yield from ijson.items(f, prefix, use_float=True)
+
+
+def data_hash(data) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def dump_cases(file: TextIO, items: List[Dict], append: bool) -> None:
+    """
+    将同一个文件的多个接口合并写入：第一个接口的 case_common 作为文件的 case_common，所有接口的 case_info 合并，
+    追加到已存在的文件时只写入 case_info
+    """
+    cases = [case for item in items for case in item["case_info"]]
+    data = cases if append else dict(items[0], case_info=cases)
+    yaml = YAML()
+    yaml.dump(data, file)
+    file.write('\n')
+
+
+class CaseFileWriter:
+    """
+    用例文件批量增量写入：
+    1. 导入过程中只收集每个文件的用例数据，导入结束后每个文件只打开、写入一次
+    2. 每个接口生成的数据的哈希保存在清单文件中，再次导入时，文件中所有接口的数据都没有变化的文件不会重新写入
+    3. 清单中没有记录的已存在文件（手动编写或旧版本导入的文件）在清单中记录为 mixed，导入的接口按接口标识合并：
+       每个接口的内容写在 "# >>> imported: 接口标识"、"# <<< imported: 接口标识" 注释之间，再次导入时只替换对应接口的内容，
+       新的接口追加到文件末尾，文件中其他（手动编写的）内容保持不变
+    """
+    MANIFEST_NAME = ".import_manifest.json"
+    IMPORT_BEGIN = "# >>> imported: {key}\n"
+    IMPORT_END = "# <<< imported: {key}\n"
+
+    def __init__(self, root_dir: str, incremental: bool = True):
+        """
+        :param root_dir: 用例保存的根目录，清单文件保存在该目录下
+        :param incremental: 是否增量导入，False 时重新写入所有文件（mixed 文件仍然按接口合并）
+        """
+        self.root_dir = root_dir
+        self.incremental = incremental
+        self.manifest_path = os.path.join(root_dir, self.MANIFEST_NAME)
+        self._files: Dict[str, List[Tuple[str, Dict]]] = {}
+
+    def add(self, file_path: str, key: str, data: Dict):
+        """
+        :param file_path: 用例文件路径
+        :param key: 接口的唯一标识，例如 method + path
+        :param data: 写入文件的数据
+        """
+        self._files.setdefault(file_path, []).append((key, data))
+
+    def _load_manifest(self) -> Tuple[Dict[str, Dict[str, str]], set]:
+        """
+        :return: (每个文件中各接口数据的哈希, mixed 文件)
+        """
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data.get("files", {}), set(data.get("mixed", []))
+        except (OSError, ValueError):
+            return {}, set()
+
+    @classmethod
+    def merge(cls, text: str, blocks: Dict[str, str]) -> str:
+        """
+        将导入的接口内容按接口标识合并到文件内容中：已存在的接口替换标记之间的内容，不存在的接口追加到末尾
+        :param blocks: {接口标识: 接口内容}
+        """
+        for key, block in blocks.items():
+            begin, end = cls.IMPORT_BEGIN.format(key=key), cls.IMPORT_END.format(key=key)
+            wrapped = begin + block + end
+            start = text.find(begin)
+            stop = text.find(end, start) if start >= 0 else -1
+            if stop >= 0:
+                text = text[:start] + wrapped + text[stop + len(end):]
+            else:
+                if text and not text.endswith("\n"):
+                    text += "\n"
+                text += wrapped
+        return text
+
+    @staticmethod
+    def _render(dump: Callable[[TextIO, List[Dict], bool], None], data: Dict) -> str:
+        buffer = io.StringIO()
+        dump(buffer, [data], True)
+        return buffer.getvalue()
+
+    def flush(self, dump: Callable[[TextIO, List[Dict], bool], None]) -> Dict[str, int]:
+        """
+        写入所有文件
+        :param dump: 写入函数，参数为 (文件对象, 数据列表, 是否追加到已存在的文件)
+        :return: 各类文件的数量：written 重新写入、merged 合并到已存在的文件、skipped 未变化
+        """
+        manifest, mixed = self._load_manifest()
+        stats = {"written": 0, "merged": 0, "skipped": 0}
+        names = {}
+        for file_path, items in self._files.items():
+            name = names[file_path] = os.path.relpath(file_path, self.root_dir).replace(os.sep, "/")
+            hashes = {key: data_hash(data) for key, data in items}
+            exists = os.path.exists(file_path)
+            if self.incremental and exists and manifest.get(name) == hashes:
+                stats["skipped"] += 1
+                continue
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            if exists and (name not in manifest or name in mixed):
+                # 手动编写的文件：只合并有变化的接口，不覆盖文件中的其他内容
+                previous = manifest.get(name, {}) if self.incremental else {}
+                blocks = {key: self._render(dump, data) for key, data in items if previous.get(key) != hashes[key]}
+                with open(file_path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                tmp_path = f"{file_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(self.merge(text, blocks))
+                os.replace(tmp_path, file_path)
+                mixed.add(name)
+                stats["merged"] += 1
+            else:
+                with open(file_path, "w", encoding="utf-8") as f:
+                    dump(f, [data for _, data in items], False)
+                stats["written"] += 1
+            manifest[name] = hashes
+
+        removed = sorted(set(manifest) - set(names.values()))
+        if removed:
+            logger.warning(f"以下文件中的接口已不在接口文档中，未删除，请确认后手动处理：{removed}")
+        os.makedirs(self.root_dir, exist_ok=True)
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"files": manifest, "mixed": sorted(mixed & set(manifest))}, f, ensure_ascii=False, indent=2)
+        self._files.clear()
+        logger.info(f"用例文件写入完成：重新写入 {stats['written']} 个，合并到已存在的文件 {stats['merged']} 个，"
+                    f"未变化 {stats['skipped']} 个")
+        return stats
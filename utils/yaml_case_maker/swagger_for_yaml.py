@@ -4,10 +4,10 @@
 # @Desc: 转换swagger接口文档为YAML格式用例
 
 import os
-import json
-from ruamel.yaml import YAML
 from typing import Dict
 from jsonpath import jsonpath
+from utils.yaml_case_maker.schema_handle import RefResolver, get_validate
+from utils.yaml_case_maker.spec_stream import CaseFileWriter, dump_cases, iter_kvitems, load_sections
 
 
 """
@@ -21,26 +21,25 @@ class SwaggerForYaml:
     将swagger接口文档转为YAML格式用例
     """
 
-    def __init__(self, case_dir, swagger_path):
+    def __init__(self, case_dir, swagger_path, incremental: bool = True):
         """
         :param case_dir: 用例需要保存的目录
         :param swagger_path: 需要读取的swagger文件的路径
+        :param incremental: 是否增量导入：接口数据没有变化的用例文件不重新写入
         """
+        self.swagger_path = swagger_path
         self._data = self.get_swagger_json(swagger_path)
         self.case_dir = case_dir
+        self._resolver = RefResolver(self._data)
+        self._writer = CaseFileWriter(case_dir, incremental=incremental)
 
     def get_swagger_json(self, path):
         """
-        获取 swagger 中的 json 数据
+        获取 swagger 中除 paths 以外的 json 数据（info、definitions 等），paths 在生成用例时逐个读取
         :param path: 需要读取的swagger文件的路径
         :return:
         """
-        try:
-            with open(path, "r", encoding='utf-8') as f:
-                row_data = json.load(f)
-                return row_data
-        except FileNotFoundError:
-            raise FileNotFoundError("文件路径不存在，请重新输入")
+        return load_sections(path, skip=("paths",))
 
     def get_allure_epic(self):
         """
@@ -152,16 +151,14 @@ class SwaggerForYaml:
             return None
         return None if not _dict else _dict
 
-    def yaml_cases(self, data: Dict, file_path: str) -> None:
+    def yaml_cases(self, data: Dict, file_path: str, key: str = None) -> None:
         """
-        写入 yaml 数据
+        添加 yaml 数据，write_yaml_handler 结束时每个文件统一写入一次
         :param file_path:
         :param data: 测试用例数据
+        :param key: 接口的唯一标识，默认为 file_path
         :return:
         """
-        # 检查目录不存在则创建， 存在则不创建
-        os.makedirs(self.case_dir, exist_ok=True)
-        
         # 处理文件名: /api/clue/v1/admin/account/activity/get -> test_account_activity.yaml
         path_parts = [p for p in file_path.strip("/").split("/") if p not in 
                      ["api", "clue", "v1", "v2", "v3", "v4", "admin", "common"]]
@@ -170,19 +167,11 @@ class SwaggerForYaml:
         
         _file_name = "test_" + "_".join(path_parts) + ".yaml"
         _file_path = os.path.join(self.case_dir, _file_name)
-        
-        if _file_name in os.listdir(self.case_dir):
-            data.pop("case_common")
-            data = data["case_info"]
-        with open(_file_path, "a", encoding="utf-8") as file:
-            yaml = YAML()
-            yaml.dump(data, file)
-            file.write('\n')
+        self._writer.add(_file_path, key or file_path, data)
 
     def write_yaml_handler(self):
-        # 获取所有接口的相关数据，key=接口路径， value=接口各项参数
-        _api_data = self._data['paths']
-        for key, value in _api_data.items():
+        # 逐个读取所有接口的相关数据，key=接口路径， value=接口各项参数
+        for key, value in iter_kvitems(self.swagger_path, "paths"):
             for k, v in value.items():
                 yaml_data = {
                     "case_common": {
@@ -205,12 +194,14 @@ class SwaggerForYaml:
                             "files": None,
                             "extract": None,
                             "assert_response": {'eq': {'http_code': 200}},
+                            "validate": get_validate(v, self._resolver),
                             "assert_sql": None
 
                         }
                     ]
                 }
-                self.yaml_cases(data=yaml_data, file_path=key)
+                self.yaml_cases(data=yaml_data, file_path=key, key=f"{k.upper()} {key}")
+        return self._writer.flush(dump_cases)
 
 
 if __name__ == '__main__':